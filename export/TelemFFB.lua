@@ -6,6 +6,7 @@ local calc_damage = 0
 require("Vector")
 
 local debug = false -- set to true to enable emmylua debugger and show param handles list
+local binary_frames = true -- send telemetry as binary frames (telemffb/telem/TelemFrame.py), false sends the text format
 
 -- add debug support, to hook up a lua debugger install EmmyLua VSCode extension
 -- Tutorial vid: https://www.youtube.com/watch?v=ZtAW8RhdLYo
@@ -52,6 +53,115 @@ local function sock_readable(s)
   return false
 end
 
+-- Binary telemetry frames, the format is described in telemffb/telem/TelemFrame.py
+-- Lua 5.1 has no string.pack, values are packed byte by byte (little endian)
+local FRAME_HEADER = "\245TF\1"
+local TEXT_ITEMS = "~text"
+
+local function pack_u16(x)
+  return string.char(x % 256, math.floor(x / 256) % 256)
+end
+
+local function pack_int32(x)
+  if x ~= x then
+    x = 0
+  end
+  x = math.floor(x + 0.5)
+  x = math.max(-2147483648, math.min(2147483647, x))
+  if x < 0 then
+    x = x + 4294967296
+  end
+  local b1 = x % 256; x = (x - b1) / 256
+  local b2 = x % 256; x = (x - b2) / 256
+  local b3 = x % 256; x = (x - b3) / 256
+  return string.char(b1, b2, b3, x)
+end
+
+local function pack_double(x)
+  if x ~= x then
+    return "\0\0\0\0\0\0\248\127" -- NaN
+  end
+  local sign = 0
+  if x < 0 or (x == 0 and 1 / x < 0) then
+    sign = 128
+    x = -x
+  end
+  local exponent, mantissa
+  if x == 0 then
+    exponent, mantissa = 0, 0
+  elseif x == math.huge then
+    exponent, mantissa = 2047, 0
+  else
+    local m, e = math.frexp(x) -- x = m * 2^e, 0.5 <= m < 1
+    exponent = e + 1022
+    if exponent <= 0 then
+      exponent, mantissa = 0, math.ldexp(m, e + 1074) -- subnormal
+    else
+      mantissa = math.ldexp(m * 2 - 1, 52)
+    end
+  end
+  local bytes = {}
+  for i = 1, 6 do
+    local b = mantissa % 256
+    bytes[i] = b
+    mantissa = (mantissa - b) / 256
+  end
+  bytes[7] = mantissa + (exponent % 16) * 16
+  bytes[8] = sign + math.floor(exponent / 16)
+  return string.char(unpack(bytes))
+end
+
+-- Formats a telemetry item value as text, arrays "~" separated
+local function format_value(fmt, value)
+  if type(value) == "table" then
+    local elements = {}
+    for i = 1, #value do
+      elements[i] = string.format(fmt, value[i])
+    end
+    return table.concat(elements, "~")
+  end
+  return string.format(fmt, value)
+end
+
+-- Encodes telemetry items {key, format, value} as a binary frame, returns the schema fields, their count and the values.
+-- Numbers, booleans and arrays of numbers are sent binary, "N" and "src" as strings, all other values
+-- as "key=value" text in the TEXT_ITEMS field, after the "key=value;..." text of extra_text
+local function encode_frame(items, extra_text)
+  local fields, numeric, strings, text = {}, {}, {}, {extra_text}
+  for _, item in ipairs(items) do
+    local key, fmt, value = item[1], item[2], item[3]
+    local vtype = type(value)
+    if vtype == "boolean" then
+      value = value and 1 or 0
+      vtype = "number"
+    end
+    if vtype == "number" then
+      if fmt == "%d" or fmt == "%.0f" then
+        fields[#fields + 1] = "i\1" .. string.char(#key) .. key
+        numeric[#numeric + 1] = pack_int32(value)
+      else
+        fields[#fields + 1] = "d\1" .. string.char(#key) .. key
+        numeric[#numeric + 1] = pack_double(value)
+      end
+    elseif vtype == "table" and #value > 0 and #value < 256 then
+      fields[#fields + 1] = "d" .. string.char(#value) .. string.char(#key) .. key
+      for i = 1, #value do
+        numeric[#numeric + 1] = pack_double(value[i])
+      end
+    elseif vtype == "string" and (key == "N" or key == "src") then
+      value = value:sub(1, 255)
+      fields[#fields + 1] = "s\1" .. string.char(#key) .. key
+      strings[#strings + 1] = string.char(#value) .. value
+    elseif value ~= nil then
+      text[#text + 1] = key .. "=" .. format_value(fmt, value)
+    end
+  end
+  text = table.concat(text, ";"):sub(1, 65535)
+  fields[#fields + 1] = "t\1" .. string.char(#TEXT_ITEMS) .. TEXT_ITEMS
+  strings[#strings + 1] = pack_u16(#text) .. text
+  return table.concat(fields), #fields, table.concat(numeric) .. table.concat(strings)
+end
+
 -- Function to calculate air density based on altitude
 function calculateAirDensity(altitude)
   -- Constants for the barometric formula
@@ -282,7 +392,7 @@ local f_telemFFB = {
           local pitch, bank, yaw = LoGetADIPitchBankYaw()
           local aoa = LoGetAngleOfAttack()
           local acceleration = LoGetAccelerationUnits()
-          local AccelerationUnits = "0.00~0.00~0.00"
+          local AccelerationUnits = {0, 0, 0}
           local IAS = LoGetIndicatedAirSpeed() -- m/s
           local M_number = LoGetMachNumber()
           local AirPressure = LoGetBasicAtmospherePressure() -- * 13.60 -- mmHg to kg/m2
@@ -301,28 +411,28 @@ local f_telemFFB = {
           local MCP = LoGetMCPState()
           local isAPEnabled = MCP.AutopilotOn
 
-          local hydraulicPressureSim = string.format("%.3f~%.3f", engine.HydraulicPressure.left, engine.HydraulicPressure.right)
+          local hydraulicPressureSim = {engine.HydraulicPressure.left, engine.HydraulicPressure.right}
 
           local damage = "not enabled"
           local damage_vars = "not supported"
           local hydraulicPressure = "n/a"
 
-          local AB = string.format("%.2f~%.2f", LoGetAircraftDrawArgumentValue(28), LoGetAircraftDrawArgumentValue(29))
+          local AB = {LoGetAircraftDrawArgumentValue(28), LoGetAircraftDrawArgumentValue(29)}
 
-          local WoW = string.format("%.2f~%.2f~%.2f", LeftGear, NoseGear, RightGear)
+          local WoW = {LeftGear, NoseGear, RightGear}
           local tot_wow = tonumber(string.format("%2f",LeftGear+NoseGear+RightGear))
           local on_ground = tot_wow > 0.00
 
           local mech = LoGetMechInfo()
 
           if acceleration then
-            AccelerationUnits = string.format("%.2f~%.2f~%.2f", acceleration.x, acceleration.y, acceleration.z)
+            AccelerationUnits = {acceleration.x, acceleration.y, acceleration.z}
           end
 
           local myselfData
 
           if obj then
-            myselfData = string.format("%.2f~%.2f~%.2f", math.deg(obj.Heading), math.deg(obj.Pitch), math.deg(obj.Bank))
+            myselfData = {math.deg(obj.Heading), math.deg(obj.Pitch), math.deg(obj.Bank)}
           end
 
           local vectorVel = LoGetVectorVelocity()
@@ -339,14 +449,14 @@ local f_telemFFB = {
           local wind_velocity = math.sqrt(wind.x^2 + wind.y^2 + wind.z^2)
           local wind_direction = calculate_wind_direction_2d(wind)
 
-          local velocityVectors = string.format("%.2f~%.2f~%.2f", vectorVel.x, vectorVel.y, vectorVel.z)
+          local velocityVectors = {vectorVel.x, vectorVel.y, vectorVel.z}
 
           local incidence_vec = Vector(vectorVel.x, vectorVel.y, vectorVel.z)
           incidence_vec = incidence_vec - wind_vec
           incidence_vec = incidence_vec:rotY(-(2.0 * math.pi - obj.Heading))
           incidence_vec = incidence_vec:rotZ(-obj.Pitch)
           incidence_vec = incidence_vec:rotX(-obj.Bank)
-          local incidence = string.format("%.3f~%.3f~%.3f", incidence_vec.x, incidence_vec.y, incidence_vec.z)
+          local incidence = {incidence_vec.x, incidence_vec.y, incidence_vec.z}
           local calculated_TAS = math.sqrt(incidence_vec.x^2 + incidence_vec.y^2)
 
           -- calculate relative wind in body frame
@@ -355,7 +465,7 @@ local f_telemFFB = {
           rel_wind = rel_wind:rotY(-(2.0 * math.pi - obj.Heading))
           rel_wind = rel_wind:rotZ(-obj.Pitch)
           rel_wind = rel_wind:rotX(-obj.Bank)
-          rel_wind = string.format("%.3f~%.3f~%.3f", rel_wind.x, rel_wind.y, rel_wind.z)
+          rel_wind = {rel_wind.x, rel_wind.y, rel_wind.z}
 
           local tas = LoGetTrueAirSpeed() --ms^2
           local calc_alpha = 0
@@ -366,13 +476,7 @@ local f_telemFFB = {
           end
 
 
-          local windVelocityVectors =
-            string.format(
-            "%.2f~%.2f~%.2f",
-            wind.x,
-            wind.y,
-            wind.z
-          )
+          local windVelocityVectors = {wind.x, wind.y, wind.z}
           local CM = LoGetSnares()
           local MainPanel = GetDevice(0)
 
@@ -392,7 +496,7 @@ local f_telemFFB = {
           end
 
           local engine = LoGetEngineInfo()
-          local engineRPM = string.format("%.3f~%.3f", engine.RPM.left, engine.RPM.right)
+          local engineRPM = {engine.RPM.left, engine.RPM.right}
 
           local CannonShells = LoGetPayloadInfo().Cannon.shells
           local stations = LoGetPayloadInfo().Stations
@@ -486,7 +590,7 @@ local f_telemFFB = {
             local LeftGear = LoGetAircraftDrawArgumentValue(104)
             local NoseGear = LoGetAircraftDrawArgumentValue(104)
             local RightGear = LoGetAircraftDrawArgumentValue(104)
-            WoW = string.format("%.2f~%.2f~%.2f", LeftGear, NoseGear, RightGear)
+            WoW = {LeftGear, NoseGear, RightGear}
             tot_wow = tonumber(string.format("%2f",LeftGear+NoseGear+RightGear))
             on_ground = tot_wow > 0
 
@@ -538,7 +642,7 @@ local f_telemFFB = {
               local LeftGear = LoGetAircraftDrawArgumentValue(101) + LoGetAircraftDrawArgumentValue(102)
               local NoseGear = 0
               local RightGear = LoGetAircraftDrawArgumentValue(103) + LoGetAircraftDrawArgumentValue(104)
-              WoW = string.format("%.2f~%.2f~%.2f", LeftGear, NoseGear, RightGear)
+              WoW = {LeftGear, NoseGear, RightGear}
               tot_wow = tonumber(string.format("%2f",LeftGear+NoseGear+RightGear))
               on_ground = tot_wow > 0.00
               local oh6payload = LoGetPayloadInfo()
@@ -1454,14 +1558,14 @@ local f_telemFFB = {
             {"T", "%.3f", t},
             {"N", "%s", obj.Name},
             {"src", "%s", "DCS"},
-            {"SelfData", "%s", myselfData},
-            {"EngRPM", "%s", engineRPM},
+            {"SelfData", "%.2f", myselfData},
+            {"EngRPM", "%.3f", engineRPM},
             {"HydSys", "%s", hydraulicPressure},
-            {"HydPress", "%s", hydraulicPressureSim},
-            {"ACCs", "%s", AccelerationUnits},
-            {"Gun", "%s", CannonShells},
-            {"Wind", "%s", windVelocityVectors},
-            {"VlctVectors", "%s", velocityVectors},
+            {"HydPress", "%.3f", hydraulicPressureSim},
+            {"ACCs", "%.2f", AccelerationUnits},
+            {"Gun", "%d", CannonShells},
+            {"Wind", "%.2f", windVelocityVectors},
+            {"VlctVectors", "%.2f", velocityVectors},
             {"VerticalSpeed", "%s", vertical_speed},
             {"altASL", "%.2f", altAsl},
             {"altAgl", "%.2f", altAgl},
@@ -1473,20 +1577,20 @@ local f_telemFFB = {
             {"TAS_incidence", "%.2f", calculated_TAS},
             {"TAS_raw_kt", "%.2f", tas * 1.944},
             {"TAS_incidence_kt", "%.2f", calculated_TAS * 1.944},
-            {"WeightOnWheels", "%s", WoW},
+            {"WeightOnWheels", "%.2f", WoW},
             {"SimOnGround", "%s", tostring(on_ground)},
-            {"Flares", "%s", CM.flare},
-            {"Chaff", "%s", CM.chaff},
+            {"Flares", "%d", CM.flare},
+            {"Chaff", "%d", CM.chaff},
             {"PayloadInfo", "%s", PayloadInfo},
             {"Mach", "%.4f", M_number},
             {"MechInfo", "%s", JSON:encode(mech):gsub("\n", "")},
-            {"Afterburner", "%s", AB},
+            {"Afterburner", "%.2f", AB},
             {"DynamicPressure", "%.3f", DynamicPressure},
             {"AirDensity", "%.3f", AirDensity},
-            {"Incidence", "%s", incidence},  -- relative airstream in body frame
+            {"Incidence", "%.3f", incidence},  -- relative airstream in body frame
             {"CAlpha", "%.3f", calc_alpha},
             {"CBeta", "%.3f", calc_beta}, -- sideslip angle deg
-            {"RelWind", "%s", rel_wind}, --wind in body frame
+            {"RelWind", "%.3f", rel_wind}, --wind in body frame
             {"Damage", "%s", damage},
             {"Wind_Kts", "%.2f", wind_velocity * 1.944},
             {"Wind_direction", "%.0f", wind_direction},
@@ -1514,6 +1618,23 @@ local f_telemFFB = {
             end
           end
           
+          if binary_frames then
+            local schema, field_count, values = encode_frame(items, stringToSend)
+            if schema ~= self.schema then
+              self.schema = schema
+              self.schema_id = ((self.schema_id or 0) + 1) % 256
+              self.schema_sent_t = nil
+            end
+            -- the schema goes out when the key table changes and once per second, so that a TelemFFB started later picks it up
+            local now = socket.gettime()
+            if not self.schema_sent_t or now - self.schema_sent_t >= 1 then
+              socket.try(self.sock_udp:send(FRAME_HEADER .. "\1" .. string.char(self.schema_id) .. pack_u16(field_count) .. schema))
+              self.schema_sent_t = now
+            end
+            socket.try(self.sock_udp:send(FRAME_HEADER .. "\2" .. string.char(self.schema_id) .. values))
+            return
+          end
+
           local formattedValues = {}
           for _, item in ipairs(items) do
             local value = item[3]
@@ -1521,7 +1642,7 @@ local f_telemFFB = {
               value = value and 1 or 0
             end
             if value ~= nil then
-              local formattedValue = string.format(item[2], value)
+              local formattedValue = format_value(item[2], value)
               table.insert(formattedValues, item[1] .. "=" .. formattedValue)
             end
 
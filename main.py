@@ -46,14 +46,17 @@ import telemffb.utils as utils
 import telemffb.xmlutils as xmlutils
 from telemffb.config_utils import autoconvert_config
 from telemffb.hw.ffb_rhino import DeviceInfo, FFBRhino, HapticEffect
+from telemffb.hw.rhino_sim import SimulatedRhinoBackend
 from telemffb.IPCNetworkThread import IPCNetworkThread
 from telemffb.LogWindow import LogWindow
 from telemffb.MainWindow import MainWindow
+from telemffb.Profiler import profiler
 from telemffb.settingsmanager import SettingsWindow
 from telemffb.telem.SimTelemListener import SimListenerManager
 from telemffb.ConfiguratorDialog import ConfiguratorDialog
 #from telemffb.LogTailWindow import LogTailWindow
 from telemffb.telem.TelemManager import TelemManager
+from telemffb.telem.TelemRecorder import TelemReplayer
 from telemffb.utils import (AnsiColors, LoggingFilter, exit_application,
                             set_vpconf_profile)
 from telemffb.namedmutex import NamedMutex
@@ -376,6 +379,9 @@ def main():
     except Exception:
         pass
 
+    if G.args.simulate_device:
+        FFBRhino.set_default_backend(SimulatedRhinoBackend(dynamics=True))
+
     devs = FFBRhino.enumerate()
     logging.info("Available Rhino Devices:")
     logging.info("-------")
@@ -426,6 +432,8 @@ def main():
 
 
     G.telem_manager = TelemManager()
+    if G.args.record:
+        G.telem_manager.start_recording(G.args.record)
     G.telem_manager.start()
     G.sim_listeners = SimListenerManager()
     G.main_window = MainWindow()
@@ -498,16 +506,33 @@ def main():
 
     init_async()
 
-    G.sim_listeners.start_all()
+    if G.args.profile:
+        profiler.enable()
+
+    replayer = None
+    if G.args.replay:
+        # feed a recorded telemetry log instead of listening to the sims
+        replayer = TelemReplayer(G.args.replay, G.telem_manager, speed=G.args.replay_speed)
+        replayer.start_thread()
+    else:
+        G.sim_listeners.start_all()
 
     app.exec_()
 
+    if replayer:
+        replayer.stop()
+
     if G.ipc_instance:
         G.ipc_instance.notify_close_children()
         G.ipc_instance.stop()
 
     G.sim_listeners.stop_all()
     G.telem_manager.quit()
+    if G.args.profile:
+        try:
+            profiler.dump(G.args.profile)
+        except Exception:
+            logging.exception("Unable to write the profile")
     if G.system_settings.get('enableVPConfExit', False):
         ## Push the exit configurator profile if one is configured
         try:
@@ -34,7 +34,12 @@ class CmdLineArgs:
         headless: Optional[bool] = False,
         child: Optional[bool] = False,
         masterport: Optional[str] = None,
-        minimize: Optional[bool] = False
+        minimize: Optional[bool] = False,
+        record: Optional[str] = None,
+        replay: Optional[str] = None,
+        replay_speed: float = 1.0,
+        simulate_device: Optional[bool] = False,
+        profile: Optional[str] = None
     ) -> None:
         self.teleplot = teleplot
         self.plot = plot
@@ -48,6 +53,11 @@ class CmdLineArgs:
         self.child = child
         self.masterport = masterport
         self.minimize = minimize
+        self.record = record
+        self.replay = replay
+        self.replay_speed = replay_speed
+        self.simulate_device = simulate_device
+        self.profile = profile
 
     @classmethod
     def parse(cls):
@@ -74,6 +84,14 @@ class CmdLineArgs:
 
         parser.add_argument('--minimize', action='store_true', help='Minimize on startup')
 
+        parser.add_argument('--record', type=str, metavar="FILE", help='Record all received telemetry to a log file', default=None)
+        parser.add_argument('--replay', type=str, metavar="FILE", help='Replay a recorded telemetry log instead of listening to the sims', default=None)
+        parser.add_argument('--replay-speed', type=float, metavar="N", default=1.0,
+                            help='Replay speed: 1 = original timing (default), N = N times faster, 0 = as fast as possible')
+        parser.add_argument('--simulate-device', action='store_true', help='Use a simulated Rhino instead of a USB device')
+        parser.add_argument('--profile', type=str, metavar="FILE", default=None,
+                            help='Profile the telemetry processing and write the per effect timings to FILE on exit')
+
         args = parser.parse_args()
 
         return cls(**vars(args))
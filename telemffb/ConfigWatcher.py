@@ -0,0 +1,254 @@
+#
+# This file is part of the TelemFFB distribution (https://github.com/walmis/TelemFFB).
+# Copyright (c) 2023 Valmantas Palikša.
+# Copyright (c) 2023 Micah Frisby
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import struct
+import sys
+import threading
+from typing import Callable, List
+
+from telemffb.xmlindex import file_stamp
+
+
+class WatchBackend:
+    """
+    Base class for file watch backends.  A backend runs its own thread and calls ``on_change``
+    whenever one of the watched files may have been modified.
+    """
+    name = "none"
+
+    def __init__(self, files: List[str], on_change: Callable[[], None]):
+        self.files = [os.path.abspath(f) for f in files]
+        self.on_change = on_change
+        self._run = False
+        self._thread = None
+
+    @classmethod
+    def available(cls) -> bool:
+        return False
+
+    def start(self):
+        self._run = True
+        self._thread = threading.Thread(target=self.run, daemon=True, name=f"ConfigWatcher-{self.name}")
+        self._thread.start()
+
+    def stop(self):
+        self._run = False
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2)
+        self._thread = None
+
+    def run(self):
+        raise NotImplementedError
+
+
+class PollingWatchBackend(WatchBackend):
+    """Fallback backend, compares file mtime/size at a fixed (low) rate"""
+    name = "polling"
+
+    def __init__(self, files, on_change, poll_interval=1.0):
+        super().__init__(files, on_change)
+        self.poll_interval = poll_interval
+        self._wakeup = threading.Event()
+
+    @classmethod
+    def available(cls) -> bool:
+        return True
+
+    def stop(self):
+        self._run = False
+        self._wakeup.set()
+        super().stop()
+
+    def run(self):
+        stamps = [file_stamp(f) for f in self.files]
+        while self._run:
+            self._wakeup.wait(self.poll_interval)
+            if not self._run:
+                break
+            current = [file_stamp(f) for f in self.files]
+            if current != stamps:
+                stamps = current
+                self.on_change()
+
+
+class InotifyWatchBackend(WatchBackend):
+    """Linux inotify backend.  Watches the parent directories so that files replaced by rename are still seen"""
+    name = "inotify"
+
+    IN_MODIFY = 0x00000002
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+
+    _event_hdr = struct.Struct("iIII")
+
+    def __init__(self, files, on_change):
+        super().__init__(files, on_change)
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._fd = -1
+
+    @classmethod
+    def available(cls) -> bool:
+        if not sys.platform.startswith("linux"):
+            return False
+        lib = ctypes.util.find_library("c")
+        return lib is not None and hasattr(ctypes.CDLL(lib), "inotify_init1")
+
+    def start(self):
+        self._fd = self._libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        mask = self.IN_MODIFY | self.IN_CLOSE_WRITE | self.IN_MOVED_TO | self.IN_CREATE
+        for directory in {os.path.dirname(f) for f in self.files}:
+            if self._libc.inotify_add_watch(self._fd, os.fsencode(directory), mask) < 0:
+                logging.warning(f"ConfigWatcher: unable to watch {directory}")
+        super().start()
+
+    def stop(self):
+        super().stop()
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+    def run(self):
+        names = {os.path.basename(f) for f in self.files}
+        while self._run:
+            readable, _, _ = select.select([self._fd], [], [], 0.5)
+            if not readable:
+                continue
+            try:
+                buf = os.read(self._fd, 4096)
+            except BlockingIOError:
+                continue
+            except OSError:
+                break
+
+            changed = False
+            pos = 0
+            while pos < len(buf):
+                wd, mask, cookie, length = self._event_hdr.unpack_from(buf, pos)
+                pos += self._event_hdr.size
+                name = buf[pos:pos + length].rstrip(b"\0").decode(errors="replace")
+                pos += length
+                if name in names:
+                    changed = True
+            if changed:
+                self.on_change()
+
+
+class ConfigWatcher:
+    """
+    Watches the xml config files and raises a debounced "changed" flag.
+
+    Backend notifications restart a settle timer, the flag is set only once no further change has been
+    seen for ``settle_delay`` seconds. This avoids reading a file that another instance is still writing.
+    The telemetry thread only has to call :meth:`consume`, which is a plain attribute check in the
+    common case.
+    """
+
+    backends = [InotifyWatchBackend, PollingWatchBackend]
+
+    def __init__(self, files: List[str], settle_delay=0.4, poll_interval=1.0, backend=None):
+        """
+        :param files: files to watch
+        :param settle_delay: seconds to wait after the last change before reporting it
+        :param poll_interval: seconds between checks when falling back to the polling backend
+        :param backend: WatchBackend subclass to use, by default the first available one from ``backends``
+        """
+        self.files = list(files)
+        self.settle_delay = settle_delay
+        self.poll_interval = poll_interval
+        self.changed = False
+        self._timer = None
+        self._lock = threading.Lock()
+        self._backend_cls = backend
+        self._backend: WatchBackend = None
+
+    @property
+    def backend_name(self):
+        return self._backend.name if self._backend else None
+
+    def start(self):
+        candidates = [self._backend_cls] if self._backend_cls else self.backends
+        for cls in candidates + [PollingWatchBackend]:
+            if not cls.available():
+                continue
+            try:
+                if cls is PollingWatchBackend:
+                    backend = cls(self.files, self._on_change, self.poll_interval)
+                else:
+                    backend = cls(self.files, self._on_change)
+                backend.start()
+            except Exception:
+                logging.exception(f"ConfigWatcher: {cls.name} backend failed to start")
+                continue
+            self._backend = backend
+            logging.info(f"ConfigWatcher: watching {self.files} using {backend.name} backend")
+            return
+
+    def stop(self):
+        if self._backend:
+            self._backend.stop()
+            self._backend = None
+        with self._lock:
+            if self._timer:
+                self._timer.cancel()
+                self._timer = None
+
+    def set_files(self, files: List[str]):
+        """Restart watching with a different set of files, e.g. after a custom userconfig was loaded"""
+        files = list(files)
+        if files == self.files:
+            return
+        self.stop()
+        self.files = files
+        self.start()
+
+    def consume(self) -> bool:
+        """
+        Returns True once per settled config change
+
+        :return: True if the config changed since the last call
+        """
+        if not self.changed:
+            return False
+        self.changed = False
+        logging.info(f'Config changed: {self.settle_delay} second timer expired, reading changes')
+        return True
+
+    def _on_change(self):
+        with self._lock:
+            if self._timer is None:
+                logging.info(f'Config changed: Waiting {self.settle_delay} seconds to read changes')
+            else:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.settle_delay, self._settled)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _settled(self):
+        with self._lock:
+            self._timer = None
+        self.changed = True
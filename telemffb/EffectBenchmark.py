@@ -0,0 +1,884 @@
+#
+# This file is part of the TelemFFB distribution (https://github.com/walmis/TelemFFB).
+# Copyright (c) 2023 Valmantas Palikša.
+# Copyright (c) 2023 Micah Frisby
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+Headless effect pipeline benchmark.
+
+Replays recorded telemetry through every aircraft class of the sim modules without a sim or a Rhino
+attached (FFBRhino runs on the simulated HID backend), and reports per class and device type:
+
+* ``Aircraft.on_telemetry`` latency percentiles
+* transient memory allocated per frame (tracemalloc peak, measured in a separate pass)
+* HID reports written per frame
+
+Frames are read from IL2 traces (``il2_test_data.gz`` written by IL2Manager.log_il2_trace) or from
+telemetry logs recorded with ``--record`` (see TelemRecorder).  Classes are benchmarked with frames of
+their own sim, so every sim needs a recording to be covered.
+
+``--encoding`` runs a micro benchmark of the HapticEffect update calls alone (report encoding and the
+change check), with the HID writes replaced by a counter.
+
+``--math`` compares the world to body frame rotation of the MSFS incidence vector done with chained
+``utils.Vector`` rotations against the fused ``utils.Rotation`` matrix.
+
+``--changes`` compares the former dict of tuples ``anything_has_changed`` against the ChangeTracker on a
+typical mix of checks per frame.
+
+``--filters`` compares the ``utils`` filters (one perf_counter() call per update) against the FilterBank on a
+typical set of channels per frame, and prints the attenuation of a 13 Hz buffet by the first and second
+order low pass filters.
+
+``--handoff`` compares the former text round trip of MSFS frames from the SimConnect thread to the
+telemetry thread (format, encode, decode, to_number) against handing over a copied dict.
+
+``--parsing`` compares ``utils.to_number`` against the TelemValueParser on text telemetry frames, a built
+in DCS-like sample or the ``key=value;...`` lines of the given file.
+
+``--synthetic-msfs`` adds a generated one minute MSFS flight (takeoff, manoeuvring, landing) for
+benchmarking the MSFS classes when no MSFS recording is at hand.
+
+Usage::
+
+    python -m telemffb.EffectBenchmark [files...] [--device joystick pedals collective] [--classes REGEX]
+    python -m telemffb.EffectBenchmark --synthetic-msfs --classes "MSFS\.Prop" --device joystick
+    python -m telemffb.EffectBenchmark --encoding
+    python -m telemffb.EffectBenchmark --math
+    python -m telemffb.EffectBenchmark --changes
+    python -m telemffb.EffectBenchmark --filters
+    python -m telemffb.EffectBenchmark --handoff
+    python -m telemffb.EffectBenchmark --parsing [FRAMES]
+"""
+
+import argparse
+import base64
+import gzip
+import logging
+import math
+import os
+import re
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+from typing import Dict, List
+
+from PyQt5.QtCore import QCoreApplication
+
+import telemffb.globals as G
+import telemffb.utils as utils
+import telemffb.xmlutils as xmlutils
+from telemffb.hw.ffb_rhino import FFBReport_SetCondition, FFBRhino, HapticEffect
+from telemffb.hw.rhino_sim import SimulatedRhino, SimulatedRhinoBackend
+from telemffb.sim import aircraft_base, aircrafts_dcs, aircrafts_il2, aircrafts_msfs_xp
+from telemffb.sim.aircraft_base import AircraftBase
+from telemffb.sim.change_tracker import ChangeTracker
+from telemffb.sim.filter_bank import FilterBank
+from telemffb.telem.TelemFrame import copy_frame
+from telemffb.telem.TelemRecorder import TelemLogReader
+from telemffb.telem.ValueParser import TelemValueParser
+
+DEVICE_TYPES = ["joystick", "pedals", "collective"]
+
+# telemetry "src" -> (sim module, sim name used for the settings lookup)
+SIM_MODULES = {
+    "IL2": (aircrafts_il2, "IL2"),
+    "MSFS": (aircrafts_msfs_xp, "MSFS"),
+    "XPLANE": (aircrafts_msfs_xp, "XPLANE"),
+    "DCS": (aircrafts_dcs, "DCS"),
+}
+
+
+class _NullSignal:
+    def emit(self, *args):
+        pass
+
+
+class _NullSimConnect:
+    """Swallows the axis position events and simvars the MSFS classes send back to the sim"""
+    def send_event_to_msfs(self, *args):
+        pass
+
+    def set_simdatum_to_msfs(self, *args, **kwargs):
+        pass
+
+
+@dataclass
+class BenchmarkResult:
+    sim: str
+    cls_name: str
+    device_type: str
+    frames: int = 0
+    errors: int = 0
+    latencies_ns: List[int] = field(default_factory=list)
+    hid_writes: int = 0
+    hid_submitted: int = 0
+    hid_bytes: int = 0
+    effects_created: int = 0
+    alloc_peak_bytes: List[int] = field(default_factory=list)
+    retained_bytes: int = 0
+    effect_graph: List[dict] = field(default_factory=list)
+
+    def percentile(self, p) -> float:
+        """Latency percentile in microseconds"""
+        if not self.latencies_ns:
+            return 0.0
+        ordered = sorted(self.latencies_ns)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))] / 1000.0
+
+
+def load_frames(path) -> List[tuple]:
+    """
+    Loads recorded frames
+
+    :param path: IL2 trace (.gz) or telemetry log
+    :return: list of (timestamp, frame dict) and (timestamp, event tuple) items
+    """
+    items = []
+    if path.endswith(".gz"):
+        from telemffb.telem.IL2Manager import IL2Manager
+        il2 = IL2Manager()
+        with gzip.open(path, "r") as f:
+            t = 0.0
+            while True:
+                line = f.readline()
+                if not line:
+                    break
+                if line.startswith(b"t"):
+                    t = float(line.split(b"=")[1])
+                    frame = il2.process_packet(base64.b64decode(f.readline()))
+                    if frame:
+                        items.append((t, frame))
+        return items
+
+    parser = TelemValueParser()
+    for ts, frame in TelemLogReader(path).records():
+        if isinstance(frame, dict):
+            items.append((ts, frame))
+        elif frame.startswith("Ev="):
+            items.append((ts, tuple(frame[3:].split(";"))))
+        else:
+            items.append((ts, {section: parser.parse_item(section, conf)
+                               for section, conf in (i.split("=", 1) for i in frame.split(";") if "=" in i)}))
+    return items
+
+
+def synthetic_msfs_frames(seconds=60.0, rate=60.0, aircraft_name="Cessna Skyhawk G1000 Asobo") -> List[tuple]:
+    """
+    Generates MSFS telemetry of a short flight: ground roll, climb, manoeuvring with stall buffet, approach
+    and touchdown.  Values are plausible rather than physically consistent.
+
+    :return: list of (timestamp, frame dict), see load_frames
+    """
+    frames = []
+    n = int(seconds * rate)
+    for i in range(n):
+        t = i / rate
+        phase = t / seconds
+        if phase < 0.15:        # takeoff roll
+            tas = 35.0 * phase / 0.15
+            wow = 1.0 - max(0.0, (phase - 0.12) / 0.03)
+            pitch, roll, aoa, flaps, gear = 0.0, 0.0, 0.0, 0.1, 1.0
+        elif phase < 0.8:       # climb and manoeuvring
+            k = (phase - 0.15) / 0.65
+            tas = 35.0 + 20.0 * math.sin(k * math.pi)
+            wow = 0.0
+            roll = 40.0 * math.sin(t * 0.7)
+            pitch = -8.0 * math.sin(t * 0.3)
+            aoa = 4.0 + 11.0 * max(0.0, math.sin(t * 0.45)) ** 4    # reaches the buffet range
+            flaps, gear = 0.0, 1.0
+        else:                   # approach and landing
+            k = (phase - 0.8) / 0.2
+            tas = 40.0 - 25.0 * k
+            wow = 1.0 if k > 0.5 else 0.0
+            pitch, roll, aoa, flaps, gear = -3.0 * (1.0 - k), 5.0 * math.sin(t), 6.0 * (1.0 - k), 0.5, 1.0
+        heading = (90.0 + 10.0 * t) % 360.0
+        hr = math.radians(heading)
+        rpm = 2300.0 if phase < 0.8 else 1500.0
+        frames.append((t, {
+            "src": "MSFS", "N": aircraft_name, "T": t, "SimconnectCategory": "Airplane", "EngineType": 0,
+            "NumEngines": 1, "SimPaused": 0, "SimDisabled": 0, "Slew": 0, "Parked": 0,
+            "G": 1.0 + 0.3 * math.sin(t), "AccBody": [0.02 * math.sin(t * 3.1), 0.2 * math.sin(t), -0.05 * wow],
+            "TAS": tas, "IAS": tas * 0.97, "GroundSpeed": tas, "AirDensity": 1.225, "DynPressure": 0.6125 * tas * tas,
+            "AoA": aoa, "StallAoA": 16.0, "SideSlip": 0.5 * math.sin(t), "VerticalSpeed": -pitch * 0.3,
+            "ElevDefl": -aoa, "ElevDeflPct": -aoa / 20.0, "ElevTrim": 0.0, "ElevTrimPct": 0.05,
+            "AileronDefl": roll / 4.0, "AileronDeflPctLR": [roll / 80.0, -roll / 80.0], "AileronTrim": 0.0,
+            "AileronTrimPct": 0.0, "RudderDefl": 2.0 * math.sin(t), "RudderDeflPct": 0.1 * math.sin(t),
+            "RudderTrimPct": 0.0, "PropThrust": [2000.0 * rpm / 2300.0, 0.0, 0.0, 0.0], "PropRPM": [rpm, 0.0, 0.0, 0.0],
+            "EngRPM": [rpm / 2700.0, 0.0, 0.0, 0.0], "RotorRPM": 0.0, "APMaster": 0, "ACisFBW": 0,
+            "Pitch": pitch, "Roll": roll, "Heading": heading, "CyclicTrimX": 0.0, "CyclicTrimY": 0.0,
+            "VelRotBody": [0.0, 2.0 * math.cos(t * 0.7), 0.0], "AccRotBody": [0.0, 0.0, 0.0],
+            "DesignSpeed": [62.0, 24.0, 27.0], "Brakes": [wow * 0.2, wow * 0.2],
+            "SimOnGround": 1 if wow else 0, "SurfaceType": "Asphalt",
+            "AmbWind": [2.0, 0.0, -1.0], "VelWorld": [tas * math.sin(hr), 0.0, tas * math.cos(hr)],
+            "WeightOnWheels": [wow, wow, wow], "Flaps": [flaps, flaps], "Gear": [gear, gear], "RetractableGear": [0],
+            "Spoilers": [0.0, 0.0], "Afterburner": [0, 0], "AfterburnerPct": 0.0, "StallWarning": 1 if aoa > 14 else 0,
+            "CollectivePos": 0.0, "TailRotorPedalPos": 0.0, "HydPress": [3000.0, 3000.0], "HydResPct": [1.0, 1.0],
+            "HydSwitch": 1, "HydSys": 1.0,
+        }))
+    return frames
+
+
+def aircraft_classes(module) -> list:
+    return [c for c in vars(module).values()
+            if isinstance(c, type) and issubclass(c, AircraftBase) and c.__module__ == module.__name__]
+
+
+def setup_environment(userconfig_path):
+    """Prepares the globals normally set up by main.py for a headless run"""
+    if G.system_settings is None:
+        G.system_settings = {"focus_pauseIL2": False}
+    if G.telem_manager is None:
+        G.telem_manager = SimpleNamespace(telemetryTimeout=_NullSignal(), eventReceived=_NullSignal())
+    aircrafts_msfs_xp.Aircraft.set_simconnect(_NullSimConnect())
+    G.defaults_path = utils.get_resource_path('defaults.xml', prefer_root=True)
+    G.userconfig_path = userconfig_path
+    if not os.path.exists(userconfig_path):
+        utils.create_empty_userxml_file(userconfig_path)
+
+
+def _feed(aircraft, frames, device_type, result: BenchmarkResult = None, alloc=False):
+    """Runs frames through an aircraft handler, the same way TelemManager.process_data does"""
+    perf_counter_ns = time.perf_counter_ns
+    device = HapticEffect.device
+    for ts, frame in frames:
+        if isinstance(frame, tuple):
+            aircraft.on_event(*frame)
+            continue
+        telem_data = copy_frame(frame)
+        telem_data["FFBType"] = device_type
+        # normally done by the HIDReader thread, polled here to keep runs deterministic
+        device.read_reports()
+
+        if alloc:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+        t0 = perf_counter_ns()
+        try:
+            aircraft._last_telem_data = aircraft._telem_data.copy()
+            aircraft._telem_data = telem_data
+            aircraft.frame.reset(telem_data)
+            aircraft.changes.begin_frame()
+            aircraft.filters.begin_frame()
+            device.begin_frame()
+            try:
+                aircraft.on_telemetry(telem_data)
+            finally:
+                device.commit_frame()
+        except Exception:
+            if result is not None:
+                if not result.errors:
+                    logging.exception(f"{result.cls_name}.on_telemetry exception ({device_type})")
+                result.errors += 1
+        dt = perf_counter_ns() - t0
+
+        if result is None:
+            continue
+        if alloc:
+            result.alloc_peak_bytes.append(tracemalloc.get_traced_memory()[1] - before)
+        else:
+            result.latencies_ns.append(dt)
+            result.frames += 1
+
+
+def _new_aircraft(cls, sim, aircraft_name, device_type):
+    xmlutils.update_vars(device_type, G.userconfig_path, G.defaults_path)
+    model_type = "" if cls.__name__ == "Aircraft" else cls.__name__
+    _, _, settings = xmlutils.read_single_model(sim, aircraft_name, model_type, device_type)
+    params = utils.sanitize_dict(xmlutils.model_settings_to_params(settings))
+
+    HapticEffect.device.read_reports()     # DCS classes read the stick position on creation
+    aircraft = cls(aircraft_name)
+    aircraft.apply_settings(params)
+    return aircraft
+
+
+def benchmark_class(cls, sim, frames, device_type, warmup=50, measure_alloc=True) -> BenchmarkResult:
+    """
+    Benchmarks one aircraft class for one device type
+
+    :param frames: frames of the class' sim, see load_frames
+    :param warmup: frames run before measuring (effect creation, filter settling)
+    """
+    aircraft_name = next((f.get("N") for _, f in frames if isinstance(f, dict) and f.get("N")), "")
+    result = BenchmarkResult(sim, cls.__name__, device_type)
+
+    G.device_type = device_type
+    HapticEffect.device = FFBRhino(backend=SimulatedRhinoBackend(), read_thread=False)
+    device: SimulatedRhino = HapticEffect.device._dev
+    aircraft = _new_aircraft(cls, sim, aircraft_name, device_type)
+
+    rhino = HapticEffect.device
+    _feed(aircraft, frames[:warmup], device_type)
+    rhino.flush()
+    writes, nbytes, created = device.writes, device.bytes_written, device.effects_created
+    submitted = rhino.write_metrics.reports_submitted
+    _feed(aircraft, frames[warmup:], device_type, result)
+    rhino.flush()
+    result.hid_writes = device.writes - writes
+    result.hid_bytes = device.bytes_written - nbytes
+    result.hid_submitted = rhino.write_metrics.reports_submitted - submitted
+    result.effects_created = device.effects_created - created
+    result.effect_graph = aircraft.effect_graph.inventory(aircraft)
+    aircraft_base.effects.clear()
+    rhino.close()
+
+    if measure_alloc:
+        HapticEffect.device = FFBRhino(backend=SimulatedRhinoBackend(), read_thread=False)
+        aircraft = _new_aircraft(cls, sim, aircraft_name, device_type)
+        _feed(aircraft, frames[:warmup], device_type)
+        tracemalloc.start()
+        try:
+            start = tracemalloc.get_traced_memory()[0]
+            _feed(aircraft, frames[warmup:], device_type, result, alloc=True)
+            result.retained_bytes = tracemalloc.get_traced_memory()[0] - start
+        finally:
+            tracemalloc.stop()
+        aircraft_base.effects.clear()
+        HapticEffect.device.close()
+
+    return result
+
+
+def print_report(results: List[BenchmarkResult]):
+    print(f"{'sim':<6} {'class':<20} {'device':<10} {'frames':>7} {'err':>5} {'p50 us':>8} {'p90 us':>8} "
+          f"{'p99 us':>8} {'max us':>8} {'alloc KiB/f':>11} {'retained KiB':>12} {'writes/f':>8} {'submit/f':>8} {'bytes/f':>8} "
+          f"{'created':>7}")
+    for r in results:
+        n = max(r.frames, 1)
+        alloc = sum(r.alloc_peak_bytes) / len(r.alloc_peak_bytes) / 1024 if r.alloc_peak_bytes else 0.0
+        print(f"{r.sim:<6} {r.cls_name:<20} {r.device_type:<10} {r.frames:>7} {r.errors:>5} {r.percentile(50):>8.1f} "
+              f"{r.percentile(90):>8.1f} {r.percentile(99):>8.1f} {r.percentile(100):>8.1f} {alloc:>11.2f} "
+              f"{r.retained_bytes / 1024:>12.1f} {r.hid_writes / n:>8.2f} {r.hid_submitted / n:>8.2f} {r.hid_bytes / n:>8.1f} "
+              f"{r.effects_created:>7}")
+
+
+def print_effect_graphs(results: List[BenchmarkResult]):
+    """Prints the calls and skips of the effect graph nodes, counted over warmup and measured frames"""
+    for r in results:
+        if not r.effect_graph:
+            continue
+        print(f"\n{r.sim}.{r.cls_name} ({r.device_type})")
+        print(f"  {'effect':<20} {'state':<9} {'calls':>7} {'skips':>7}")
+        for node in r.effect_graph:
+            state = "n/a" if not node["applies"] else "enabled" if node["enabled"] else "disabled"
+            print(f"  {node['name']:<20} {state:<9} {node['calls']:>7} {node['skips']:>7}")
+
+
+def run(files, device_types=None, class_filter=None, warmup=50, measure_alloc=True, frames=None) -> List[BenchmarkResult]:
+    """
+    Benchmarks all aircraft classes against the recorded frames
+
+    :param files: IL2 traces and/or telemetry logs
+    :param frames: additional frames, e.g. synthetic_msfs_frames()
+    :param device_types: subset of DEVICE_TYPES
+    :param class_filter: regex matched against "sim.ClassName"
+    """
+    frames_by_sim: Dict[str, list] = {}
+    items = [item for path in files for item in load_frames(path)] + list(frames or [])
+    for ts, frame in items:
+        src = "DCS"
+        if isinstance(frame, dict):
+            src = frame.get("src") or "DCS"
+        frames_by_sim.setdefault(src if src in SIM_MODULES else "DCS", []).append((ts, frame))
+
+    results = []
+    for src, frames in frames_by_sim.items():
+        module, sim = SIM_MODULES[src]
+        logging.info(f"{sim}: {len(frames)} frames")
+        for cls in aircraft_classes(module):
+            if class_filter and not re.search(class_filter, f"{sim}.{cls.__name__}"):
+                continue
+            for device_type in device_types or DEVICE_TYPES:
+                results.append(benchmark_class(cls, sim, frames, device_type, warmup, measure_alloc))
+    return results
+
+
+def _encoding_cases():
+    """(name, update function) pairs, update(i) performs one effect update"""
+    constant = HapticEffect()
+    periodic = HapticEffect()
+    spring = HapticEffect()
+    cond = FFBReport_SetCondition(parameterBlockOffset=1)
+    cases = [
+        ("constant changing", lambda i: constant.constant((i % 100) / 100, i % 360)),
+        ("constant steady", lambda i: constant.constant(0.5, 90)),
+        ("periodic changing", lambda i: periodic.periodic(10 + i % 20, (i % 100) / 100, i % 360, phase=i % 255)),
+        ("periodic steady", lambda i: periodic.periodic(20, 0.5, 45)),
+        ("spring changing", lambda i: spring.spring(i % 4096, 4096 - i % 4096)),
+        ("spring steady", lambda i: spring.spring(2048, 2048)),
+    ]
+
+    def condition(i):
+        cond.set_coefficient(i % 4096)
+        spring.setCondition(cond)
+
+    cases.append(("condition changing", condition))
+    return cases
+
+
+def benchmark_encoding(updates=20000):
+    """
+    Measures single effect updates: time per call and transient memory allocated per call (tracemalloc peak)
+
+    :return: list of (name, ns per update, peak bytes per update, writes per update)
+    """
+    rhino = FFBRhino(backend=SimulatedRhinoBackend(), read_thread=False, batch_writes=False)
+    HapticEffect.device = rhino
+    writes = [0]
+
+    def count_write(data):
+        writes[0] += 1
+    rhino.write = count_write  # measure encoding only, not the device
+
+    results = []
+    for name, update in _encoding_cases():
+        for i in range(100):
+            update(i)
+        writes[0] = 0
+        t0 = time.perf_counter_ns()
+        for i in range(updates):
+            update(i)
+        elapsed = time.perf_counter_ns() - t0
+        n_writes = writes[0]
+
+        n = min(updates, 2000)
+        peak = 0
+        tracemalloc.start()
+        try:
+            for i in range(n):
+                tracemalloc.reset_peak()
+                base = tracemalloc.get_traced_memory()[0]
+                update(i)
+                peak += tracemalloc.get_traced_memory()[1] - base
+        finally:
+            tracemalloc.stop()
+        results.append((name, elapsed / updates, peak / n, n_writes / updates))
+
+    aircraft_base.effects.clear()
+    rhino.close()
+    return results
+
+
+def _body_frame_cases():
+    """(name, function) pairs, function(vel, wind, heading, pitch, roll) returns the body frame incidence"""
+    rad = 0.0174533
+
+    def chained_vector(vel, wind, heading, pitch, roll):
+        v = utils.Vector(vel) - utils.Vector(wind)
+        v = v.rotY(-(heading * rad))
+        v = v.rotX(-pitch * rad)
+        v = v.rotZ(-roll * rad)
+        return list(v)
+
+    rot = utils.Rotation()
+
+    def fused_rotation(vel, wind, heading, pitch, roll):
+        rot.set_world_to_body(heading * rad, pitch * rad, roll * rad)
+        vx, vy, vz = vel
+        wx, wy, wz = wind
+        return list(rot.apply(vx - wx, vy - wy, vz - wz))
+
+    return [("Vector rotY/X/Z", chained_vector), ("Rotation fused", fused_rotation)]
+
+
+def benchmark_body_frame(iterations=100000):
+    """
+    Measures one world to body frame incidence computation per frame
+
+    :return: list of (name, ns per frame, peak bytes per frame, max deviation from the Vector result)
+    """
+    frames = [([50.0 + i % 7, -1.5 + i % 3, 120.0 - i % 11], [3.0, 0.2, -4.0 + i % 5], i % 360, (i % 60) - 30, (i % 90) - 45)
+              for i in range(1000)]
+    reference = None
+    results = []
+    for name, func in _body_frame_cases():
+        out = [func(*f) for f in frames]
+        if reference is None:
+            reference = out
+        deviation = max(abs(a - b) for r, o in zip(reference, out) for a, b in zip(r, o))
+
+        n = len(frames)
+        t0 = time.perf_counter_ns()
+        for i in range(iterations):
+            func(*frames[i % n])
+        elapsed = time.perf_counter_ns() - t0
+
+        peak = 0
+        tracemalloc.start()
+        try:
+            for f in frames:
+                tracemalloc.reset_peak()
+                base = tracemalloc.get_traced_memory()[0]
+                func(*f)
+                peak += tracemalloc.get_traced_memory()[1] - base
+        finally:
+            tracemalloc.stop()
+        results.append((name, elapsed / iterations, peak / n, deviation))
+    return results
+
+
+def _change_tracking_cases():
+    """(name, begin_frame function, check function) triples, check has the anything_has_changed signature"""
+    changes = {}
+
+    def dict_of_tuples(item, value, delta_ms=0):
+        prev_val, tm, changed_yet = changes.get(item, (None, 0, 0))
+        new_val = value
+        new_tm = time.perf_counter()
+        if type(new_val) == float:
+            new_val = round(new_val, 3)
+        if prev_val == None and not changed_yet:
+            changes[item] = (new_val, tm, 0)
+            prev_val = new_val
+        if prev_val != new_val:
+            changes[item] = (new_val, new_tm, 1)
+        if prev_val != new_val and prev_val is not None and new_val is not None:
+            return (prev_val, new_val, new_tm - tm)
+        if time.perf_counter() - tm < delta_ms / 1000.0:
+            return True
+        return False
+
+    tracker = ChangeTracker()
+    return [("dict of tuples", lambda: None, dict_of_tuples),
+            ("ChangeTracker", tracker.begin_frame, tracker.check)]
+
+
+def benchmark_change_tracking(frames=20000):
+    """
+    Measures the change checks of one frame, a mix of moving and steady floats, ints, lists and None
+    with and without hold times
+
+    :return: list of (name, ns per frame, peak bytes per frame, fraction of results differing from the first case)
+    """
+    def frame_values(i):
+        return (("gear_value", 1.0 - min(i % 600, 300) / 300.0, 50),        # moves half of the time
+                ("Flaps", (i // 200) % 3 * 0.5, 100),                       # steps
+                ("speedbrakes_value", 0.0, 50),
+                ("Spoilers", 0.0, 50),
+                ("Canopy", 0.0, 100),
+                ("tailhook_value", None, 200),
+                ("PayloadInfo", "AIM-9;AIM-120", 0),
+                ("PayloadInfo", "AIM-9;AIM-120", 160),
+                ("Gun", 510 - i // 50, 0),
+                ("Gun", 510 - i // 50, 160),
+                ("Flares", 30, 0),
+                ("Chaff", 30, 0),
+                ("decel", 0.0123 * (i % 7), 0),
+                ("damper_value", 0.25, 0),
+                ("inertia_value", 0.1, 0),
+                ("friction_value", 0.05, 0),
+                ("Afterburner", [0.0, 0.0], 0))
+
+    inputs = [frame_values(i) for i in range(1000)]
+    reference = None
+    results = []
+    for name, begin_frame, check in _change_tracking_cases():
+        out = []
+        for values in inputs:
+            begin_frame()
+            out.extend(bool(check(*v)) for v in values)
+        if reference is None:
+            reference = out
+        mismatch = sum(a != b for a, b in zip(reference, out)) / len(out)
+
+        n = len(inputs)
+        t0 = time.perf_counter_ns()
+        for i in range(frames):
+            begin_frame()
+            for v in inputs[i % n]:
+                check(*v)
+        elapsed = time.perf_counter_ns() - t0
+
+        peak = 0
+        tracemalloc.start()
+        try:
+            for values in inputs:
+                tracemalloc.reset_peak()
+                base = tracemalloc.get_traced_memory()[0]
+                begin_frame()
+                for v in values:
+                    check(*v)
+                peak += tracemalloc.get_traced_memory()[1] - base
+        finally:
+            tracemalloc.stop()
+        results.append((name, elapsed / frames, peak / n, mismatch))
+    return results
+
+
+def _filter_cases():
+    """(name, begin_frame function, frame update function) triples for 4 low pass, 2 high pass and 2 damped channels"""
+    lpfs = [utils.LowPassFilter(5) for _ in range(4)]
+    hpfs = [utils.HighPassFilter(3) for _ in range(2)]
+    dampener = utils.Derivative()
+
+    def utils_update(values):
+        out = [f.update(v) for f, v in zip(lpfs, values)]
+        out.extend(f.update(v) for f, v in zip(hpfs, values[4:6]))
+        out.append(dampener.dampen_value(values[6], "a", derivative_hz=5, derivative_k=0.15))
+        out.append(dampener.dampen_value(values[7], "b", derivative_hz=5, derivative_k=0.15))
+        return out
+
+    bank = FilterBank()
+    lp_names = ("lp0", "lp1", "lp2", "lp3")
+    hp_names = ("hp0", "hp1")
+
+    def bank_update(values):
+        out = [bank.lowpass(name, 5).update(v) for name, v in zip(lp_names, values)]
+        out.extend(bank.highpass(name, 3).update(v) for name, v in zip(hp_names, values[4:6]))
+        out.append(bank.dampen(values[6], "a", derivative_hz=5, derivative_k=0.15))
+        out.append(bank.dampen(values[7], "b", derivative_hz=5, derivative_k=0.15))
+        return out
+
+    return [("utils filters", lambda: None, utils_update),
+            ("FilterBank", bank.begin_frame, bank_update)]
+
+
+def benchmark_filters(frames=20000):
+    """
+    Measures the filter updates of one frame
+
+    :return: list of (name, ns per frame, peak bytes per frame)
+    """
+    inputs = [[math.sin(i * 0.05 + k) for k in range(8)] for i in range(1000)]
+    n = len(inputs)
+    results = []
+    for name, begin_frame, update in _filter_cases():
+        t0 = time.perf_counter_ns()
+        for i in range(frames):
+            begin_frame()
+            update(inputs[i % n])
+        elapsed = time.perf_counter_ns() - t0
+
+        peak = 0
+        tracemalloc.start()
+        try:
+            for values in inputs:
+                tracemalloc.reset_peak()
+                base = tracemalloc.get_traced_memory()[0]
+                begin_frame()
+                update(values)
+                peak += tracemalloc.get_traced_memory()[1] - base
+        finally:
+            tracemalloc.stop()
+        results.append((name, elapsed / frames, peak / n))
+    return results
+
+
+def filter_attenuation(rate_hz=60, cutoff_hz=5, buffet_hz=13, seconds=10):
+    """
+    Runs sines through the first and second order low pass filters of a FilterBank clocked at rate_hz
+
+    LowPass takes 1/cutoff as its time constant, its -3 dB point is at cutoff / 2pi.
+
+    :return: list of (filter, gain at 1 Hz, gain at buffet_hz)
+    """
+    def gain(make_filter, freq):
+        bank = FilterBank()
+        f = make_filter(bank)
+        peak = 0
+        steps = int(seconds * rate_hz)
+        for i in range(steps):
+            t = i / rate_hz
+            bank.begin_frame(t)
+            y = f.update(math.sin(2 * math.pi * freq * t))
+            if i > steps // 2:      # settled
+                peak = max(peak, abs(y))
+        return peak
+
+    cases = [(f"LowPass {cutoff_hz} Hz", lambda bank: bank.lowpass("x", cutoff_hz)),
+             (f"LowPass {cutoff_hz * 8} Hz", lambda bank: bank.lowpass("x", cutoff_hz * 8)),
+             (f"Biquad {cutoff_hz} Hz", lambda bank: bank.biquad("x", cutoff_hz))]
+    return [(name, gain(make, 1), gain(make, buffet_hz)) for name, make in cases]
+
+
+def _handoff_cases():
+    """(name, frame function) pairs, each turns an MSFS-like frame into the dict the telemetry thread processes"""
+    def fmt(val):
+        if isinstance(val, list):
+            return "~".join([str(x) for x in val])
+        return val
+
+    def text_round_trip(d):
+        packet = bytes(";".join([f"{k}={fmt(v)}" for k, v in d.items()]), "utf-8")
+        out = {}
+        for i in packet.decode("utf-8").split(";"):
+            section, conf = i.split("=")
+            values = conf.split("~")
+            out[section] = [utils.to_number(v) for v in values] if len(values) > 1 else utils.to_number(conf)
+        return out
+
+    return [("text round trip", text_round_trip), ("dict handoff", copy_frame)]
+
+
+def benchmark_frame_handoff(num_simvars=64, frames=20000):
+    """
+    Compares the former in-process text round trip (format, encode, decode, split, to_number) with handing
+    a copied dict to the telemetry thread
+
+    :param num_simvars: number of scalar simvars in the frame, a few arrays are added on top
+    :return: list of (name, ns per frame, keys per frame)
+    """
+    data = {"SimPaused": 0, "N": "Asobo Cessna 172 Classic"}
+    for i in range(num_simvars):
+        data[f"SimVar{i}"] = i * 1.2345 if i % 3 else i
+    data["WeightOnWheels"] = [1.0, 1.0, 0.0]
+    data["VelWorld"] = [12.5, -0.25, 88.125]
+    data["AmbWind"] = [1.5, 0.0, -2.25]
+
+    results = []
+    for name, fn in _handoff_cases():
+        t0 = time.perf_counter_ns()
+        for _ in range(frames):
+            fn(data)
+        results.append((name, (time.perf_counter_ns() - t0) / frames, len(data)))
+    return results
+
+
+def _sample_text_frames():
+    """DCS-like text telemetry frames"""
+    frames = []
+    for i in range(200):
+        frames.append(";".join([
+            "N=F-16C_50", "src=DCS", f"T={i * 0.016:.3f}", f"TAS={120 + i * 0.01:.2f}", f"IAS={118 + i * 0.01:.2f}",
+            f"AoA={4 + (i % 10) * 0.1:.2f}", "WoW=0.00~0.00~0.00", "ACCs=0.01~1.02~-0.03", "Mach=0.3817",
+            "CM=30~60", "Gun=510", f"Incidence={i * 0.001:.3f}~0.020~1.000", "SimPaused=0", "Focus=1",
+            "MechInfo={gear: 1}", "EngRPM=88.50~88.41", "Flares=30", "Chaff=60", "Damage=0", "Afterburner=0.00~0.00",
+            "altASL=1523.44", "altAgl=1211.03", "speedbrakes_value=0.000", "flaps_value=0.500", "canopy_value=0.000",
+            "gear_value=1.000", "Spoilers=0", "DynamicPressure=9123.82", "Heading=182.3~3.2~-0.5",
+        ]))
+    return frames
+
+
+def _parsing_cases():
+    """(name, item parse function) pairs, the function parses one ``key=conf`` telemetry item"""
+    def to_number(section, conf):
+        values = conf.split("~")
+        return [utils.to_number(v) for v in values] if len(values) > 1 else utils.to_number(conf)
+
+    return [("utils.to_number", to_number), ("TelemValueParser", TelemValueParser().parse_item)]
+
+
+def benchmark_value_parsing(frames=None, iterations=20):
+    """
+    Compares utils.to_number with TelemValueParser on text telemetry frames
+
+    :param frames: list of text frames (``key=value;...``), a built in DCS-like sample is used if None
+    :return: list of (name, ns per frame, ns per value, fraction of results differing from the first case)
+    """
+    items = [[i.split("=", 1) for i in frame.split(";") if len(i)] for frame in frames or _sample_text_frames()]
+    n_items = sum(len(f) for f in items)
+    reference = None
+    results = []
+    for name, parse in _parsing_cases():
+        out = [parse(section, conf) for frame in items for section, conf in frame]
+        if reference is None:
+            reference = out
+        mismatch = sum(a != b or type(a) != type(b) for a, b in zip(reference, out)) / len(out)
+
+        t0 = time.perf_counter_ns()
+        for _ in range(iterations):
+            for frame in items:
+                values = {}
+                for section, conf in frame:
+                    values[section] = parse(section, conf)
+        elapsed = time.perf_counter_ns() - t0
+        results.append((name, elapsed / (len(items) * iterations), elapsed / (n_items * iterations), mismatch))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless TelemFFB effect pipeline benchmark")
+    parser.add_argument("files", nargs="*", default=None,
+                        help="IL2 traces (.gz) and/or telemetry logs recorded with --record")
+    parser.add_argument("--device", nargs="+", choices=DEVICE_TYPES, default=DEVICE_TYPES)
+    parser.add_argument("--classes", type=str, default=None, help='Regex on "SIM.ClassName", e.g. "IL2\\.Prop"')
+    parser.add_argument("--warmup", type=int, default=50, help="Frames to run before measuring")
+    parser.add_argument("--no-alloc", action="store_true", help="Skip the allocation tracking pass")
+    parser.add_argument("--encoding", action="store_true", help="Benchmark effect report encoding only")
+    parser.add_argument("--changes", action="store_true", help="Benchmark the change tracking only")
+    parser.add_argument("--filters", action="store_true", help="Benchmark the filter bank only")
+    parser.add_argument("--graph", action="store_true", help="Also print the effect graph calls per class")
+    parser.add_argument("--synthetic-msfs", action="store_true", help="Add a generated MSFS flight to the frames")
+    parser.add_argument("--math", action="store_true", help="Benchmark the body frame incidence computation only")
+    parser.add_argument("--handoff", action="store_true", help="Benchmark the MSFS frame handoff to the telemetry thread only")
+    parser.add_argument("--parsing", nargs="?", const="", metavar="FRAMES",
+                        help="Benchmark the telemetry value parsing only, optionally on text frames from a file")
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.ERROR, stream=sys.stderr)
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv)
+
+    if args.encoding:
+        print(f"{'update':<20} {'ns/update':>10} {'alloc B/update':>14} {'writes/update':>13}")
+        for name, ns, alloc, writes in benchmark_encoding():
+            print(f"{name:<20} {ns:>10.0f} {alloc:>14.1f} {writes:>13.2f}")
+        return
+
+    if args.math:
+        print(f"{'rotation':<20} {'ns/frame':>10} {'alloc B/frame':>14} {'max deviation':>14}")
+        for name, ns, alloc, deviation in benchmark_body_frame():
+            print(f"{name:<20} {ns:>10.0f} {alloc:>14.1f} {deviation:>14.2e}")
+        return
+
+    if args.changes:
+        print(f"{'tracking':<20} {'ns/frame':>10} {'alloc B/frame':>14} {'mismatch':>9}")
+        for name, ns, alloc, mismatch in benchmark_change_tracking():
+            print(f"{name:<20} {ns:>10.0f} {alloc:>14.1f} {mismatch:>9.2%}")
+        return
+
+    if args.filters:
+        print(f"{'filters':<20} {'ns/frame':>10} {'alloc B/frame':>14}")
+        for name, ns, alloc in benchmark_filters():
+            print(f"{name:<20} {ns:>10.0f} {alloc:>14.1f}")
+        print()
+        print(f"{'low pass @60 Hz':<20} {'gain 1 Hz':>10} {'gain 13 Hz':>14}")
+        for name, g_low, g_buffet in filter_attenuation():
+            print(f"{name:<20} {g_low:>10.3f} {g_buffet:>14.3f}")
+        return
+
+    if args.handoff:
+        print(f"{'handoff':<20} {'ns/frame':>10} {'keys/frame':>11}")
+        for name, ns, keys in benchmark_frame_handoff():
+            print(f"{name:<20} {ns:>10.0f} {keys:>11}")
+        return
+
+    if args.parsing is not None:
+        text_frames = None
+        if args.parsing:
+            with open(args.parsing, encoding="utf-8") as f:
+                text_frames = [line.strip() for line in f if "=" in line]
+        print(f"{'parser':<20} {'ns/frame':>10} {'ns/value':>10} {'mismatch':>9}")
+        for name, ns, ns_value, mismatch in benchmark_value_parsing(text_frames):
+            print(f"{name:<20} {ns:>10.0f} {ns_value:>10.1f} {mismatch:>9.2%}")
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        setup_environment(os.path.join(tmp, "userconfig.xml"))
+        files = args.files or ([] if args.synthetic_msfs else ["il2_test_data.gz"])
+        frames = synthetic_msfs_frames() if args.synthetic_msfs else None
+        results = run(files, args.device, args.classes, args.warmup, not args.no_alloc, frames)
+    print_report(results)
+    if args.graph:
+        print_effect_graphs(results)
+
+
+if __name__ == "__main__":
+    main()
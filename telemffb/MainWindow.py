@@ -28,17 +28,16 @@ import sys
 import time
 import traceback
 import winreg
-from collections import OrderedDict
 from datetime import datetime
 
 from PyQt5 import QtCore, QtWidgets
 from PyQt5.QtCore import QCoreApplication, Qt, QTimer, QUrl
-from PyQt5.QtGui import (QColor, QCursor, QDesktopServices, QIcon,
+from PyQt5.QtGui import (QColor, QCursor, QDesktopServices, QFont, QIcon,
                          QKeySequence, QPixmap, QFontMetrics)
-from PyQt5.QtWidgets import (QAction, QApplication, QButtonGroup, QCheckBox,
+from PyQt5.QtWidgets import (QAbstractItemView, QAction, QApplication, QButtonGroup, QCheckBox,
                              QComboBox, QFrame, QGridLayout, QGroupBox,
-                             QHBoxLayout, QLabel, QMainWindow, QMessageBox,
-                             QPushButton, QScrollArea, QShortcut, QTabWidget,
+                             QHBoxLayout, QHeaderView, QLabel, QMainWindow, QMessageBox,
+                             QPushButton, QScrollArea, QShortcut, QStackedWidget, QTabWidget, QTableView,
                              QToolButton, QVBoxLayout, QWidget, QSpacerItem, QSizePolicy, QSystemTrayIcon, QMenu)
 
 import telemffb.globals as G
@@ -46,15 +45,18 @@ import telemffb.utils as utils
 import telemffb.xmlutils as xmlutils
 from telemffb.config_utils import autoconvert_config
 from telemffb.ConfiguratorDialog import ConfiguratorDialog
-from telemffb.custom_widgets import (ClickLogo, InstanceStatusRow, NoKeyScrollArea, NoWheelSlider,
-                                     NoWheelNumberSlider, SimStatusLabel, vpf_purple)
+from telemffb.custom_widgets import (ClickLogo, InstanceStatusRow, NoKeyScrollArea, NoWheelNumberSlider,
+                                     SimStatusLabel, vpf_purple)
 from telemffb.hw.ffb_rhino import HapticEffect
+from telemffb.PipelineStatsDialog import PipelineStatsDialog
+from telemffb.ProfilerDialog import ProfilerDialog
 from telemffb.SCOverridesEditor import SCOverridesEditor
 from telemffb.SettingsLayout import SettingsLayout
 from telemffb.settingsmanager import UserModelDialog
 from telemffb.sim.aircraft_base import effects
 from telemffb.telem.SimTelemListener import SimTelemListener
 from telemffb.SystemSettingsDialog import SystemSettingsDialog
+from telemffb.TelemetryModel import TelemetryTableModel
 from telemffb.TeleplotSetupDialog import TeleplotSetupDialog
 from telemffb.utils import exit_application, overrides, HiDpiPixmap
 
@@ -71,7 +73,10 @@ class MainWindow(QMainWindow):
         self.error_clean_counter = 0 # counter to use as hysteresis for clearing error condition - not always 'error' from child instance on every loop
         self.telemetry_timed_out = True
 
-        self.last_telemetry_refresh = utils.millis()
+        self.last_telemetry_seq = 0
+        self._slider_highlight_key = None
+        self._qcolor_green = QColor("#17c411")
+        self._qcolor_grey = QColor("grey")
 
         self.show_simvars = False
 
@@ -565,6 +570,28 @@ class MainWindow(QMainWindow):
         # Set the QLabel widget as the widget inside the scroll area
         self.telem_area.setWidget(self.lbl_telem_data)
 
+        # telemetry values, replaces the status label once data is received
+        self.telem_model = TelemetryTableModel(self)
+        self.telem_view = QTableView()
+        self.telem_view.setModel(self.telem_model)
+        self.telem_view.setMinimumHeight(100)
+        self.telem_view.setShowGrid(False)
+        self.telem_view.setWordWrap(False)
+        self.telem_view.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.telem_view.horizontalHeader().hide()
+        self.telem_view.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeToContents)
+        self.telem_view.horizontalHeader().setStretchLastSection(True)
+        self.telem_view.verticalHeader().hide()
+        self.telem_view.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.telem_view.verticalHeader().setDefaultSectionSize(QFontMetrics(QFont("Courier New")).height() + 2)
+        self.telem_view.setStyleSheet("""
+            font-family: Courier New;
+        """)
+
+        self.telem_stack = QStackedWidget()
+        self.telem_stack.addWidget(self.telem_area)
+        self.telem_stack.addWidget(self.telem_view)
+
         self.lbl_effects_data = QLabel()
         self.effects_area.setWidget(self.lbl_effects_data)
         self.lbl_effects_data.setAlignment(Qt.AlignTop | Qt.AlignLeft)
@@ -579,7 +606,7 @@ class MainWindow(QMainWindow):
             self.effect_lbl.setText(f'Active Effects for: {G.current_device_config_scope}')
         monitor_area_layout.addWidget(self.telem_lbl, 0, 0)
         monitor_area_layout.addWidget(self.effect_lbl, 0, 1)
-        monitor_area_layout.addWidget(self.telem_area, 1, 0)
+        monitor_area_layout.addWidget(self.telem_stack, 1, 0)
         monitor_area_layout.addWidget(self.effects_area, 1, 1)
 
         self.monitor_widget.setLayout(monitor_area_layout)
@@ -681,7 +708,10 @@ class MainWindow(QMainWindow):
         # self.test_button.clicked.connect(lambda: send_test_message())
 
         # layout.addWidget(self.test_button)
-        G.telem_manager.telemetryReceived.connect(self.on_update_telemetry)
+        # the UI pulls the latest telemetry snapshot at its own rate instead of receiving every frame
+        self.telemetry_refresh_timer = QTimer(self)
+        self.telemetry_refresh_timer.timeout.connect(self.refresh_telemetry)
+        self.telemetry_refresh_timer.start(max(int(G.system_settings.get('telemRefreshInterval', 50)), 10))
         G.telem_manager.telemetryTimeout.connect(self.on_telemetry_timeout)
         G.telem_manager.aircraftUpdated.connect(self.update_settings)
 
@@ -862,6 +892,9 @@ class MainWindow(QMainWindow):
         self.set_scrollbar(400)
 
     def refresh_telem_status(self):
+        if hasattr(self, 'telem_stack'):
+            self.telem_stack.setCurrentWidget(self.telem_area)
+            self.telem_model.clear()
         dcs_enabled = G.system_settings.get('enableDCS')
         il2_enabled = G.system_settings.get('enableIL2')
         msfs_enabled = G.system_settings.get('enableMSFS')
@@ -906,6 +939,15 @@ class MainWindow(QMainWindow):
         teleplot_action.triggered.connect(do_open_teleplot_setup_dialog)
         debug_menu.addAction(teleplot_action)
 
+        profiler_action = QAction("Hot Path Profiler", self)
+        def do_open_profiler_dialog():
+            dialog = ProfilerDialog(self)
+            dialog.raise_()
+            dialog.activateWindow()
+            dialog.show()
+        profiler_action.triggered.connect(do_open_profiler_dialog)
+        debug_menu.addAction(profiler_action)
+
         show_simvar_action = QAction("Show simvar in telem window", self)
         def do_toggle_simvar_telemetry():
             self.show_simvars = not self.show_simvars
@@ -934,6 +976,15 @@ class MainWindow(QMainWindow):
         sc_overrides_action.triggered.connect(do_open_sc_override_dialog)
         debug_menu.addAction(sc_overrides_action)
 
+        pipeline_stats_action = QAction('Telemetry Pipeline Statistics', self)
+        def do_open_pipeline_stats_dialog():
+            dialog = PipelineStatsDialog(self)
+            dialog.raise_()
+            dialog.activateWindow()
+            dialog.show()
+        pipeline_stats_action.triggered.connect(do_open_pipeline_stats_dialog)
+        debug_menu.addAction(pipeline_stats_action)
+
         test_update = QAction('Test updater', self)
         def do_test_update():
             self._update_available = True
@@ -1430,6 +1481,35 @@ class MainWindow(QMainWindow):
 
             self.resize(0, 0)
 
+    def update_slider_highlights(self, active_settings, pct_max):
+        """
+        Highlights the sliders of the settings used by the active effects and shows the percentage of the
+        maximum coefficient in use on the max coefficient sliders. Only sliders whose state changed are restyled.
+
+        :param pct_max: {setting name: fraction of the maximum coefficient}
+        """
+        sliders = self.settings_layout.sliders
+        key = (self.settings_layout.slider_generation, frozenset(active_settings))
+        if key != self._slider_highlight_key:
+            self._slider_highlight_key = key
+            active = key[1]
+            for name, slider in sliders.items():
+                if name in pct_max and isinstance(slider, NoWheelNumberSlider):
+                    continue
+                color = "#17c411" if any(a_s in name for a_s in active) else vpf_purple
+                if slider.handle_color != color:
+                    slider.setHandleColor(color)
+
+        for name, pct in pct_max.items():
+            slider = sliders.get(name)
+            if not isinstance(slider, NoWheelNumberSlider):
+                continue
+            pct = int(pct * 100)
+            text = f"{pct}%"
+            if slider.value_text != text:
+                color = self.interpolate_color(self._qcolor_grey, self._qcolor_green, pct / 100)
+                slider.setHandleColor(color.name(), text)
+
     def interpolate_color(self, color1, color2, value):
         # Ensure value is between 0 and 1
         value = max(0.0, min(1.0, value))
@@ -1455,49 +1535,24 @@ class MainWindow(QMainWindow):
             self.update_sim_indicators(G.telem_manager.getTelemValue('src'), paused=True)
         self.telemetry_timed_out = True
 
-    def on_update_telemetry(self, datadict: dict):
-        if utils.millis() - self.last_telemetry_refresh < 50:
+    def refresh_telemetry(self):
+        seq, datadict = G.telem_manager.latest_telemetry()
+        if seq == self.last_telemetry_seq or datadict is None:
             return
-        self.last_telemetry_refresh = utils.millis()
-
-        data = OrderedDict(sorted(datadict.items()))  # Alphabetize telemetry data
-        keys = data.keys()
-        try:
-            # use ordereddict and move some telemetry to the top
-            # Items to move to the beginning (reverse order)
-            if 'SimconnectCategory' in keys: data.move_to_end('SimconnectCategory', last=False)
-            if 'AircraftClass' in keys: data.move_to_end('AircraftClass', last=False)
-            if 'msfs_vers' in keys: data.move_to_end('msfs_vers', last=False)
-            if 'src' in keys: data.move_to_end('src', last=False)
-            if 'N' in keys: data.move_to_end('N', last=False)
-            if 'FFBType' in keys: data.move_to_end('FFBType', last=False)
-            if 'perf' in keys: data.move_to_end('perf', last=False)
-            if 'avgFrameTime' in keys: data.move_to_end('avgFrameTime', last=False)
-            if 'maxFrameTime' in keys: data.move_to_end('maxFrameTime', last=False)
-            if 'frameTimes' in keys: data.move_to_end('frameTimes', last=False)
-            if 'T' in keys: data.move_to_end('T', last=False)
-
-            # Items to move to the end
-        except Exception:
-            pass
+        self.last_telemetry_seq = seq
+        self.on_update_telemetry(datadict)
 
+    def on_update_telemetry(self, data: dict):
         try:
-
-            items = ""
-            for k, v in data.items():
-                # check for msfs and debug mode (alt-d pressed), change to simvar name
-                if self.show_simvars:
-                    if data["src"] == "MSFS":
-                        s = G.telem_manager.simconnect.get_var_name(k)
-                        # s = simvarnames.get_var_name(k)
-                        if s is not None:
-                            k = s
-                if isinstance(v, float):
-                    items += f"{k}: {v:.3f}\n"
+            window_mode = self.tab_widget.currentIndex()
+            if window_mode == 0:
+                # check for msfs and debug mode (alt-d pressed), show simvar names
+                if self.show_simvars and data.get("src") == "MSFS":
+                    self.telem_model.set_name_mapper(G.telem_manager.simconnect.get_var_name)
                 else:
-                    if isinstance(v, list):
-                        v = "[" + ", ".join([f"{x:.3f}" if isinstance(x, float) else str(x) if x is not None else "None" for x in v]) + "]"
-                    items += f"{k}: {v}\n"
+                    self.telem_model.set_name_mapper(None)
+                self.telem_model.update(data)
+                self.telem_stack.setCurrentWidget(self.telem_view)
 
             active_effects = ""
             active_settings = []
@@ -1523,57 +1578,13 @@ class MainWindow(QMainWindow):
                 if child_effects:
                     G.ipc_instance.send_ipc_effects(active_effects, active_settings)
 
-            window_mode = self.tab_widget.currentIndex()
             # update slider colors
-            pct_max_a = data.get('_pct_max_a', 0)
-            pct_max_e = data.get('_pct_max_e', 0)
-            pct_max_r = data.get('_pct_max_r', 0)
-            qcolor_green = QColor("#17c411")
-            qcolor_grey = QColor("grey")
             if window_mode == 1:
-                sliders = self.findChildren(NoWheelSlider)
-                for my_slider in sliders:
-                    slidername = my_slider.objectName().replace('sld_', '')
-                    my_slider.blockSignals(True)
-
-                    for a_s in active_settings:
-                        if a_s in slidername:
-                            my_slider.setHandleColor("#17c411")
-                            break
-                        else:
-                            my_slider.setHandleColor(vpf_purple)
-                    my_slider.blockSignals(False)
-
-                n_sliders = self.findChildren(NoWheelNumberSlider)
-                for my_slider in n_sliders:
-                    slidername = my_slider.objectName().replace('sld_', '')
-                    my_slider.blockSignals(True)
-
-                    if slidername == 'max_elevator_coeff':
-                        new_color = self.interpolate_color(qcolor_grey, qcolor_green, pct_max_e)
-                        my_slider.setHandleColor(new_color.name(), f"{int(pct_max_e *100)}%")
-                        # print(int(pct_max_e * 100))
-                        my_slider.blockSignals(False)
-                        continue
-                    if slidername == 'max_aileron_coeff':
-                        new_color = self.interpolate_color(qcolor_grey, qcolor_green, pct_max_a)
-                        my_slider.setHandleColor(new_color.name(), f"{int(pct_max_a * 100)}%")
-                        # print(new_color)
-                        my_slider.blockSignals(False)
-                        continue
-                    if slidername == 'max_rudder_coeff':
-                        new_color = self.interpolate_color(qcolor_grey, qcolor_green, pct_max_r)
-                        my_slider.setHandleColor(new_color.name(), f"{int(pct_max_r * 100)}%")
-                        # print(new_color)
-                        my_slider.blockSignals(False)
-                        continue
-                    for a_s in active_settings:
-                        if a_s in slidername:
-                            my_slider.setHandleColor("#17c411")
-                            break
-                        else:
-                            my_slider.setHandleColor(vpf_purple)
-                    my_slider.blockSignals(False)
+                self.update_slider_highlights(active_settings, {
+                    'max_aileron_coeff': data.get('_pct_max_a', 0),
+                    'max_elevator_coeff': data.get('_pct_max_e', 0),
+                    'max_rudder_coeff': data.get('_pct_max_r', 0),
+                })
 
             is_paused = max(data.get('SimPaused', 0), data.get('Parked', 0))
             error_cond = data.get('error', None)
@@ -1618,8 +1629,6 @@ class MainWindow(QMainWindow):
             self.cur_pattern.setText(f'Matched: <span style="font-family: Consolas, monospace;font-size: 14px">"{shown_pattern}"</span> ')
 
             if window_mode == 0:
-                self.lbl_telem_data.setText(items)
-            # elif window_mode == self.effect_monitor_radio:
                 self.lbl_effects_data.setText(active_effects)
 
         except Exception:
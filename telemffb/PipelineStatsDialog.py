@@ -0,0 +1,94 @@
+#
+# This file is part of the TelemFFB distribution (https://github.com/walmis/TelemFFB).
+# Copyright (c) 2023 Valmantas Palikša.
+# Copyright (c) 2023 Micah Frisby
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+
+from PyQt5.QtCore import QTimer
+from PyQt5.QtGui import QFont
+from PyQt5.QtWidgets import QAbstractItemView, QDialog, QLabel, QTableWidget, QTableWidgetItem, QVBoxLayout
+
+from . import globals as G
+from .hw.ffb_rhino import HapticEffect
+
+
+class PipelineStatsDialog(QDialog):
+    """Debug panel with the telemetry ingest statistics per source, HID writer and effect pool counters"""
+
+    columns = [
+        ("Source", lambda s: s["source"]),
+        ("Received", lambda s: str(s["received"])),
+        ("Processed", lambda s: str(s["processed"])),
+        ("Dropped", lambda s: str(s["dropped"])),
+        ("Drop rate", lambda s: f"{s['drop_rate'] * 100:.1f}%"),
+        ("Burst", lambda s: f"{s['burst']} (max {s['max_burst']})"),
+        ("Age", lambda s: f"{s['age'] * 1000:.2f}ms"),
+        ("Avg age", lambda s: f"{s['avg_age'] * 1000:.2f}ms"),
+        ("Max age", lambda s: f"{s['max_age'] * 1000:.2f}ms"),
+        ("Overruns", lambda s: str(s["overruns"])),
+    ]
+
+    def __init__(self, parent=None, interval=500):
+        super(PipelineStatsDialog, self).__init__(parent)
+        self.setWindowTitle("Telemetry Pipeline Statistics")
+        self.resize(820, 260)
+
+        self.table = QTableWidget(0, len(self.columns), self)
+        self.table.setHorizontalHeaderLabels([c[0] for c in self.columns])
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.verticalHeader().setVisible(False)
+        self.events_label = QLabel(self)
+        self.device_label = QLabel(self)
+        self.device_label.setFont(QFont("Courier New"))
+
+        layout = QVBoxLayout(self)
+        layout.addWidget(self.table)
+        layout.addWidget(self.events_label)
+        layout.addWidget(self.device_label)
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start(interval)
+        self.refresh()
+
+    def refresh(self):
+        tm = G.telem_manager
+        if tm is None:
+            return
+        ingest = tm.ingest
+        stats = ingest.stats()
+        self.table.setRowCount(len(stats))
+        for row, s in enumerate(stats):
+            for col, (_, fmt) in enumerate(self.columns):
+                self.table.setItem(row, col, QTableWidgetItem(fmt(s)))
+        self.events_label.setText(f"Events: {ingest.events_received} received, "
+                                  f"max backlog {ingest.max_event_backlog}")
+
+        dev = HapticEffect.device
+        if dev is None:
+            self.device_label.setText("")
+            return
+        m = dev.write_metrics
+        pool = dev.effect_pool
+        self.device_label.setText(
+            f"HID: {m.reports_written} written, {m.reports_coalesced} coalesced, {m.write_errors} errors, "
+            f"flush {m.flush_latency * 1000:.3f}ms (max {m.max_flush_latency * 1000:.3f}ms)\n"
+            f"Effect pool: {pool.spare} spare, {pool.hits} hits, {pool.misses} misses, "
+            f"{pool.full_events} full events{', FULL' if pool.pressure else ''}")
+
+    def closeEvent(self, event):
+        self.timer.stop()
+        super().closeEvent(event)
@@ -0,0 +1,186 @@
+#
+# This file is part of the TelemFFB distribution (https://github.com/walmis/TelemFFB).
+# Copyright (c) 2023 Valmantas Palikša.
+# Copyright (c) 2023 Micah Frisby
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+Opt-in hot path profiler.
+
+When enabled, the ``_update_*`` effect methods of all aircraft classes, the aircraft config resolve,
+HID report writes and event signal emission are timed into per section histograms.  Methods are
+instrumented by replacing them with timing wrappers on enable and restored on disable, so a disabled
+profiler costs nothing on the instrumented methods.  Code blocks use ``with profiler.section(name):``
+which costs one attribute check when disabled.
+
+Times include nested sections, e.g. a subclass ``_update_`` method that calls ``super()`` includes the
+time of the base class method.
+"""
+
+import functools
+import logging
+import time
+from typing import Dict, List
+
+from telemffb.RollingStats import LatencyHistogram
+
+perf_counter = time.perf_counter
+
+
+class SectionStats:
+    __slots__ = ("name", "count", "total", "max", "histogram")
+
+    def __init__(self, name):
+        self.name = name
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.histogram = LatencyHistogram(resolution=1e-6, max_value=1.0)  # seconds, 1us buckets
+
+    def add(self, dt):
+        self.count += 1
+        self.total += dt
+        if dt > self.max:
+            self.max = dt
+        self.histogram.add(dt)
+
+    def snapshot(self) -> dict:
+        h = self.histogram
+        return dict(name=self.name, count=self.count, total=self.total, mean=self.total / self.count if self.count else 0.0,
+                    p50=h.percentile(50), p95=h.percentile(95), p99=h.percentile(99), max=self.max)
+
+
+class _Section:
+    __slots__ = ("profiler", "name", "t0")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.t0 = perf_counter()
+
+    def __exit__(self, *exc):
+        self.profiler.record(self.name, perf_counter() - self.t0)
+
+
+class _NullSection:
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *exc):
+        pass
+
+
+_null_section = _NullSection()
+
+
+class HotPathProfiler:
+    def __init__(self):
+        self.enabled = False
+        self.sections: Dict[str, SectionStats] = {}
+        self._patched = []  # (owner, attribute, original)
+
+    def record(self, name, dt):
+        stats = self.sections.get(name)
+        if stats is None:
+            stats = self.sections[name] = SectionStats(name)
+        stats.add(dt)
+
+    def section(self, name):
+        """Context manager timing a block, a shared no-op object while disabled"""
+        if not self.enabled:
+            return _null_section
+        return _Section(self, name)
+
+    def _wrap(self, name, func):
+        record = self.record
+
+        @functools.wraps(func)
+        def timed(*args, **kwargs):
+            t0 = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(name, perf_counter() - t0)
+        return timed
+
+    def instrument(self, owner, attr, name=None):
+        """Replaces owner.attr with a timing wrapper until disable()"""
+        original = owner.__dict__[attr]
+        self._patched.append((owner, attr, original))
+        setattr(owner, attr, self._wrap(name or f"{owner.__name__}.{attr}", original))
+
+    def instrument_effects(self, module):
+        """Instruments the _update_* methods of all classes defined in module"""
+        for cls in list(vars(module).values()):
+            if not isinstance(cls, type) or cls.__module__ != module.__name__:
+                continue
+            for attr, value in list(cls.__dict__.items()):
+                if attr.startswith("_update_") and callable(value):
+                    self.instrument(cls, attr)
+
+    def _instrument_all(self):
+        from telemffb.hw.ffb_rhino import FFBRhino
+        from telemffb.sim import aircraft_base, aircrafts_dcs, aircrafts_il2, aircrafts_msfs_xp
+        from telemffb.telem.TelemManager import TelemManager
+
+        for module in (aircraft_base, aircrafts_dcs, aircrafts_il2, aircrafts_msfs_xp):
+            self.instrument_effects(module)
+        self.instrument(TelemManager, "get_aircraft_config")
+        self.instrument(FFBRhino, "write")
+
+    def enable(self):
+        if self.enabled:
+            return
+        self._instrument_all()
+        self.enabled = True
+        logging.info(f"Hot path profiler enabled, {len(self._patched)} methods instrumented")
+
+    def disable(self):
+        if not self.enabled:
+            return
+        self.enabled = False
+        for owner, attr, original in reversed(self._patched):
+            setattr(owner, attr, original)
+        self._patched.clear()
+        logging.info("Hot path profiler disabled")
+
+    def reset(self):
+        self.sections = {}
+
+    def snapshot(self) -> List[dict]:
+        """:return: section statistics, most total time first"""
+        stats = [s.snapshot() for s in list(self.sections.values())]
+        stats.sort(key=lambda s: s["total"], reverse=True)
+        return stats
+
+    def format_report(self) -> str:
+        lines = [f"{'section':<60} {'count':>8} {'mean us':>9} {'p50 us':>8} {'p95 us':>8} {'p99 us':>8} "
+                 f"{'max us':>9} {'total ms':>10}"]
+        for s in self.snapshot():
+            lines.append(f"{s['name']:<60} {s['count']:>8} {s['mean'] * 1e6:>9.1f} {s['p50'] * 1e6:>8.0f} "
+                         f"{s['p95'] * 1e6:>8.0f} {s['p99'] * 1e6:>8.0f} {s['max'] * 1e6:>9.0f} {s['total'] * 1e3:>10.1f}")
+        return "\n".join(lines)
+
+    def dump(self, path):
+        with open(path, "w") as f:
+            f.write(f"TelemFFB hot path profile, {time.strftime('%Y-%m-%d %H:%M:%S')}\n\n")
+            f.write(self.format_report())
+            f.write("\n")
+        logging.info(f"Profile written to {path}")
+
+
+profiler = HotPathProfiler()
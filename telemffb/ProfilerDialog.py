@@ -0,0 +1,103 @@
+#
+# This file is part of the TelemFFB distribution (https://github.com/walmis/TelemFFB).
+# Copyright (c) 2023 Valmantas Palikša.
+# Copyright (c) 2023 Micah Frisby
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import logging
+
+from PyQt5.QtCore import QTimer
+from PyQt5.QtWidgets import (QAbstractItemView, QCheckBox, QDialog, QFileDialog, QHBoxLayout, QPushButton,
+                             QTableWidget, QTableWidgetItem, QVBoxLayout)
+
+from .Profiler import profiler
+
+
+class ProfilerDialog(QDialog):
+    """Debug panel showing the hot path profiler sections, most total time first"""
+
+    columns = [
+        ("Section", lambda s: s["name"]),
+        ("Count", lambda s: str(s["count"])),
+        ("Mean us", lambda s: f"{s['mean'] * 1e6:.1f}"),
+        ("p50 us", lambda s: f"{s['p50'] * 1e6:.0f}"),
+        ("p95 us", lambda s: f"{s['p95'] * 1e6:.0f}"),
+        ("p99 us", lambda s: f"{s['p99'] * 1e6:.0f}"),
+        ("Max us", lambda s: f"{s['max'] * 1e6:.0f}"),
+        ("Total ms", lambda s: f"{s['total'] * 1e3:.1f}"),
+    ]
+
+    def __init__(self, parent=None, interval=1000):
+        super(ProfilerDialog, self).__init__(parent)
+        self.setWindowTitle("Hot Path Profiler")
+        self.resize(900, 500)
+
+        self.enable_cb = QCheckBox("Enable profiling", self)
+        self.enable_cb.setChecked(profiler.enabled)
+        self.enable_cb.toggled.connect(self.set_enabled)
+        reset_button = QPushButton("Reset", self)
+        reset_button.clicked.connect(self.reset)
+        dump_button = QPushButton("Save...", self)
+        dump_button.clicked.connect(self.dump)
+
+        buttons = QHBoxLayout()
+        buttons.addWidget(self.enable_cb)
+        buttons.addStretch()
+        buttons.addWidget(reset_button)
+        buttons.addWidget(dump_button)
+
+        self.table = QTableWidget(0, len(self.columns), self)
+        self.table.setHorizontalHeaderLabels([c[0] for c in self.columns])
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.verticalHeader().setVisible(False)
+
+        layout = QVBoxLayout(self)
+        layout.addLayout(buttons)
+        layout.addWidget(self.table)
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start(interval)
+        self.refresh()
+
+    def set_enabled(self, enabled):
+        if enabled:
+            profiler.enable()
+        else:
+            profiler.disable()
+
+    def reset(self):
+        profiler.reset()
+        self.refresh()
+
+    def dump(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Save Profile", "telemffb_profile.txt", "Text Files (*.txt)")
+        if not path:
+            return
+        try:
+            profiler.dump(path)
+        except Exception:
+            logging.exception("Unable to write the profile")
+
+    def refresh(self):
+        stats = profiler.snapshot()
+        self.table.setRowCount(len(stats))
+        for row, s in enumerate(stats):
+            for col, (_, fmt) in enumerate(self.columns):
+                self.table.setItem(row, col, QTableWidgetItem(fmt(s)))
+
+    def closeEvent(self, event):
+        self.timer.stop()
+        super().closeEvent(event)
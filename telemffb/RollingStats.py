@@ -0,0 +1,179 @@
+#
+# This file is part of the TelemFFB distribution (https://github.com/walmis/TelemFFB).
+# Copyright (c) 2023 Valmantas Palikša.
+# Copyright (c) 2023 Micah Frisby
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+Streaming statistics over the last N samples (frame times, latencies).
+
+Adding a sample is O(1): the window is a ring buffer, the mean comes from a running sum, the maximum
+from a monotonic deque and percentiles from a log-linear (HDR style) histogram that is updated as
+samples enter and leave the window.  One writer thread adds samples, readers (e.g. the UI) may read
+concurrently without copying, at worst they see a sample that is being replaced.
+"""
+
+from array import array
+from collections import deque
+from typing import Iterator
+
+# histogram buckets are exact below 2**(SUB_BUCKET_BITS+1) units, above that every power of two is
+# split into 2**SUB_BUCKET_BITS buckets (~3% relative precision)
+SUB_BUCKET_BITS = 5
+_SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+
+
+class LatencyHistogram:
+    """
+    Log-linear histogram of non-negative values
+
+    :param resolution: value of one histogram unit, e.g. 0.01 for values in ms tracked to 10us
+    :param max_value: larger values are counted in the last bucket
+    """
+
+    def __init__(self, resolution=1.0, max_value=60000.0):
+        self.resolution = resolution
+        self._max_units = max(int(max_value / resolution), 1)
+        self.counts = array("q", [0] * (self._index(self._max_units) + 1))
+        self.total = 0
+
+    @staticmethod
+    def _index(units: int) -> int:
+        bits = units.bit_length()
+        if bits <= SUB_BUCKET_BITS + 1:
+            return units
+        shift = bits - SUB_BUCKET_BITS - 1
+        return (shift << SUB_BUCKET_BITS) + (units >> shift)
+
+    @staticmethod
+    def _lower_bound(index: int) -> int:
+        if index < 2 * _SUB_BUCKETS:
+            return index
+        shift = (index >> SUB_BUCKET_BITS) - 1
+        return (index - (shift << SUB_BUCKET_BITS)) << shift
+
+    def bucket(self, value) -> int:
+        units = int(value / self.resolution) if value > 0 else 0
+        return self._index(units if units < self._max_units else self._max_units)
+
+    def add(self, value, count=1):
+        self.counts[self.bucket(value)] += count
+        self.total += count
+
+    def remove(self, value):
+        self.counts[self.bucket(value)] -= 1
+        self.total -= 1
+
+    def clear(self):
+        for i in range(len(self.counts)):
+            self.counts[i] = 0
+        self.total = 0
+
+    def percentile(self, p) -> float:
+        """:return: lower bound of the bucket containing the p-th percentile, 0 if empty"""
+        if self.total <= 0:
+            return 0.0
+        rank = max(1, int(self.total * p / 100.0 + 0.5))
+        seen = 0
+        for index, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return self._lower_bound(index) * self.resolution
+        return self._max_units * self.resolution
+
+
+class RollingStats:
+    """
+    Statistics over the last `capacity` samples
+
+    :param resolution: histogram resolution, see LatencyHistogram
+    """
+
+    def __init__(self, capacity=500, resolution=1.0, max_value=60000.0):
+        self.capacity = capacity
+        self._buf = array("d", [0.0] * capacity)
+        self._next = 0              # index the next sample is written to
+        self._len = 0
+        self.count = 0              # samples added in total
+        self.sum = 0.0
+        self.peak = 0.0             # all time maximum
+        self.last = 0.0
+        self._max = deque()         # (sample number, value), values decreasing
+        self.histogram = LatencyHistogram(resolution, max_value)
+
+    def __len__(self):
+        return self._len
+
+    def add(self, value):
+        buf = self._buf
+        i = self._next
+        n = self.count
+        if self._len == self.capacity:
+            old = buf[i]
+            self.sum -= old
+            self.histogram.remove(old)
+        else:
+            self._len += 1
+        buf[i] = value
+        self.sum += value
+        self.histogram.add(value)
+        self.last = value
+        if value > self.peak:
+            self.peak = value
+
+        maxq = self._max
+        while maxq and maxq[-1][1] <= value:
+            maxq.pop()
+        maxq.append((n, value))
+        if maxq[0][0] <= n - self.capacity:
+            maxq.popleft()
+
+        i += 1
+        if i == self.capacity:
+            i = 0
+            # recompute the running sum once per lap so float rounding errors don't accumulate
+            self.sum = sum(buf)
+        self._next = i
+        self.count = n + 1
+
+    @property
+    def max(self) -> float:
+        maxq = self._max
+        return maxq[0][1] if maxq else 0.0
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self._len if self._len else 0.0
+
+    def percentile(self, p) -> float:
+        return self.histogram.percentile(p)
+
+    def values(self, last=None) -> Iterator[float]:
+        """Iterates over the samples in the window, oldest first, optionally only the `last` ones"""
+        n = self._len if last is None else min(last, self._len)
+        buf = self._buf
+        start = (self._next - n) % self.capacity
+        for k in range(n):
+            yield buf[(start + k) % self.capacity]
+
+    def reset(self):
+        self._next = 0
+        self._len = 0
+        self.count = 0
+        self.sum = 0.0
+        self.peak = 0.0
+        self.last = 0.0
+        self._max.clear()
+        self.histogram.clear()
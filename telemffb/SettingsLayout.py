@@ -48,8 +48,6 @@ class SettingsLayout(QGridLayout):
     show_order_debug = False    # set to true for order numbers shown
     bump_up = True              # set to false for no row bumping up
 
-    all_sliders = []
-
     def __init__(self, parent=None, mainwindow=None):
         super(SettingsLayout, self).__init__(parent)
         result = None
@@ -57,6 +55,8 @@ class SettingsLayout(QGridLayout):
             a, b, result = xmlutils.read_single_model(G.settings_mgr.current_sim, G.settings_mgr.current_aircraft_name)
 
         self.mainwindow = mainwindow
+        self.sliders = {}               # setting name -> slider of the rows currently shown
+        self.slider_generation = 0      # incremented whenever the rows are cleared
         if result is not None:
             self.build_rows(result)
         self.device = HapticEffect()
@@ -230,6 +230,8 @@ class SettingsLayout(QGridLayout):
             self.build_rows(result)
 
     def clear_layout(self):
+        self.sliders.clear()
+        self.slider_generation += 1
         layout = self.layout()
         if layout is not None:
             while layout.count():
@@ -494,6 +496,7 @@ class SettingsLayout(QGridLayout):
             p_butt.clicked.connect(slider.increase_single_step)
             sl_layout.addWidget(m_butt)
             sl_layout.addWidget(slider)
+            self.sliders[item['name']] = slider
             sl_layout.addWidget(p_butt)
             self.addLayout(sl_layout, i, entry_col, 1, entry_colspan)
             self.addWidget(value_label, i, val_col, alignment=Qt.AlignVCenter)
@@ -531,6 +534,7 @@ class SettingsLayout(QGridLayout):
             p_butt.clicked.connect(n_slider.increase_single_step)
             sl_layout.addWidget(m_butt)
             sl_layout.addWidget(n_slider)
+            self.sliders[item['name']] = n_slider
             sl_layout.addWidget(p_butt)
             self.addLayout(sl_layout, i, entry_col, 1, entry_colspan)
             self.addWidget(value_label, i, val_col, alignment=Qt.AlignVCenter)
@@ -559,6 +563,7 @@ class SettingsLayout(QGridLayout):
             p_butt.clicked.connect(df_slider.increase_single_step)
             sl_layout.addWidget(m_butt)
             sl_layout.addWidget(df_slider)
+            self.sliders[item['name']] = df_slider
             sl_layout.addWidget(p_butt)
             self.addLayout(sl_layout, i, entry_col, 1, entry_colspan)
             self.addWidget(value_label, i, val_col)
@@ -589,6 +594,7 @@ class SettingsLayout(QGridLayout):
             p_butt.clicked.connect(slider.increase_single_step)
             sl_layout.addWidget(m_butt)
             sl_layout.addWidget(slider)
+            self.sliders[item['name']] = slider
             sl_layout.addWidget(p_butt)
             self.addLayout(sl_layout, i, entry_col, 1, entry_colspan)
             self.addWidget(value_label, i, val_col)
@@ -617,6 +623,7 @@ class SettingsLayout(QGridLayout):
             p_butt.clicked.connect(d_slider.increase_single_step)
             sl_layout.addWidget(m_butt)
             sl_layout.addWidget(d_slider)
+            self.sliders[item['name']] = d_slider
             sl_layout.addWidget(p_butt)
             self.addLayout(sl_layout, i, entry_col, 1, entry_colspan)
             self.addWidget(value_label, i, val_col)
@@ -0,0 +1,134 @@
+#
+# This file is part of the TelemFFB distribution (https://github.com/walmis/TelemFFB).
+# Copyright (c) 2023 Valmantas Palikša.
+# Copyright (c) 2023 Micah Frisby
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+from typing import Callable, Dict, List, Optional
+
+from PyQt5.QtCore import QAbstractTableModel, QModelIndex, Qt
+
+# keys shown at the top of the telemetry view in this order, the rest follows alphabetically
+PINNED_KEYS = ('T', 'frameTimes', 'maxFrameTime', 'avgFrameTime', 'frameTimePct', 'perf', 'FFBType', 'N', 'src',
+               'msfs_vers', 'AircraftClass', 'SimconnectCategory')
+_PINNED_RANK = {k: i for i, k in enumerate(PINNED_KEYS)}
+
+
+def format_telem_value(v) -> str:
+    if isinstance(v, float):
+        return f"{v:.3f}"
+    if isinstance(v, (list, tuple)):
+        return "[" + ", ".join([f"{x:.3f}" if isinstance(x, float) else str(x) if x is not None else "None" for x in v]) + "]"
+    return str(v)
+
+
+def _sort_key(key):
+    rank = _PINNED_RANK.get(key)
+    return (0, rank, "") if rank is not None else (1, 0, key)
+
+
+class TelemetryTableModel(QAbstractTableModel):
+    """
+    Two column (name, value) model of the latest telemetry frame
+
+    The row order is only recomputed when the set of keys changes, otherwise update() compares the new values
+    with the previous ones and formats and signals only the changed cells, so the view repaints only those.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._keys: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._raw = []          # last value per row, for change detection
+        self._text = []         # formatted value per row
+        self._names = []        # display name per row
+        self._name_mapper: Optional[Callable] = None
+        self._name_cache: Dict[str, str] = {}
+
+    def keys(self) -> List[str]:
+        return list(self._keys)
+
+    def set_name_mapper(self, mapper: Optional[Callable]):
+        """
+        :param mapper: returns the display name of a telemetry key or None to show the key (e.g. the simvar name
+                       lookup of SimConnectManager), names are cached until the mapper is changed
+        """
+        if mapper == self._name_mapper:
+            return
+        self._name_mapper = mapper
+        self._name_cache.clear()
+        self._names = [self._display_name(k) for k in self._keys]
+        if self._keys:
+            self.dataChanged.emit(self.index(0, 0), self.index(len(self._keys) - 1, 0), [Qt.DisplayRole])
+
+    def _display_name(self, key) -> str:
+        if self._name_mapper is None:
+            return key
+        name = self._name_cache.get(key)
+        if name is None:
+            name = self._name_mapper(key) or key
+            self._name_cache[key] = name
+        return name
+
+    def update(self, data):
+        if len(data) != len(self._keys) or any(k not in self._rows for k in data):
+            self._reset(data)
+            return
+
+        raw = self._raw
+        text = self._text
+        changed = self.dataChanged
+        roles = [Qt.DisplayRole]
+        for key, v in data.items():
+            row = self._rows[key]
+            if type(v) is list:
+                v = tuple(v)    # lists may be updated in place, keep a copy to compare against
+            old = raw[row]
+            if type(old) is type(v) and old == v:
+                continue
+            raw[row] = v
+            text[row] = format_telem_value(v)
+            # one signal per cell, for a range of cells the view repaints the whole viewport
+            index = self.index(row, 1)
+            changed.emit(index, index, roles)
+
+    def _reset(self, data):
+        self.beginResetModel()
+        self._keys = sorted(data.keys(), key=_sort_key)
+        self._rows = {k: i for i, k in enumerate(self._keys)}
+        self._raw = [tuple(v) if type(v) is list else v for v in (data[k] for k in self._keys)]
+        self._text = [format_telem_value(v) for v in self._raw]
+        self._names = [self._display_name(k) for k in self._keys]
+        self.endResetModel()
+
+    def clear(self):
+        self._reset({})
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._keys)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else 2
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole or not index.isValid():
+            return None
+        row = index.row()
+        return self._names[row] if index.column() == 0 else self._text[row]
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return ("Name", "Value")[section]
+        return None
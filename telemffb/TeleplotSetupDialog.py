@@ -55,7 +55,6 @@ class TeleplotSetupDialog(QDialog, Ui_TeleplotDialog):
         self.pb_Select.clicked.connect(self.select_active_telemetry)
         self.tb_port.setText(self.telem_port)
         self.tb_vars.setPlainText(str(self.telem_vars))
-        self.telem_data = parent.lbl_telem_data.text()
 
     class KeySelectionDialog(QDialog):
         def __init__(self, parent=None):
@@ -87,9 +86,7 @@ class TeleplotSetupDialog(QDialog, Ui_TeleplotDialog):
         def refresh_keys(self):
             self.list_widget.addItems(self.get_active_keys())
         def get_active_keys(self):
-            text = self.parent.parent.lbl_telem_data.text()
-            keys = [line.split(':')[0].strip() for line in text.split('\n') if line.strip()]
-            return keys
+            return self.parent.parent.telem_model.keys()
         def selectedKeys(self):
             return [item.text() for item in self.list_widget.selectedItems()]
 
@@ -0,0 +1,226 @@
+#
+# This file is part of the TelemFFB distribution (https://github.com/walmis/TelemFFB).
+# Copyright (c) 2023 Valmantas Palikša.
+# Copyright (c) 2023 Micah Frisby
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+Effect block pool of the VPforce Rhino, keeps spare device effect blocks ready for FFBRhino
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from typing import TYPE_CHECKING, Dict
+if TYPE_CHECKING:
+    from telemffb.hw.ffb_rhino import FFBEffectHandle, FFBRhino
+
+# disposed effects kept for reuse per effect type, on top of the prefill count
+EFFECT_POOL_MAX_SPARE = 2
+# seconds between refill attempts while the device pool is full
+EFFECT_POOL_RETRY_INTERVAL = 1.0
+
+
+class EffectBlockPool:
+    """
+    Recycles device effect blocks so effects can be created without a feature report round trip.
+
+    Disposed effects are stopped and kept as spare blocks of their effect type instead of being freed.
+    Types listed in ``prefill`` are allocated at connect and refilled from a background thread whenever
+    a spare block is taken.  When the device reports the effects pool full, spare blocks are freed to
+    make room, released effects are freed instead of kept and refilling is retried only every
+    EFFECT_POOL_RETRY_INTERVAL seconds until an allocation succeeds again (pool pressure).
+    """
+
+    def __init__(self, device: "FFBRhino", prefill: Dict[int, int], max_spare=EFFECT_POOL_MAX_SPARE):
+        self.device = device
+        self.prefill = dict(prefill)
+        self.max_spare = max_spare
+        self._spare: Dict[int, deque] = {}
+        self._cond = threading.Condition()
+        self._pending = set()       # effect types waiting for a refill
+        self._generation = 0        # incremented on device reset, spare blocks allocated before are stale
+        self._run = True
+
+        self.hits = 0               # effects created from a spare block
+        self.misses = 0             # effects created with a synchronous round trip
+        self.recycled = 0
+        self.freed = 0
+        self.full_events = 0
+        self.pressure = False       # device pool is full, no refilling
+        self._full_since = 0.0
+
+        self._thread = threading.Thread(target=self.run, daemon=True, name="EffectBlockPool")
+        self._thread.start()
+        self.refill_all()
+
+    @property
+    def spare(self) -> int:
+        return sum(len(v) for v in self._spare.values())
+
+    def stats(self) -> dict:
+        return dict(spare=self.spare, hits=self.hits, misses=self.misses, recycled=self.recycled,
+                    freed=self.freed, full_events=self.full_events, pressure=self.pressure,
+                    device_available=self.device.pool_available)
+
+    def acquire(self, effect_type) -> "FFBEffectHandle":
+        """:return: handle of a ready effect block or None if the device pool is full"""
+        with self._cond:
+            spare = self._spare.get(effect_type)
+            while spare:
+                handle = spare.popleft()
+                if handle:  # skip blocks invalidated by a device reset
+                    self.hits += 1
+                    self._request_refill(effect_type)
+                    return handle
+            self.misses += 1
+            self._request_refill(effect_type)
+
+        handle = self.device.allocate_block(effect_type)
+        if handle is None and self.evict():
+            handle = self.device.allocate_block(effect_type)
+        if handle is None:
+            self._on_full()
+            logging.warn("Effects pool full, cannot create new effect")
+        elif self.pressure:
+            self._on_available()
+        return handle
+
+    def release(self, handle: "FFBEffectHandle"):
+        """Stops the effect and keeps its block for reuse, or frees it if enough spare blocks are kept"""
+        if not handle:
+            return
+        if handle.started:
+            handle.stop()
+        with self._cond:
+            spare = self._spare.setdefault(handle.type, deque())
+            keep = self._run and not self.pressure and \
+                len(spare) < self.prefill.get(handle.type, 0) + self.max_spare
+            if keep:
+                spare.append(handle)
+                self.recycled += 1
+                return
+            self.freed += 1
+        handle.destroy()
+
+    def evict(self) -> int:
+        """Frees all spare blocks, :return: number of blocks freed"""
+        with self._cond:
+            handles = [h for spare in self._spare.values() for h in spare]
+            self._spare.clear()
+        n = 0
+        for handle in handles:
+            if handle:
+                handle.destroy()
+                n += 1
+        if n:
+            logging.info(f"Effect pool: freed {n} spare blocks")
+            self.freed += n
+            self.device.flush()
+        return n
+
+    def reset(self):
+        """Device effects were reset, drops all spare blocks without freeing them and refills"""
+        with self._cond:
+            for spare in self._spare.values():
+                for handle in spare:
+                    handle.invalidate()
+            self._spare.clear()
+            self._generation += 1
+            self.pressure = False
+        self.refill_all()
+
+    def refill_all(self):
+        with self._cond:
+            for effect_type in self.prefill:
+                self._request_refill(effect_type)
+
+    def close(self):
+        with self._cond:
+            self._run = False
+            self._cond.notify_all()
+        if self._thread is not threading.current_thread():
+            self._thread.join(timeout=1)
+        self.evict()
+
+    def _request_refill(self, effect_type):
+        if self.prefill.get(effect_type):
+            self._pending.add(effect_type)
+            self._cond.notify_all()
+
+    def _on_full(self):
+        with self._cond:
+            if not self.pressure:
+                self.full_events += 1
+                self.pressure = True
+            self._full_since = time.monotonic()
+
+    def _on_available(self):
+        with self._cond:
+            if self.pressure:
+                self.pressure = False
+                for effect_type in self.prefill:
+                    self._request_refill(effect_type)
+
+    def _needs_refill(self, effect_type):
+        return len(self._spare.get(effect_type, ())) < self.prefill.get(effect_type, 0)
+
+    # runs on the EffectBlockPool thread
+    def run(self):
+        while True:
+            with self._cond:
+                while self._run:
+                    timeout = None
+                    if self._pending:
+                        timeout = 0.0
+                        if self.pressure:
+                            timeout = EFFECT_POOL_RETRY_INTERVAL - (time.monotonic() - self._full_since)
+                        if timeout <= 0:
+                            break
+                    self._cond.wait(timeout)
+                if not self._run:
+                    return
+                effect_type = self._pending.pop()
+                if not self._needs_refill(effect_type):
+                    continue
+                generation = self._generation
+
+            try:
+                handle = self.device.allocate_block(effect_type)
+            except Exception:
+                logging.exception("Effect pool: block allocation failed")
+                handle = None
+
+            with self._cond:
+                if handle is None:
+                    if self._run and not self.pressure:
+                        from telemffb.hw.ffb_rhino import effect_names
+                        logging.info(f"Effect pool: device pool full, pausing preallocation of "
+                                     f"{effect_names.get(effect_type)} blocks")
+                    self._on_full()
+                    self._pending.add(effect_type)
+                    continue
+                self._on_available()
+                if generation == self._generation and self._run:
+                    self._spare.setdefault(effect_type, deque()).append(handle)
+                    if self._needs_refill(effect_type):
+                        self._pending.add(effect_type)
+                    continue
+            # allocated across a reset or close
+            if self._run:
+                handle.invalidate()
+            else:
+                handle.destroy()
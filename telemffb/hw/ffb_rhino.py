@@ -25,59 +25,29 @@ with additional FFB effects.
 import ctypes
 import inspect
 import logging
-import os
+import queue
+import threading
 import time
 import weakref
 from dataclasses import dataclass
-from typing import List, Self
-
-import usb1
-from PyQt5.QtCore import QObject, QTimer, QTimerEvent, pyqtSignal
-
-from telemffb.utils import Destroyable, DirectionModulator, clamp, overrides, millis
-
-paths = ["hidapi.dll", "dll/hidapi.dll", os.path.join(os.path.dirname(os.path.abspath(__file__)), 'dll', 'hidapi.dll')]
-for p in paths:
-    try:
-       ctypes.cdll.LoadLibrary(p)
-       break
-    except:
-        pass 
-
-import telemffb.hw.hid as hid
-
-USB_REQTYPE_DEVICE_TO_HOST = 0x80
-USB_REQTYPE_VENDOR = 0x40
-
-USB_CTRL_REQ_GET_VERSION = 16
-
-# RHINO specific report IDs
-HID_REPORT_ID_INPUT = 1
-HID_REPORT_ID_VENDOR_CMD = 0x55
-HID_REPORT_ID_BUTTON_LOOPBACK = 0x40
-HID_REPORT_ID_SET_EFFECT = 101
-HID_REPORT_ID_SET_ENVELOPE = 102
-HID_REPORT_ID_SET_CONDITION = 103
-HID_REPORT_ID_SET_PERIODIC = 104
-HID_REPORT_ID_SET_CONSTANT_FORCE = 105
-HID_REPORT_ID_SET_RAMP_FORCE = 106
-HID_REPORT_ID_SET_CUSTOM_FORCE = 107
-HID_REPORT_ID_SET_DOWNLOAD_SAMPLE = 108
-HID_REPORT_ID___RESERVED = 109
-HID_REPORT_ID_EFFECT_OPERATION = 110
-HID_REPORT_ID_BLOCK_FREE = 111
-HID_REPORT_ID_DEVICE_CONTROL = 112
-HID_REPORT_ID_DEVICE_GAIN = 113
-HID_REPORT_ID_SET_CUSTOM_FORCE_OUTPUT_DATA = 114
-HID_REPORT_ID_SET_DEADZONE = 115
-
-HID_REPORT_ID_PID_STATE_REPORT = 2
-HID_REPORT_ID_CREATE_EFFECT = 5
-HID_REPORT_ID_PID_BLOCK_LOAD = 6
-HID_REPORT_ID_PID_POOL_REPORT = 7
-
-HID_REPORT_FEATURE_ID_GET_GAINS = 0x56
-HID_REPORT_FEATURE_ID_SET_GAIN = 0x57
+from typing import Dict, List, Self
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from telemffb.hw.effect_pool import EffectBlockPool
+from telemffb.hw.hid_writer import (
+    HID_REPORT_FEATURE_ID_GET_GAINS, HID_REPORT_FEATURE_ID_SET_GAIN, HID_REPORT_ID___RESERVED,
+    HID_REPORT_ID_BLOCK_FREE, HID_REPORT_ID_BUTTON_LOOPBACK, HID_REPORT_ID_CREATE_EFFECT,
+    HID_REPORT_ID_DEVICE_CONTROL, HID_REPORT_ID_DEVICE_GAIN, HID_REPORT_ID_EFFECT_OPERATION, HID_REPORT_ID_INPUT,
+    HID_REPORT_ID_PID_BLOCK_LOAD, HID_REPORT_ID_PID_POOL_REPORT, HID_REPORT_ID_PID_STATE_REPORT,
+    HID_REPORT_ID_SET_CONDITION, HID_REPORT_ID_SET_CONSTANT_FORCE, HID_REPORT_ID_SET_CUSTOM_FORCE,
+    HID_REPORT_ID_SET_CUSTOM_FORCE_OUTPUT_DATA, HID_REPORT_ID_SET_DEADZONE, HID_REPORT_ID_SET_DOWNLOAD_SAMPLE,
+    HID_REPORT_ID_SET_EFFECT, HID_REPORT_ID_SET_ENVELOPE, HID_REPORT_ID_SET_PERIODIC, HID_REPORT_ID_SET_RAMP_FORCE,
+    HID_REPORT_ID_VENDOR_CMD, HIDBackend, HIDReportWriter, HIDWriteMetrics, hid, report_key)
+from telemffb.utils import Destroyable, DirectionModulator, millis
+
+HID_READ_TIMEOUT_MS = 100       # upper bound for the reader thread to notice stop requests
+HID_RECONNECT_INTERVAL = 1.0
 
 EFFECT_CONSTANT = 1
 EFFECT_RAMP = 2
@@ -96,6 +66,10 @@ EFFECT_SPRING_ADJUSTER = 14
 
 PERIODIC_EFFECTS = [EFFECT_SQUARE,EFFECT_SINE,EFFECT_TRIANGLE,EFFECT_SAWTOOTHUP,EFFECT_SAWTOOTHDOWN]
 
+# spare effect blocks allocated at connect and kept ready by EffectBlockPool, per effect type
+EFFECT_POOL_PREFILL = {EFFECT_CONSTANT: 1, EFFECT_SINE: 1, EFFECT_SPRING: 1, EFFECT_DAMPER: 1,
+                       EFFECT_INERTIA: 1, EFFECT_FRICTION: 1}
+
 CONTROL_DISABLE_ACTUATORS = 1
 CONTROL_ENABLE_ACTUATORS = 2
 CONTROL_STOP_ALL_EFFECTS = 3
@@ -528,27 +502,67 @@ input_report_handlers = {
     HID_REPORT_ID_PID_STATE_REPORT: FFBReport_PIDStatus_Input
 }
 
+class ReportBuffer:
+    """
+    Preallocated output report that is updated in place.  Only assignments that change a field value
+    mark the report dirty, so unchanged effect parameters are neither encoded nor sent again.
+    """
+    __slots__ = ("report", "defaults", "values", "dirty")
+
+    def __init__(self, report_type, **values):
+        self.report = report_type(**values)
+        # (field name, value) of all named fields as initialized, used by assign()
+        self.defaults = tuple((f[0], getattr(self.report, f[0])) for f in report_type._fields_ if f[0])
+        # last assigned values, compared instead of reading back the ctypes fields (which creates int objects)
+        self.values = dict(self.defaults)
+        self.dirty = True  # not sent yet
+
+    def set(self, name, value):
+        if self.values[name] != value:
+            self.values[name] = value
+            setattr(self.report, name, value)
+            self.dirty = True
+
+    def assign(self, values: dict):
+        """Sets every field from values, fields missing from values are reset to their initial value"""
+        current = self.values
+        for name, default in self.defaults:
+            value = values.get(name, default)
+            if current[name] != value:
+                current[name] = value
+                setattr(self.report, name, value)
+                self.dirty = True
+
+    def take(self) -> bytes:
+        """:return: encoded report if it changed since the last take(), otherwise None"""
+        if not self.dirty:
+            return None
+        self.dirty = False
+        return bytes(self.report)
+
+
 class FFBEffectHandle:
     def __init__(self, device, effect_id, effect_type) -> None:
         self.ffb : FFBRhino = device
         self.effect_id = effect_id
         self.type = effect_type
         self._finalizer = weakref.finalize(self, lambda ref: ref() and ref().destroy(), weakref.ref(self))
-        self._cache = {}
         self._started = False
 
+        self._effect = ReportBuffer(FFBReport_SetEffect, effectBlockIndex=effect_id, effectType=effect_type,
+                                    axesEnable=AXIS_ENABLE_X | AXIS_ENABLE_Y, gain=4096)
+        self._constant : ReportBuffer = None
+        self._periodic : ReportBuffer = None
+        if effect_type == EFFECT_CONSTANT:
+            self._constant = ReportBuffer(FFBReport_SetConstantForce, effectBlockIndex=effect_id)
+        elif effect_type in PERIODIC_EFFECTS:
+            self._periodic = ReportBuffer(FFBReport_SetPeriodic, effectBlockIndex=effect_id)
+        self._conditions = {}  # parameterBlockOffset -> ReportBuffer
+        self._direction_args = {"axesEnable": AXIS_ENABLE_DIR, "directionX": 0, "duration": 0}
+
     def invalidate(self):
         self.effect_id = 0
 
-    def _data_changed(self, key, data) -> bool:
-        h = hash(data)
-        if not self._cache.get(key):
-            self._cache[key] = h
-            return True
-        changed = self._cache[key] != h
-        self._cache[key] = h
-        return changed  
-
     def __del__(self):
         self.destroy()
 
@@ -610,39 +624,58 @@ class FFBEffectHandle:
         direction %= 360
         direction = round((direction*255/360))
 
-        self.setEffect(axesEnable=AXIS_ENABLE_DIR, directionX=direction)
+        self._set_direction(direction)
 
-        op = bytes(FFBReport_SetConstantForce(magnitude=round(4096*magnitude), effectBlockIndex=self.effect_id))
-        if self._data_changed("SetConstantForce", op): 
-            self.ffb.write(op)
+        buf = self._constant
+        buf.set("effectBlockIndex", self.effect_id)
+        buf.set("magnitude", round(4096*magnitude))
+        data = buf.take()
+        if data:
+            self.ffb.write(data)
 
         return self
 
+    def _set_direction(self, direction, duration=0):
+        # same as setEffect(axesEnable=AXIS_ENABLE_DIR, directionX=direction, duration=duration) without
+        # building a kwargs dict on every update
+        args = self._direction_args
+        args["directionX"] = direction
+        args["duration"] = duration
+        args["effectBlockIndex"] = self.effect_id
+        buf = self._effect
+        buf.assign(args)
+        data = buf.take()
+        if data:
+            self.ffb.write(data)
+
     def setEffect(self, **kwargs):
-        args = {
-            "effectBlockIndex": self.effect_id,
-            "effectType": self.type,
-            "axesEnable": AXIS_ENABLE_X | AXIS_ENABLE_Y,
-            "gain": 4096
-        }
-        args.update(kwargs)
-
-        op = bytes(FFBReport_SetEffect(**args))
-        if self._data_changed("setEffect", op):  
-            self.ffb.write(op)
+        kwargs.setdefault("effectBlockIndex", self.effect_id)
+        buf = self._effect
+        buf.assign(kwargs)
+        data = buf.take()
+        if data:
+            self.ffb.write(data)
     
     def setCondition(self, cond : FFBReport_SetCondition):
-        cond.effectBlockIndex = self.effect_id
+        axis = cond.parameterBlockOffset
+        buf = self._conditions.get(axis)
+        if buf is None:
+            buf = self._conditions[axis] = ReportBuffer(FFBReport_SetCondition, parameterBlockOffset=axis)
         # spring adjuster can go full 16bits
         # maximum gain increase is 32767/4096 = 7.5
         if self.type == EFFECT_SPRING_ADJUSTER:
-            cond.positiveCoefficient = clamp(cond.positiveCoefficient, -32768, 32767)
-            cond.negativeCoefficient = clamp(cond.negativeCoefficient, -32768, 32767)
+            low, high = -32768, 32767
         else:
-            cond.positiveCoefficient = clamp(cond.positiveCoefficient, -4096, 4096)
-            cond.negativeCoefficient = clamp(cond.negativeCoefficient, -4096, 4096)
-        data = bytes(cond)
-        if self._data_changed(f"setCondition{cond.parameterBlockOffset}", data):
+            low, high = -4096, 4096
+        buf.set("effectBlockIndex", self.effect_id)
+        buf.set("cpOffset", cond.cpOffset)
+        buf.set("positiveCoefficient", min(max(cond.positiveCoefficient, low), high))
+        buf.set("negativeCoefficient", min(max(cond.negativeCoefficient, low), high))
+        buf.set("positiveSaturation", cond.positiveSaturation)
+        buf.set("negativeSaturation", cond.negativeSaturation)
+        buf.set("deadBand", cond.deadBand)
+        data = buf.take()
+        if data:
             self.ffb.write(data)
 
     def setPeriodic(self, freq, magnitude, direction, duration=0, **kwargs):
@@ -651,18 +684,24 @@ class FFBEffectHandle:
         direction %= 360
         direction = round(direction*255/360)
 
-        self.setEffect(axesEnable=AXIS_ENABLE_DIR, directionX=direction, duration=duration, **kwargs)
+        if kwargs:
+            self.setEffect(axesEnable=AXIS_ENABLE_DIR, directionX=direction, duration=duration, **kwargs)
+        else:
+            self._set_direction(direction, duration)
 
         if freq == 0:
             period = 0
         else:
             period = round(1000.0/freq)
-        mag = round(4096*magnitude)
+        kwargs["magnitude"] = round(4096*magnitude)
+        kwargs["period"] = period
+        kwargs["effectBlockIndex"] = self.effect_id
 
-        op = bytes(FFBReport_SetPeriodic(magnitude=mag, effectBlockIndex=self.effect_id, period=period, **kwargs))
-
-        if self._data_changed("SetPeriodic", op):
-            self.ffb.write(op)
+        buf = self._periodic
+        buf.assign(kwargs)
+        data = buf.take()
+        if data:
+            self.ffb.write(data)
 
         return self
 
@@ -682,8 +721,19 @@ class DeviceInfo:
 class FFBRhino(QObject):
     buttonPressed = pyqtSignal(int)
     buttonReleased = pyqtSignal(int)
+    _buttonEventsQueued = pyqtSignal()
+
+    # used by instances created without an explicit backend
+    default_backend : HIDBackend = HIDBackend()
+
+    @classmethod
+    def set_default_backend(cls, backend : HIDBackend):
+        """Selects the backend used by FFBRhino instances created from now on"""
+        logging.info(f"Using {backend.name} HID backend")
+        cls.default_backend = backend
 
-    def __init__(self, vid = 0xFFFF, pid=0x2055, serial=None, path=None) -> None:
+    def __init__(self, vid = 0xFFFF, pid=0x2055, serial=None, path=None, backend : HIDBackend = None,
+                 batch_writes=True, read_thread=True, pool_prefill : Dict[int, int] = None) -> None:
 
         self.vid = vid
         self.pid = pid
@@ -691,32 +741,56 @@ class FFBRhino(QObject):
         self.firmware_version : str = None
         self._button_state : int = 0
         self._prev_hats = 0xFFFF
+        self._backend = backend or self.default_backend
 
         if not path:
-            devs = FFBRhino.enumerate(pid)
+            devs = FFBRhino.enumerate(pid, self._backend)
             if serial:
                 devs = list(filter(lambda x: x.serial_number == serial, devs))
             if path:
                 devs = list(filter(lambda x: x.path == path, devs))
             if not devs:
-                raise hid.HIDException('unable to open device')
+                raise IOError('unable to open device')
             self.info = devs[0]
 
+        # latest input report per report id, replaced as a whole by the reader so no lock is needed to read it
         self._in_reports = {}
+        self._in_seq = {}
+        self._in_cond = threading.Condition()
+        # (pressed, button) edges, emitted as buttonPressed/buttonReleased on the Qt thread
+        self.button_events = queue.SimpleQueue()
+        self._button_events_signaled = False
         self._effect_handles : List[FFBEffectHandle] = []
         self._dev = None
 
+        self.write_metrics = HIDWriteMetrics()
+        self._batch : dict = None
+        self._batch_seq = 0
+        # the batch is filled by the telemetry thread, the pool thread takes block frees out of it in allocate_block
+        self._batch_lock = threading.Lock()
+        self._writer = HIDReportWriter(self._write_now, self.write_metrics) if batch_writes else None
+        self._create_lock = threading.Lock()
+        self.pool_available : int = None  # free effect blocks as last reported by the device
+
         QObject.__init__(self)
-        self.startTimer(1) # start Qt timer to read HID reports every 1ms
+        self._buttonEventsQueued.connect(self._dispatch_button_events)
 
         self.reconnect()
+        self.effect_pool = EffectBlockPool(self, EFFECT_POOL_PREFILL if pool_prefill is None else pool_prefill)
+
+        self._reader = None
+        self._reading = False
+        if read_thread:
+            self._reading = True
+            self._reader = threading.Thread(target=self._read_loop, daemon=True, name="HIDReader")
+            self._reader.start()
 
     def reconnect(self):
         if self._dev:
             self._dev.close()
             self._dev = None
         
-        self._dev = hid.Device(path=self.info.path)
+        self._dev = self._backend.open(self.info.path)
         self._dev.nonblocking = True
 
     @property
@@ -730,8 +804,8 @@ class FFBRhino(QObject):
         return self._dev.manufacturer
     
     @staticmethod
-    def enumerate(pid=0) -> List[DeviceInfo]:
-        devs = hid.enumerate(vid=0xffff, pid=pid)
+    def enumerate(pid=0, backend : HIDBackend = None) -> List[DeviceInfo]:
+        devs = (backend or FFBRhino.default_backend).enumerate(0xffff, pid)
         devs = [DeviceInfo(**dev) for dev in devs]
         # returns a list of valid VPforce devices
         #[{'interface_number': 0,
@@ -762,27 +836,66 @@ class FFBRhino(QObject):
         data.gain_value = value
         self._dev.send_feature_report(bytes(data))
 
-    # runs on mainThread
-    @overrides(QObject)
-    def timerEvent(self, a0: QTimerEvent) -> None:
+    # runs on the HIDReader thread
+    def _read_loop(self):
+        while self._reading:
+            try:
+                dev = self._dev
+                if dev is None:
+                    self._try_reconnect()
+                    continue
+                # blocks in hid_read_timeout (outside of the GIL) until a report arrives
+                data = dev.read(64, HID_READ_TIMEOUT_MS)
+                if data:
+                    self._publish_report(data)
+                    # drain whatever else is queued, only the latest report per id is kept
+                    self.read_reports()
+            except Exception:
+                if not self._reading:
+                    break
+                logging.exception("Exception")
+                if self._dev:
+                    self._dev.close()
+                    self._dev = None
+                logging.warn(f"Reconnecting HID device in {HID_RECONNECT_INTERVAL:.0f}s")
+
+    def _try_reconnect(self):
+        time.sleep(HID_RECONNECT_INTERVAL)
+        if not self._reading:
+            return
         try:
-            self.read_reports()
+            self.reconnect()
+            logging.info("HID connected!")
         except Exception:
-            logging.exception("Exception")
-            self._dev.close()
-            self._dev = None
+            logging.warn(f"Reconnecting HID device in {HID_RECONNECT_INTERVAL:.0f}s")
+
+    def _publish_report(self, data):
+        report_id = data[0]
+        self._in_reports[report_id] = data
+        self.on_hid_report_received(report_id)
+        with self._in_cond:
+            self._in_seq[report_id] = self._in_seq.get(report_id, 0) + 1
+            self._in_cond.notify_all()
+
+    def _queue_button_event(self, pressed, button):
+        self.button_events.put((pressed, button))
+        if not self._button_events_signaled:
+            self._button_events_signaled = True
+            self._buttonEventsQueued.emit()  # queued to the Qt thread
 
-            logging.warn("Reconnecting HID device in 1s")
-            def do_reconnect():
-                try:
-                    self.reconnect()
-                    logging.info("HID connected!")
-                except Exception:
-                    logging.warn("Reconnecting HID device in 1s")
-                    QTimer.singleShot(1000, do_reconnect)
+    # runs on mainThread
+    def _dispatch_button_events(self):
+        self._button_events_signaled = False
+        while True:
+            try:
+                pressed, button = self.button_events.get_nowait()
+            except queue.Empty:
+                break
+            if pressed:
+                self.buttonPressed.emit(button)
+            else:
+                self.buttonReleased.emit(button)
 
-            QTimer.singleShot(1000, do_reconnect)
-            
     def _process_hats(self, hats):
         if hats != self._prev_hats:
             hats_changed = hats ^ self._prev_hats
@@ -794,10 +907,10 @@ class FFBRhino(QObject):
 
                     if val != 0xF:
                         b = 0x80 | (i << 4) | val
-                        self.buttonPressed.emit(b)
+                        self._queue_button_event(True, b)
                     else:
                         b = 0x80 | (i << 4) | prev_val
-                        self.buttonReleased.emit(b)
+                        self._queue_button_event(False, b)
             self._prev_hats = hats
 
     def on_hid_report_received(self, report_id):
@@ -814,9 +927,9 @@ class FFBRhino(QObject):
             while diff: # iterate and shift out all changed bits
                 if diff & 1:
                     if (~prev & btns)&1: # do some bitwise magic to check presses/releases
-                        self.buttonPressed.emit(i)
+                        self._queue_button_event(True, i)
                     if (prev & ~btns)&1:
-                        self.buttonReleased.emit(i)
+                        self._queue_button_event(False, i)
                 i+=1
                 diff = diff >> 1
                 btns = btns >> 1
@@ -832,6 +945,7 @@ class FFBRhino(QObject):
                 for ref in self._effect_handles:
                     effect : FFBEffectHandle = ref()
                     effect.invalidate()
+                self.effect_pool.reset()
 
             if report.effectPlaying == 0:
                 for ref in self._effect_handles:
@@ -844,19 +958,8 @@ class FFBRhino(QObject):
             return self.firmware_version
         
         try:
-            with usb1.USBContext() as context:
-                handle = context.openByVendorIDAndProductID(
-                    self.vid,
-                    self.pid,
-                    skip_on_error=True,
-                )
-                #if handle is None:
-                    # Device not present, or user is not allowed to access device.
-                ##request_type, request, value, index, length
-
-                self.firmware_version = handle.controlRead(USB_REQTYPE_DEVICE_TO_HOST|USB_REQTYPE_VENDOR, 
-                                        USB_CTRL_REQ_GET_VERSION, 0, 0, 64).decode("utf-8")
-                return self.firmware_version
+            self.firmware_version = self._backend.get_firmware_version(self.vid, self.pid)
+            return self.firmware_version
         except Exception:
             logging.exception("Unable to read Firmware Version")
         
@@ -864,27 +967,135 @@ class FFBRhino(QObject):
 
     def reset_effects(self):
         logging.info("FFB: Reset device effects")
-        self._dev.write(bytes([HID_REPORT_ID_DEVICE_CONTROL, CONTROL_RESET]))
-        time.sleep(0.01)
+        with self._create_lock:  # no block allocation may straddle the reset
+            self.flush()
+            self._dev.write(bytes([HID_REPORT_ID_DEVICE_CONTROL, CONTROL_RESET]))
+            time.sleep(0.01)
+            self.effect_pool.reset()
 
     def create_effect(self, type) -> FFBEffectHandle:
-        self._dev.send_feature_report(bytes([HID_REPORT_ID_CREATE_EFFECT, type, 0, 0]))
-        r = bytearray(self._dev.get_feature_report(HID_REPORT_ID_PID_BLOCK_LOAD, 5))
+        """Takes a block from the effect pool, allocating a new one only if there is no spare block"""
+        return self.effect_pool.acquire(type)
+
+    def release_effect(self, handle : FFBEffectHandle):
+        """Returns an effect to the pool (the block may be reused by a later create_effect)"""
+        self.effect_pool.release(handle)
+
+    def allocate_block(self, type) -> FFBEffectHandle:
+        """Allocates a new effect block on the device (feature report round trip), None if the pool is full"""
+        with self._create_lock:
+            self._send_pending_frees()
+            if self._writer:
+                # pending block frees must reach the device before it allocates a new block
+                self._writer.wait_idle()
+            self._dev.send_feature_report(bytes([HID_REPORT_ID_CREATE_EFFECT, type, 0, 0]))
+            r = bytearray(self._dev.get_feature_report(HID_REPORT_ID_PID_BLOCK_LOAD, 5))
 
         assert(r[0] == HID_REPORT_ID_PID_BLOCK_LOAD)
         effect_id = r[1]
         status = r[2]
+        self.pool_available = r[3] | r[4] << 8
 
         if(status != LOAD_SUCCESS):
-            logging.warn("Effects pool full, cannot create new effect")
             return None
 
         handle = FFBEffectHandle(self, effect_id, type)
         self._effect_handles.append(weakref.ref(handle, lambda x: self._effect_handles.remove(x)))
         return handle
+
+    def _send_pending_frees(self):
+        # block frees collected in the current frame are sent right away, reports for the freed blocks are dropped
+        with self._batch_lock:
+            batch = self._batch
+            if not batch:
+                return
+            frees = {}
+            for key in [k for k in batch if k[0] == HID_REPORT_ID_BLOCK_FREE]:
+                frees[key] = batch.pop(key)
+                for k in [k for k in batch if k[1] == key[1]]:
+                    del batch[k]
+        if not frees:
+            return
+        if self._writer:
+            self._writer.submit(frees)
+        else:
+            for data in frees.values():
+                self._write_now(data)
+                self.write_metrics.reports_written += 1
     
+    def begin_frame(self):
+        """Starts collecting output reports, see commit_frame"""
+        with self._batch_lock:
+            self._batch = {}
+            self.write_metrics.frame_submitted = 0
+
+    def commit_frame(self):
+        """
+        Sends the reports collected since begin_frame in one burst.  Only the last report per effect
+        block and report id (and axis for conditions) is kept.
+        """
+        m = self.write_metrics
+        with self._batch_lock:
+            batch, self._batch = self._batch, None
+            m.frames += 1
+            m.frame_written = len(batch) if batch else 0
+            m.reports_coalesced += m.frame_submitted - m.frame_written
+        if batch:
+            if self._writer:
+                self._writer.submit(batch)
+            else:
+                for data in batch.values():
+                    self._write_now(data)
+                    m.reports_written += 1
+
     def write(self, data):
-        if self._dev.write(data) < 0:
+        with self._batch_lock:
+            self._batch_seq += 1
+            key = report_key(data, self._batch_seq)
+            batch = self._batch
+            if batch is not None:
+                self.write_metrics.frame_submitted += 1
+                self.write_metrics.reports_submitted += 1
+                batch[key] = data
+                return
+            if self._writer:
+                self.write_metrics.reports_submitted += 1
+        if self._writer:
+            # keep ordering with batches still being written
+            self._writer.submit({key: data})
+        else:
+            self._write_now(data)
+            self.write_metrics.reports_written += 1
+
+    def flush(self, timeout=1.0):
+        """Waits until all submitted reports have been written"""
+        if self._writer:
+            self._writer.wait_idle(timeout)
+
+    def close(self):
+        self.effect_pool.close()
+        # free the blocks of effects still alive, their finalizers can't reach the device anymore
+        for ref in list(self._effect_handles):
+            effect : FFBEffectHandle = ref()
+            if effect:
+                effect.destroy()
+        if self._reader:
+            self._reading = False
+            if self._reader is not threading.current_thread():
+                self._reader.join(timeout=2 * HID_READ_TIMEOUT_MS / 1000)
+            self._reader = None
+        if self._writer:
+            self._writer.stop()
+            self._writer = None
+        if self._dev:
+            self._dev.close()
+            self._dev = None
+
+    def _write_now(self, data):
+        dev = self._dev
+        if dev is None:
+            raise IOError("HID device not connected")
+        if dev.write(data) < 0:
             raise IOError("HID Write")
         
     def read_reports(self):
@@ -892,19 +1103,32 @@ class FFBRhino(QObject):
             return
         # read all input reports from the operating system buffer
         # we only care about the latest ones, otherwise there will be latency!
-        # this function is non-blocking
+        # this function is non-blocking, devices opened with read_thread=False must call it periodically
         while True:
             tmp = self._dev.read(64)
             if tmp:
-                report_id = tmp[0]
-                self._in_reports[report_id] = tmp
-                self.on_hid_report_received(report_id)
+                self._publish_report(tmp)
             else: break
-        
-    def get_report(self, report_id):   
-        #self.readReports()
 
+    def wait_report(self, report_id, timeout=1.0) -> bool:
+        """
+        Blocks until a report newer than the currently published one arrives
+
+        :return: False on timeout
+        """
+        with self._in_cond:
+            seq = self._in_seq.get(report_id, 0)
+            return self._in_cond.wait_for(lambda: self._in_seq.get(report_id, 0) != seq, timeout)
+
+    def get_report(self, report_id, timeout=0):
+        """
+        :param timeout: if no report with this id was received yet, wait up to timeout seconds for the first one
+        """
         data = self._in_reports.get(report_id, None)
+        if data is None and timeout:
+            with self._in_cond:
+                self._in_cond.wait_for(lambda: report_id in self._in_reports, timeout)
+            data = self._in_reports.get(report_id, None)
         if data:
             try:
                 return input_report_handlers[report_id].from_buffer_copy(data)
@@ -914,8 +1138,8 @@ class FFBRhino(QObject):
 
         return data
         
-    def get_input(self) -> FFBReport_Input:
-        return self.get_report(HID_REPORT_ID_INPUT)
+    def get_input(self, timeout=0) -> FFBReport_Input:
+        return self.get_report(HID_REPORT_ID_INPUT, timeout)
 
 
 # Higher level effect interface
@@ -941,9 +1165,9 @@ class HapticEffect(Destroyable):
     # path example: \\\\?\\HID#VID_FFFF&PID_2055&MI_00#9&3450694a&0&0000#{4d1e55b2-f16f-11cf-88cb-001111000030}
     # path can be obtained using FFBRhino.enumerate function
     @classmethod
-    def open(cls, vid = 0xFFFF, pid=0x2055, serial=None, path=None) -> FFBRhino:
+    def open(cls, vid = 0xFFFF, pid=0x2055, serial=None, path=None, backend : HIDBackend = None) -> FFBRhino:
         logging.info(f"Open Rhino HID {vid:04X}:{pid:04X}")
-        cls.device = FFBRhino(vid, pid, serial, path)
+        cls.device = FFBRhino(vid, pid, serial, path, backend)
         logging.info(f"Successfully opened HID '{cls.device.info.path.decode('utf-8')}'")
 
         return cls.device
@@ -973,19 +1197,22 @@ class HapticEffect(Destroyable):
             self._h_effect.setEffect() # initialize defaults
 
         if coef_x is not None:
-            cond_x = FFBReport_SetCondition(parameterBlockOffset=0, 
-                                            positiveCoefficient=int(coef_x),
-                                            negativeCoefficient=int(coef_x))
-            self._h_effect.setCondition(cond_x)
+            self._h_effect.setCondition(self._coefficient_condition(0, int(coef_x)))
 
         if coef_y is not None:
-            cond_y = FFBReport_SetCondition(parameterBlockOffset=1, 
-                                            positiveCoefficient=int(coef_y),
-                                            negativeCoefficient=int(coef_y))
-            self._h_effect.setCondition(cond_y)
+            self._h_effect.setCondition(self._coefficient_condition(1, int(coef_y)))
 
         return self
 
+    def _coefficient_condition(self, axis, coef) -> FFBReport_SetCondition:
+        # reused for every update, setCondition only reads it
+        cond = self._conds.get(axis)
+        if cond is None:
+            cond = self._conds[axis] = FFBReport_SetCondition(parameterBlockOffset=axis)
+        cond.positiveCoefficient = coef
+        cond.negativeCoefficient = coef
+        return cond
+
     def inertia(self, coef_x = None, coef_y = None):
         return self._conditional_effect(EFFECT_INERTIA, coef_x, coef_y)
 
@@ -1084,7 +1311,7 @@ class HapticEffect(Destroyable):
             logging.debug(f"The function {caller_name} is destroying effect {self._h_effect.effect_id}")
             name = f" (\"{self.name}\")" if self.name else ""  
             logging.info(f"Destroying effect {self._h_effect.effect_id} ({self._h_effect.name}){name}")
-            self._h_effect.destroy()
+            self._h_effect.ffb.release_effect(self._h_effect)
             self._h_effect = None
 
     def __del__(self):
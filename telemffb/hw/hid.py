@@ -137,6 +137,7 @@ def enumerate(vid=0, pid=0):
 
 class Device(object):
     def __init__(self, vid=None, pid=None, serial=None, path=None):
+        self.__read_buf = None
         if path:
             self.__dev = hidapi.hid_open_path(path)
         elif serial:
@@ -176,7 +177,10 @@ class Device(object):
         return self.__hidcall(hidapi.hid_write, self.__dev, data, len(data))
 
     def read(self, size, timeout=None):
-        data = ctypes.create_string_buffer(size)
+        # the read buffer is reused, reads must not be issued from several threads at once
+        data = self.__read_buf
+        if data is None or len(data) < size:
+            data = self.__read_buf = ctypes.create_string_buffer(size)
 
         if timeout is None:
             size = self.__hidcall(hidapi.hid_read, self.__dev, data, size)
@@ -184,7 +188,7 @@ class Device(object):
             size = self.__hidcall(
                 hidapi.hid_read_timeout, self.__dev, data, size, timeout)
 
-        return data.raw[:size]
+        return ctypes.string_at(data, size) if size else b''
 
     def get_input_report(self, report_id, size):
         data = ctypes.create_string_buffer(size)
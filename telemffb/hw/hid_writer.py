@@ -0,0 +1,222 @@
+#
+# This file is part of the TelemFFB distribution (https://github.com/walmis/TelemFFB).
+# Copyright (c) 2023 Valmantas Palikša.
+# Copyright (c) 2023 Micah Frisby
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+Output report transport of the VPforce Rhino: hidapi device access and the batched report writer
+"""
+
+import ctypes
+import logging
+import os
+import threading
+import time
+from typing import List
+
+paths = ["hidapi.dll", "dll/hidapi.dll", os.path.join(os.path.dirname(os.path.abspath(__file__)), 'dll', 'hidapi.dll')]
+for p in paths:
+    try:
+       ctypes.cdll.LoadLibrary(p)
+       break
+    except:
+        pass 
+
+try:
+    import telemffb.hw.hid as hid
+except ImportError as e:
+    # no hidapi library, only simulated devices can be used (e.g. headless benchmark runs)
+    logging.warning(f"HID support unavailable: {e}")
+    hid = None
+
+USB_REQTYPE_DEVICE_TO_HOST = 0x80
+USB_REQTYPE_VENDOR = 0x40
+
+USB_CTRL_REQ_GET_VERSION = 16
+
+# RHINO specific report IDs
+HID_REPORT_ID_INPUT = 1
+HID_REPORT_ID_VENDOR_CMD = 0x55
+HID_REPORT_ID_BUTTON_LOOPBACK = 0x40
+HID_REPORT_ID_SET_EFFECT = 101
+HID_REPORT_ID_SET_ENVELOPE = 102
+HID_REPORT_ID_SET_CONDITION = 103
+HID_REPORT_ID_SET_PERIODIC = 104
+HID_REPORT_ID_SET_CONSTANT_FORCE = 105
+HID_REPORT_ID_SET_RAMP_FORCE = 106
+HID_REPORT_ID_SET_CUSTOM_FORCE = 107
+HID_REPORT_ID_SET_DOWNLOAD_SAMPLE = 108
+HID_REPORT_ID___RESERVED = 109
+HID_REPORT_ID_EFFECT_OPERATION = 110
+HID_REPORT_ID_BLOCK_FREE = 111
+HID_REPORT_ID_DEVICE_CONTROL = 112
+HID_REPORT_ID_DEVICE_GAIN = 113
+HID_REPORT_ID_SET_CUSTOM_FORCE_OUTPUT_DATA = 114
+HID_REPORT_ID_SET_DEADZONE = 115
+
+HID_REPORT_ID_PID_STATE_REPORT = 2
+HID_REPORT_ID_CREATE_EFFECT = 5
+HID_REPORT_ID_PID_BLOCK_LOAD = 6
+HID_REPORT_ID_PID_POOL_REPORT = 7
+
+HID_REPORT_FEATURE_ID_GET_GAINS = 0x56
+HID_REPORT_FEATURE_ID_SET_GAIN = 0x57
+
+class HIDBackend:
+    """
+    Device access used by FFBRhino.  The default implementation talks to real devices through hidapi
+    and libusb, :class:`telemffb.hw.rhino_sim.SimulatedRhinoBackend` provides an in-memory device.
+    """
+    name = "hidapi"
+
+    def enumerate(self, vid, pid) -> List[dict]:
+        """:return: list of hidapi style device info dicts"""
+        if hid is None:
+            return []
+        return hid.enumerate(vid=vid, pid=pid)
+
+    def open(self, path):
+        """:return: hid.Device compatible object"""
+        if hid is None:
+            raise IOError("hidapi library not available")
+        return hid.Device(path=path)
+
+    def get_firmware_version(self, vid, pid) -> str:
+        import usb1
+        with usb1.USBContext() as context:
+            handle = context.openByVendorIDAndProductID(
+                vid,
+                pid,
+                skip_on_error=True,
+            )
+            #if handle is None:
+                # Device not present, or user is not allowed to access device.
+            ##request_type, request, value, index, length
+
+            return handle.controlRead(USB_REQTYPE_DEVICE_TO_HOST|USB_REQTYPE_VENDOR,
+                                      USB_CTRL_REQ_GET_VERSION, 0, 0, 64).decode("utf-8")
+
+
+# reports where a later write for the same effect block replaces an earlier one
+_coalesced_reports = {HID_REPORT_ID_SET_EFFECT, HID_REPORT_ID_SET_ENVELOPE, HID_REPORT_ID_SET_PERIODIC,
+                      HID_REPORT_ID_SET_CONSTANT_FORCE, HID_REPORT_ID_EFFECT_OPERATION, HID_REPORT_ID_BLOCK_FREE}
+
+
+def report_key(data, seq) -> tuple:
+    """
+    Identifies what an output report updates, a later report with the same key supersedes the earlier one
+
+    :param seq: unique number used for reports that must never be dropped
+    """
+    report_id = data[0]
+    if report_id in _coalesced_reports:
+        return report_id, data[1]
+    if report_id == HID_REPORT_ID_SET_CONDITION:
+        return report_id, data[1], data[2]  # per axis (parameterBlockOffset)
+    return report_id, None, seq
+
+
+class HIDWriteMetrics:
+    """Counters of the batched report writer, read by the UI/telemetry thread"""
+
+    def __init__(self):
+        self.frames = 0
+        self.reports_submitted = 0
+        self.reports_written = 0
+        self.reports_coalesced = 0
+        self.batches = 0
+        self.write_errors = 0
+        self.frame_submitted = 0        # reports written by the aircraft during the last frame
+        self.frame_written = 0          # reports left after coalescing
+        self.flush_latency = 0.0        # seconds spent writing the last batch
+        self.max_flush_latency = 0.0
+        self.queue_latency = 0.0        # seconds from commit until the last batch was written
+
+    def snapshot(self) -> dict:
+        return dict(vars(self))
+
+
+class HIDReportWriter:
+    """
+    Writes report batches from a dedicated thread so the telemetry thread never blocks on USB.
+
+    A batch that is still waiting when the next one is submitted is merged with it, so superseded
+    reports of a slow frame are dropped as well.
+    """
+
+    def __init__(self, write_fn, metrics: HIDWriteMetrics):
+        self._write = write_fn
+        self.metrics = metrics
+        self._cond = threading.Condition()
+        self._pending: dict = None
+        self._pending_since = 0.0
+        self._busy = False
+        self._run = True
+        self._thread = threading.Thread(target=self.run, daemon=True, name="HIDReportWriter")
+        self._thread.start()
+
+    def submit(self, batch: dict):
+        with self._cond:
+            if self._pending is None:
+                self._pending = batch
+                self._pending_since = time.perf_counter()
+            else:
+                for key, data in batch.items():
+                    if key in self._pending:
+                        self.metrics.reports_coalesced += 1
+                    self._pending[key] = data
+            self._cond.notify_all()
+
+    def wait_idle(self, timeout=1.0) -> bool:
+        with self._cond:
+            return self._cond.wait_for(lambda: self._pending is None and not self._busy, timeout)
+
+    def stop(self):
+        self.wait_idle()
+        with self._cond:
+            self._run = False
+            self._cond.notify_all()
+        if self._thread is not threading.current_thread():
+            self._thread.join(timeout=1)
+
+    def run(self):
+        m = self.metrics
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending is not None or not self._run)
+                if self._pending is None:
+                    return
+                batch, since = self._pending, self._pending_since
+                self._pending = None
+                self._busy = True
+
+            t0 = time.perf_counter()
+            for data in batch.values():
+                try:
+                    self._write(data)
+                    m.reports_written += 1
+                except Exception:
+                    m.write_errors += 1
+                    logging.exception("HID write failed")
+            t1 = time.perf_counter()
+            m.batches += 1
+            m.flush_latency = t1 - t0
+            m.max_flush_latency = max(m.max_flush_latency, m.flush_latency)
+            m.queue_latency = t1 - since
+
+            with self._cond:
+                self._busy = False
+                self._cond.notify_all()
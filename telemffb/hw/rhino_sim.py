@@ -0,0 +1,470 @@
+#
+# This file is part of the TelemFFB distribution (https://github.com/walmis/TelemFFB).
+# Copyright (c) 2023 Valmantas Palikša.
+# Copyright (c) 2023 Micah Frisby
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+In-memory simulated VPforce Rhino.
+
+:class:`SimulatedRhinoBackend` plugs into FFBRhino (``FFBRhino(backend=...)`` or
+``FFBRhino.set_default_backend``) in place of hidapi.  :class:`SimulatedRhino` implements the
+hid.Device interface: it decodes the ``FFBReport_*`` output reports, keeps an effect block pool that
+honors create effect / block free, answers the gain feature reports and produces input and PID state
+reports.  An optional :class:`StickModel` moves the stick according to the active effects.
+"""
+
+import ctypes
+import logging
+import math
+import struct
+import threading
+import time
+from collections import deque
+from typing import Dict, List
+
+from telemffb.hw.ffb_rhino import (
+    CONTROL_CONTINUE, CONTROL_DISABLE_ACTUATORS, CONTROL_ENABLE_ACTUATORS, CONTROL_PAUSE, CONTROL_RESET,
+    CONTROL_STOP_ALL_EFFECTS, EFFECT_CONSTANT, EFFECT_DAMPER, EFFECT_FRICTION, EFFECT_INERTIA, EFFECT_SPRING,
+    EFFECT_SPRING_ADJUSTER, EFFECT_SQUARE, EFFECT_TRIANGLE, EFFECT_SAWTOOTHUP, EFFECT_SAWTOOTHDOWN,
+    HID_REPORT_FEATURE_ID_GET_GAINS, HID_REPORT_FEATURE_ID_SET_GAIN, HID_REPORT_ID_BLOCK_FREE,
+    HID_REPORT_ID_CREATE_EFFECT, HID_REPORT_ID_DEVICE_CONTROL, HID_REPORT_ID_DEVICE_GAIN,
+    HID_REPORT_ID_EFFECT_OPERATION, HID_REPORT_ID_INPUT, HID_REPORT_ID_PID_BLOCK_LOAD,
+    HID_REPORT_ID_PID_STATE_REPORT, HID_REPORT_ID_SET_CONDITION, HID_REPORT_ID_SET_CONSTANT_FORCE,
+    HID_REPORT_ID_SET_EFFECT, HID_REPORT_ID_SET_ENVELOPE, HID_REPORT_ID_SET_PERIODIC, LOAD_FULL, LOAD_SUCCESS,
+    OP_START_SOLO, OP_STOP, PERIODIC_EFFECTS, FFBReport_BlockFree, FFBReport_EffectOperation,
+    FFBReport_Get_Gains_Feature_Data, FFBReport_Input, FFBReport_PIDStatus_Input, FFBReport_SetCondition,
+    FFBReport_SetConstantForce, FFBReport_SetEffect, FFBReport_SetEnvelope, FFBReport_SetPeriodic,
+    FFBReport_Set_Gain_Feature_Data_t, effect_names)
+from telemffb.hw.hid_writer import HIDBackend
+
+SIMULATED_FIRMWARE_VERSION = "v1.0.99-sim"
+
+# output report id -> structure, block index is always the second byte
+output_reports = {
+    HID_REPORT_ID_SET_EFFECT: FFBReport_SetEffect,
+    HID_REPORT_ID_SET_ENVELOPE: FFBReport_SetEnvelope,
+    HID_REPORT_ID_SET_CONDITION: FFBReport_SetCondition,
+    HID_REPORT_ID_SET_PERIODIC: FFBReport_SetPeriodic,
+    HID_REPORT_ID_SET_CONSTANT_FORCE: FFBReport_SetConstantForce,
+    HID_REPORT_ID_EFFECT_OPERATION: FFBReport_EffectOperation,
+    HID_REPORT_ID_BLOCK_FREE: FFBReport_BlockFree,
+}
+
+_block_load = struct.Struct("<BBBH")  # reportId, effectBlockIndex, loadStatus, ramPoolAvailable
+
+
+class SimEffect:
+    """State of one allocated effect block"""
+
+    def __init__(self, block, effect_type):
+        self.block = block
+        self.type = effect_type
+        self.effect: FFBReport_SetEffect = None
+        self.envelope: FFBReport_SetEnvelope = None
+        self.periodic: FFBReport_SetPeriodic = None
+        self.constant: FFBReport_SetConstantForce = None
+        self.conditions: Dict[int, FFBReport_SetCondition] = {}
+        self.playing = False
+        self.started_at = 0.0
+        self.updates = 0
+
+    def __repr__(self):
+        return f"SimEffect({self.block}, {effect_names.get(self.type)}, playing={self.playing})"
+
+
+class StickModel:
+    """
+    Simple 2 axis stick: a mass with some mechanical damping driven by the sum of the active effects.
+    Positions and forces are normalized to [-1..1].
+    """
+
+    def __init__(self, mass=0.02, damping=0.05, max_force=1.0):
+        self.mass = mass
+        self.damping = damping
+        self.max_force = max_force
+        self.pos = [0.0, 0.0]
+        self.vel = [0.0, 0.0]
+        self.force = [0.0, 0.0]
+
+    def step(self, dt, effects: List[SimEffect], t, device_gain=1.0):
+        fx = fy = 0.0
+        for e in effects:
+            if not e.playing:
+                continue
+            gain = (e.effect.gain / 4096.0) if e.effect else 1.0
+            if e.type == EFFECT_CONSTANT and e.constant:
+                fx_, fy_ = self._directional(e, e.constant.magnitude / 4096.0)
+            elif e.type in PERIODIC_EFFECTS and e.periodic:
+                fx_, fy_ = self._directional(e, self._waveform(e, t) * e.periodic.magnitude / 4096.0)
+            else:
+                fx_, fy_ = self._condition(e, 0), self._condition(e, 1)
+            fx += fx_ * gain
+            fy += fy_ * gain
+
+        for axis, f in enumerate((fx, fy)):
+            f = max(-self.max_force, min(self.max_force, f * device_gain))
+            self.force[axis] = f
+            acc = (f - self.damping * self.vel[axis]) / self.mass
+            self.vel[axis] += acc * dt
+            pos = self.pos[axis] + self.vel[axis] * dt
+            if abs(pos) >= 1.0:
+                pos = math.copysign(1.0, pos)
+                self.vel[axis] = 0.0
+            self.pos[axis] = pos
+
+    @staticmethod
+    def _directional(e: SimEffect, magnitude):
+        # direction 0 pushes the Y axis, 90 degrees the X axis (pedals)
+        direction = (e.effect.directionX if e.effect else 0) * 2 * math.pi / 255
+        return magnitude * math.sin(direction), magnitude * math.cos(direction)
+
+    @staticmethod
+    def _waveform(e: SimEffect, t):
+        period = e.periodic.period / 1000.0
+        if period <= 0:
+            return 0.0
+        phase = ((t - e.started_at) / period + e.periodic.phase / 255.0) % 1.0
+        if e.type == EFFECT_SQUARE:
+            return 1.0 if phase < 0.5 else -1.0
+        if e.type == EFFECT_TRIANGLE:
+            return 4 * phase - 1 if phase < 0.5 else 3 - 4 * phase
+        if e.type == EFFECT_SAWTOOTHUP:
+            return 2 * phase - 1
+        if e.type == EFFECT_SAWTOOTHDOWN:
+            return 1 - 2 * phase
+        return math.sin(2 * math.pi * phase)
+
+    def _condition(self, e: SimEffect, axis):
+        cond = e.conditions.get(axis)
+        if cond is None:
+            return 0.0
+        if e.type in (EFFECT_SPRING, EFFECT_SPRING_ADJUSTER):
+            x = self.pos[axis] - cond.cpOffset / 4096.0
+        elif e.type == EFFECT_DAMPER:
+            x = self.vel[axis] * 0.1
+        elif e.type == EFFECT_FRICTION:
+            x = math.copysign(0.05, self.vel[axis]) if self.vel[axis] else 0.0
+        elif e.type == EFFECT_INERTIA:
+            x = self.vel[axis] * 0.01
+        else:
+            return 0.0
+        deadband = cond.deadBand / 4096.0
+        if abs(x) <= deadband:
+            return 0.0
+        coef = cond.positiveCoefficient if x > 0 else cond.negativeCoefficient
+        return -coef / 4096.0 * (x - math.copysign(deadband, x))
+
+
+class SimulatedRhino:
+    """
+    hid.Device compatible simulated Rhino
+
+    :param pool_size: number of effect blocks, create_effect fails with LOAD_FULL once exhausted
+    :param input_interval: seconds between generated input reports (the real device reports at 1kHz)
+    :param dynamics: integrate a StickModel and report its position, otherwise the stick stays centered
+    """
+
+    def __init__(self, info: dict, pool_size=40, input_interval=0.001, dynamics=False):
+        self.info = info
+        self.pool_size = pool_size
+        self.input_interval = input_interval
+        self.model = StickModel() if dynamics else None
+        self.nonblocking = 0
+
+        self.effects: Dict[int, SimEffect] = {}
+        self._free_blocks = deque(range(1, pool_size + 1))
+        self._block_load = _block_load.pack(HID_REPORT_ID_PID_BLOCK_LOAD, 0, LOAD_FULL, 0)
+        self.gains = {i: 100 for i in range(1, 8)}
+        self.device_gain = 255
+        self.actuators_enabled = True
+        self.paused = False
+
+        self.axes = [0, 0]
+        self.buttons = 0
+        self.hats = 0xFFFF
+
+        self._lock = threading.Lock()
+        self._reports = deque(maxlen=256)
+        self._last_input = time.perf_counter() - input_interval  # first read returns an input report
+        self._closed = False
+
+        # statistics
+        self.writes = 0
+        self.bytes_written = 0
+        self.feature_reports = 0
+        self.report_counts: Dict[int, int] = {}
+        self.pool_full_events = 0
+        self.effects_created = 0
+        self.max_blocks_used = 0
+        self.errors = 0
+
+    # hid.Device interface
+
+    @property
+    def manufacturer(self):
+        return self.info["manufacturer_string"]
+
+    @property
+    def product(self):
+        return self.info["product_string"]
+
+    @property
+    def serial(self):
+        return self.info["serial_number"]
+
+    def close(self):
+        self._closed = True
+
+    def write(self, data):
+        self._check_open()
+        data = bytes(data)
+        report_id = data[0]
+        with self._lock:
+            self.writes += 1
+            self.bytes_written += len(data)
+            self.report_counts[report_id] = self.report_counts.get(report_id, 0) + 1
+
+            if report_id == HID_REPORT_ID_DEVICE_CONTROL:
+                self._device_control(data[1])
+            elif report_id == HID_REPORT_ID_DEVICE_GAIN:
+                self.device_gain = data[1]
+            elif report_id in output_reports:
+                cls = output_reports[report_id]
+                if len(data) < ctypes.sizeof(cls):
+                    self._error(f"short {cls.__name__} report ({len(data)} bytes)")
+                else:
+                    self._effect_report(cls.from_buffer_copy(data))
+            else:
+                self._error(f"unknown output report {report_id}")
+        return len(data)
+
+    def read(self, size, timeout=None):
+        self._check_open()
+        report = self._next_report()
+        if report is None and timeout:
+            wait = self.input_interval - (time.perf_counter() - self._last_input)
+            if timeout > 0:
+                wait = min(wait, timeout / 1000.0)
+            if wait > 0:
+                time.sleep(wait)
+            report = self._next_report()
+        return report[:size] if report else b""
+
+    def send_feature_report(self, data):
+        self._check_open()
+        data = bytes(data)
+        with self._lock:
+            self.feature_reports += 1
+            if data[0] == HID_REPORT_ID_CREATE_EFFECT:
+                self._create_effect(data[1])
+            elif data[0] == HID_REPORT_FEATURE_ID_SET_GAIN:
+                report = FFBReport_Set_Gain_Feature_Data_t.from_buffer_copy(data)
+                self.gains[report.gain_id] = report.gain_value
+            else:
+                self._error(f"unknown feature report {data[0]}")
+        return len(data)
+
+    def get_feature_report(self, report_id, size):
+        self._check_open()
+        with self._lock:
+            self.feature_reports += 1
+            if report_id == HID_REPORT_ID_PID_BLOCK_LOAD:
+                return self._block_load[:size]
+            if report_id == HID_REPORT_FEATURE_ID_GET_GAINS:
+                g = self.gains
+                report = FFBReport_Get_Gains_Feature_Data(reportId=report_id, master_gain=g[1], periodic_gain=g[2],
+                                                          spring_gain=g[3], damper_gain=g[4], inertia_gain=g[5],
+                                                          friction_gain=g[6], constant_gain=g[7])
+                return bytes(report)[:size]
+            self._error(f"unknown feature report {report_id}")
+            return b""
+
+    # simulation control
+
+    def set_axes(self, x, y):
+        """Sets the stick position in [-1..1] (ignored while the stick model is active)"""
+        self.axes = [round(x * 4096), round(y * 4096)]
+
+    def set_buttons(self, mask, hats=0xFFFF):
+        """Sets the pressed buttons (bit 0 = button 1) and hat state, reported with the next input report"""
+        self.buttons = mask
+        self.hats = hats
+
+    @property
+    def blocks_used(self):
+        return self.pool_size - len(self._free_blocks)
+
+    def playing_effects(self) -> List[SimEffect]:
+        with self._lock:
+            return [e for e in self.effects.values() if e.playing]
+
+    def stats(self) -> dict:
+        return {
+            "writes": self.writes,
+            "bytes_written": self.bytes_written,
+            "feature_reports": self.feature_reports,
+            "effects_created": self.effects_created,
+            "blocks_used": self.blocks_used,
+            "max_blocks_used": self.max_blocks_used,
+            "pool_full_events": self.pool_full_events,
+            "errors": self.errors,
+        }
+
+    # internals
+
+    def _check_open(self):
+        if self._closed:
+            raise IOError("device closed")
+
+    def _error(self, msg):
+        self.errors += 1
+        logging.debug(f"SimulatedRhino: {msg}")
+
+    def _create_effect(self, effect_type):
+        if not self._free_blocks:
+            self.pool_full_events += 1
+            self._block_load = _block_load.pack(HID_REPORT_ID_PID_BLOCK_LOAD, 0, LOAD_FULL, 0)
+            return
+        block = self._free_blocks.popleft()
+        self.effects[block] = SimEffect(block, effect_type)
+        self.effects_created += 1
+        self.max_blocks_used = max(self.max_blocks_used, self.blocks_used)
+        self._block_load = _block_load.pack(HID_REPORT_ID_PID_BLOCK_LOAD, block, LOAD_SUCCESS, len(self._free_blocks))
+
+    def _free_block(self, block):
+        if self.effects.pop(block, None) is not None:
+            self._free_blocks.append(block)
+
+    def _effect_report(self, report):
+        e = self.effects.get(report.effectBlockIndex)
+        if e is None:
+            self._error(f"{type(report).__name__} for unallocated block {report.effectBlockIndex}")
+            return
+        e.updates += 1
+        if isinstance(report, FFBReport_SetEffect):
+            e.effect = report
+        elif isinstance(report, FFBReport_SetEnvelope):
+            e.envelope = report
+        elif isinstance(report, FFBReport_SetCondition):
+            e.conditions[report.parameterBlockOffset] = report
+        elif isinstance(report, FFBReport_SetPeriodic):
+            e.periodic = report
+        elif isinstance(report, FFBReport_SetConstantForce):
+            e.constant = report
+        elif isinstance(report, FFBReport_BlockFree):
+            self._free_block(e.block)
+        elif isinstance(report, FFBReport_EffectOperation):
+            if report.operation == OP_STOP:
+                e.playing = False
+                self._queue_pid_state(effect_playing=0, block=e.block)
+            else:
+                if report.operation == OP_START_SOLO:
+                    for other in self.effects.values():
+                        other.playing = False
+                e.playing = True
+                e.started_at = time.perf_counter()
+
+    def _device_control(self, control):
+        if control == CONTROL_RESET:
+            self.effects.clear()
+            self._free_blocks = deque(range(1, self.pool_size + 1))
+            self._queue_pid_state(reset=1)
+        elif control == CONTROL_STOP_ALL_EFFECTS:
+            for e in self.effects.values():
+                e.playing = False
+        elif control == CONTROL_DISABLE_ACTUATORS:
+            self.actuators_enabled = False
+        elif control == CONTROL_ENABLE_ACTUATORS:
+            self.actuators_enabled = True
+        elif control == CONTROL_PAUSE:
+            self.paused = True
+        elif control == CONTROL_CONTINUE:
+            self.paused = False
+        else:
+            self._error(f"unknown device control {control}")
+
+    def _queue_pid_state(self, effect_playing=0, block=0, reset=0):
+        report = FFBReport_PIDStatus_Input(reportId=HID_REPORT_ID_PID_STATE_REPORT, devicePaused=int(self.paused),
+                                           actuatorsEnabled=int(self.actuators_enabled), actuatorPower=1,
+                                           deviceResetEvent=reset, effectPlaying=effect_playing,
+                                           effectBlockIndex=block)
+        self._reports.append(bytes(report))
+
+    def _next_report(self):
+        with self._lock:
+            now = time.perf_counter()
+            if not self._reports and now - self._last_input >= self.input_interval:
+                self._reports.append(self._input_report(now))
+            return self._reports.popleft() if self._reports else None
+
+    def _input_report(self, now):
+        dt = min(now - self._last_input, 0.05)
+        self._last_input = now
+        if self.model is not None:
+            effects = self.effects.values() if self.actuators_enabled and not self.paused else ()
+            self.model.step(dt, effects, now, self.device_gain / 255.0)
+            self.axes = [round(p * 4096) for p in self.model.pos]
+
+        report = FFBReport_Input(reportId=HID_REPORT_ID_INPUT, X=self.axes[0], Y=self.axes[1],
+                                 Button0_31=self.buttons & 0xFFFFFFFF, Button32_47=(self.buttons >> 32) & 0xFFFF,
+                                 Button48_63=(self.buttons >> 48) & 0xFFFF, hats=self.hats,
+                                 CP_offsetX=0xFFFF >> 1, CP_offsetY=0xFFFF >> 1)
+        return bytes(report)
+
+
+class SimulatedRhinoBackend(HIDBackend):
+    """
+    HID backend exposing simulated Rhino devices.  Any requested product id is "present", so the
+    backend works with whatever device PID is configured.
+
+    :param device_options: keyword arguments passed to every SimulatedRhino
+    """
+    name = "simulated"
+
+    def __init__(self, product_string="Rhino FFB Joystick", **device_options):
+        self.product_string = product_string
+        self.device_options = device_options
+        self.devices: Dict[bytes, SimulatedRhino] = {}
+
+    def _info(self, vid, pid) -> dict:
+        return {
+            'interface_number': 0,
+            'manufacturer_string': 'VPforce',
+            'path': f"sim:{vid:04X}:{pid:04X}".encode(),
+            'product_id': pid,
+            'product_string': self.product_string,
+            'release_number': 0,
+            'serial_number': f"SIM{pid:04X}",
+            'usage': 4,
+            'usage_page': 1,
+            'vendor_id': vid,
+        }
+
+    def enumerate(self, vid, pid) -> List[dict]:
+        return [self._info(vid or 0xFFFF, pid or 0x2055)]
+
+    def open(self, path) -> SimulatedRhino:
+        device = self.devices.get(path)
+        if device is None:
+            _, vid, pid = path.decode().split(":")
+            device = SimulatedRhino(self._info(int(vid, 16), int(pid, 16)), **self.device_options)
+            self.devices[path] = device
+        # reopening keeps the device state, like reconnecting to a real device
+        device._closed = False
+        return device
+
+    def get_firmware_version(self, vid, pid) -> str:
+        return SIMULATED_FIRMWARE_VERSION
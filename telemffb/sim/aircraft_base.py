@@ -29,6 +29,10 @@ from telemffb.hw.ffb_rhino import EFFECT_TRIANGLE, HapticEffect, FFBReport_SetCo
 from telemffb.hw.ffb_rhino import EFFECT_SPRING,EFFECT_DAMPER, EFFECT_INERTIA, EFFECT_FRICTION, EFFECT_SPRING_ADJUSTER
 import telemffb.globals as G
 from telemffb.globals import master_instance, master_buttons
+from telemffb.sim.change_tracker import ChangeTracker
+from telemffb.sim.effect_graph import EffectGraph
+from telemffb.sim.filter_bank import FilterBank
+from telemffb.sim.frame_context import FrameContext
 
 # by accessing effects dict directly new effects will be automatically allocated
 # example: effects["myUniqueName"]
@@ -275,16 +279,22 @@ class AircraftBase(object):
     _ipc_telem = {}
     stepper_dict = {}
 
+    # effect updaters run by effect_graph, see telemffb.sim.effect_graph
+    effect_nodes = ()
+
     @property
     def telem_data(self):
         return self._telem_data
 
     def __init__(self, name: str, **kwargs):
         self._name = name
-        self._changes = {}
+        self.changes = ChangeTracker()     # state of has_changed/anything_has_changed, begin_frame() by TelemManager
         self._change_counter = {}
         self._telem_data = {}
         self._last_telem_data = {}
+        self.frame = FrameContext(self._telem_data)     # derived values of the current frame, reset by TelemManager
+        self.effect_graph = EffectGraph(self.effect_nodes, effects)
+        self.filters = FilterBank()     # filters clocked per frame, begin_frame() by TelemManager
         self._ipc_telem = {}
         self.hydraulic_factor = 0.000
         #clear any existing effects
@@ -363,28 +373,14 @@ class AircraftBase(object):
                 continue
             logging.info(f"set {k} = {v}")
             setattr(self, k, v)
+        self.effect_graph.invalidate()
 
     def has_changed(self, item: str, delta_ms=0, data=None) -> bool:
-        if data == None:
+        """track if telemetry key "item" of data (the current frame by default) has changed between two consecutive
+        calls of the function.  delta_ms works as in anything_has_changed"""
+        if data is None:
             data = self._telem_data
-
-        prev_val, tm = self._changes.get(item, (None, 0))
-        new_val = data.get(item)
-
-        # round floating point numbers
-        if type(new_val) == float:
-            new_val = round(new_val, 3)
-
-        if prev_val != new_val:
-            self._changes[item] = (new_val, time.perf_counter())
-
-        if prev_val != new_val and prev_val is not None and new_val is not None:
-            return (prev_val, new_val)
-
-        if time.perf_counter() - tm < delta_ms / 1000.0:
-            return True
-
-        return False
+        return self.changes.changed(item, data.get(item), delta_ms)
 
     def flag_error(self, message):
         dev = self.telem_data.get('FFBType', 'joystick').capitalize()
@@ -393,59 +389,32 @@ class AircraftBase(object):
             self._ipc_telem['error'] = f"{dev}: {message}"
 
     def is_joystick(self):
-        return self._telem_data.get("FFBType", "joystick") == "joystick"
+        return self.frame.is_joystick
     
     def is_pedals(self):
-        return self._telem_data.get("FFBType") == "pedals"
+        return self.frame.is_pedals
 
     def is_collective(self):
-        return self._telem_data.get("FFBType") == "collective"
+        return self.frame.is_collective
 
 
     def anything_has_changed(self, item: str, value, delta_ms=0):
         """track if any parameter, given as key "item" has changed between two consecutive calls of the function
         delta_ms can be used to smooth the effects of telemetry which does not update regularly but is still "moving"
         a positive delta_ms value will allow the data to remain unchanged for that period of time before returning false"""
-
-        prev_val, tm, changed_yet = self._changes.get(item, (None, 0, 0))
-        new_val = value
-        new_tm = time.perf_counter()
-        # round floating point numbers
-        if type(new_val) == float:
-            new_val = round(new_val, 3)
-
-        # make sure we do not return true until the key has changed at least once (after init)
-        if prev_val == None and not changed_yet:
-            self._changes[item] = (new_val, tm, 0)
-            prev_val = new_val
-
-        # logging.debug(f"Prev: {prev_val}, New: {new_val}, TM: {tm}")
-
-        if prev_val != new_val:
-            self._changes[item] = (new_val, new_tm, 1)
-
-        if prev_val != new_val and prev_val is not None and new_val is not None:
-            return (prev_val, new_val, new_tm - tm)
-
-        if time.perf_counter() - tm < delta_ms / 1000.0:
-            return True
-
-        return False
+        return self.changes.check(item, value, delta_ms)
     
     def _sim_is_msfs(self, *unused):
-        if self._telem_data.get("src") == "MSFS":
+        if self.frame.is_msfs:
             return 1
         else:
             return 0
 
     def _sim_is_xplane(self):
-        if self._telem_data.get('src') == "XPLANE":
-            return True
-        else:
-            return False
+        return self.frame.is_xplane
 
     def _sim_is_dcs(self, *unused):
-        if self._telem_data.get("src") == "DCS":
+        if self.frame.is_dcs:
             return 1
         else:
             return 0
@@ -502,8 +471,8 @@ class AircraftBase(object):
         WoW = telem_data.get("WeightOnWheels", (0, 0, 0))  # left, nose, right - wheels
         # get high pass filters for wheel shock displacement data and update with latest data
         hp_f_cutoff_hz = 3
-        v1 = HPFs.get("center_wheel", hp_f_cutoff_hz).update((WoW[1])) * self.runway_rumble_intensity
-        v2 = HPFs.get("side_wheels", hp_f_cutoff_hz).update(WoW[0] - WoW[2]) * self.runway_rumble_intensity
+        v1 = self.filters.highpass("center_wheel", hp_f_cutoff_hz).update((WoW[1])) * self.runway_rumble_intensity
+        v2 = self.filters.highpass("side_wheels", hp_f_cutoff_hz).update(WoW[0] - WoW[2]) * self.runway_rumble_intensity
 
         v1 = utils.clamp_minmax(v1, 0.5)
         v2 = utils.clamp_minmax(v2, 0.5)
@@ -525,7 +494,7 @@ class AircraftBase(object):
         if not self.is_joystick() or not self.new_gforce_effect_enable:
             effects.dispose("new_gforce")
             return
-        if sum(telem_data.get("WeightOnWheels")):
+        if self.frame.wow_sum:
             effects.dispose("new_gforce")
             return
         if not telem_data.get("TAS", 0):
@@ -565,9 +534,7 @@ class AircraftBase(object):
         derivative_hz = 5  # derivative lpf filter -3db Hz
         derivative_k = 0.1  # derivative gain value, or damping ratio
 
-        dGs = getattr(self, "_dGs", None)
-        if not dGs: dGs = self._dGs = utils.Derivative(derivative_hz)
-        dGs.lpf.cutoff_freq_hz = derivative_hz
+        dGs = self.filters.derivative("gforce", derivative_hz)
 
         if gs > 1 and y > (spring_y_center + self.new_gforce_effect_center_deadzone):
             direction = 180
@@ -614,7 +581,7 @@ class AircraftBase(object):
             effects.dispose("gforce")
             return
 
-        if sum(telem_data.get("WeightOnWheels")):
+        if self.frame.wow_sum:
             effects.dispose("gforce")
             return
         if not telem_data.get("TAS", 0):
@@ -650,9 +617,7 @@ class AircraftBase(object):
         derivative_hz = 5 # derivative lpf filter -3db Hz
         derivative_k = 0.1 # derivative gain value, or damping ratio
 
-        dGs = getattr(self, "_dGs", None)
-        if not dGs: dGs = self._dGs = utils.Derivative(derivative_hz)
-        dGs.lpf.cutoff_freq_hz = derivative_hz
+        dGs = self.filters.derivative("gforce", derivative_hz)
 
         g_deriv = - dGs.update(g_factor) * derivative_k
 
@@ -676,7 +641,7 @@ class AircraftBase(object):
             return
         if not self.is_joystick():
             return
-        if sum(telem_data.get("WeightOnWheels")):
+        if self.frame.wow_sum:
             effects.dispose("crit_aoa")
             return
         if not telem_data.get("TAS", 0):
@@ -718,7 +683,7 @@ class AircraftBase(object):
         if abs(delta_y) > 3:  # If the per-frame rate of change is greater than 3 Gs, we have likely crashed and telemetry is violently spiking.. do not play effect:
             return
 
-        if not sum(telem_data.get("WeightOnWheels")):
+        if not self.frame.wow_sum:
             effects.dispose("decel")
             return
         if not telem_data.get("TAS", 0):
@@ -729,7 +694,7 @@ class AircraftBase(object):
 
         dir = 180 if not self.decel_invert_force else 0
 
-        wow = sum(telem_data.get("WeightOnWheels"), 0)
+        wow = self.frame.wow_sum
         if (avg_y_gs < -0.03 < 500) and wow:  # Don't play effect for very small, or very large (crash) force values, or no weight on wheels
             if abs(avg_y_gs) > max_gs:
                 avg_y_gs = -max_gs
@@ -776,9 +741,8 @@ class AircraftBase(object):
             return
         
         aoa = telem_data.get("AoA", 0)
-        tas = telem_data.get("TAS", 0)
 
-        max_airflow_speed = 75*knots  # speed at which airflow_factor is 1.0
+        # airflow_factor is 1.0 at 75kt TAS, see FrameContext.airflow_factor
 
         ds = telem_data.get("DesignSpeed", None)
         if ds:
@@ -791,7 +755,7 @@ class AircraftBase(object):
             
         local_stall_aoa = telem_data.get("StallAoA", None)
         if local_stall_aoa is not None:
-            flaps = utils.average(telem_data.get("Flaps", 0)) * 0.2 # flaps down increases stall threshold by 20%
+            flaps = self.frame.flaps_avg * 0.2 # flaps down increases stall threshold by 20%
             stall_buffet_threshold_percent = 0.5 + flaps
             local_buffet_aoa = local_stall_aoa * stall_buffet_threshold_percent
         else:
@@ -803,11 +767,11 @@ class AircraftBase(object):
             return
         if local_buffet_aoa == 0 or local_stall_aoa == 0:
             return
-        if max(telem_data.get('WeightOnWheels', 0)):
+        if self.frame.wow_max:
             effects.dispose("buffeting")
             return
 
-        airflow_factor = utils.scale_clamp(tas, (0, max_airflow_speed), (0, 1.0))
+        airflow_factor = self.frame.airflow_factor
         buffeting_factor = utils.scale_clamp(aoa, (local_buffet_aoa, local_stall_aoa), (0.0, 1.0))
         # todo calc frequency
         freq = self.aoa_buffet_freq
@@ -1102,8 +1066,8 @@ class AircraftBase(object):
         wind = telem_data.get("Wind", (0, 0, 0))
         wnd = math.sqrt(wind[0] ** 2 + wind[1] ** 2 + wind[2] ** 2)
 
-        v = HPFs.get("wnd", 3).update(wnd)
-        v = LPFs.get("wnd", 15).update(v)
+        v = self.filters.highpass("wind_hp", 3).update(wnd)
+        v = self.filters.lowpass("wind_lp", 15).update(v)
         v = utils.clamp(v, 0, self.wind_effect_max_intensity)
         v = utils.clamp(v*self.wind_effect_scaling, 0.0,1.0)
         if v == 0:
@@ -1181,6 +1145,11 @@ class AircraftBase(object):
 
         return True
 
+    def _update_ffb_overrides(self, telem_data):
+        """Damper/inertia/friction overrides, scaled down by the hydraulic loss effect while it is active"""
+        if not self._update_hydraulic_loss_effect(telem_data):
+            self._update_ffb_forces(telem_data)
+
     def _update_ffb_forces(self, telem_data):
 
         if self.enable_damper_ovd:
@@ -1421,7 +1390,7 @@ class AircraftBase(object):
         #  rotor = 245
         mod = telem_data.get("N")
         tas = telem_data.get("TAS", 0)
-        WoW = sum(telem_data.get("WeightOnWheels"))
+        WoW = self.frame.wow_sum
         if mod == "UH-60L":
             # UH60 always shows positive value for tailwheel
             WoW = telem_data.get("WeightOnWheels")[0] + telem_data.get("WeightOnWheels")[2]
@@ -1767,6 +1736,8 @@ class AircraftBase(object):
                 if effect.effect_type in [EFFECT_SPRING, EFFECT_DAMPER, EFFECT_INERTIA, EFFECT_FRICTION, EFFECT_SPRING_ADJUSTER]:
                     continue
             effect.stop()
+        # stopped effects no longer keep their nodes from being skipped, run them all on resume
+        self.effect_graph.invalidate()
 
     def on_telemetry(self, telem_data): 
         pass
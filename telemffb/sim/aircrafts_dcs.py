@@ -45,7 +45,9 @@ from telemffb import utils
 from telemffb.utils import overrides
 from telemffb.hw.ffb_rhino import (EFFECT_SINE, EFFECT_SQUARE, EFFECT_TRIANGLE, EFFECT_SAWTOOTHUP, EFFECT_SAWTOOTHDOWN, HapticEffect)
 
-from telemffb.sim.aircraft_base import AircraftBase, LPFs, effects, perftracker
+from telemffb.sim.aircraft_base import AircraftBase, effects, perftracker
+from telemffb.sim.effect_graph import EffectNode
+from telemffb.sim.frame_context import Device
 
 #unit conversions (to m/s)
 knots = 0.514444
@@ -134,6 +136,59 @@ class Aircraft(AircraftBase):
     stick_shaker_aoa = 22.3
     stick_shaker_frequency = 40
 
+    # generic effects, run in this order by on_telemetry
+    effect_nodes = (
+        # no reads: the high pass filters must see every frame
+        EffectNode("runway_rumble", "_update_runway_rumble", enabled_by=("runway_rumble_enabled",),
+                   effects=("runway0", "runway1"),
+                   devices=(Device.JOYSTICK, Device.PEDALS), skip_if=("cp_spr_override_active",)),
+        # no reads: the smoother and the per frame change must see every frame
+        EffectNode("deceleration", "_decel_effect", enabled_by=("deceleration_effect_enable",),
+                   effects=("decel",), devices=(Device.JOYSTICK,), skip_if=("cp_spr_override_active",)),
+        EffectNode("aoa_buffeting", "_update_buffeting", enabled_by=("aoa_buffeting_enabled",),
+                   reads=("AoA", "StallAoA", "DesignSpeed", "Flaps", "WeightOnWheels", "TAS"), effects=("buffeting",)),
+        EffectNode("weapons", "_update_cm_weapons",
+                   enabled_by=("weapon_release_effect_enabled", "gunfire_effect_enabled", "countermeasure_effect_enabled"),
+                   reads=("PayloadInfo", "Gun", "Flares", "Chaff"), effects=("payload_rel", "gunfire", "cm")),
+        EffectNode("ffb_overrides", "_update_ffb_overrides"),
+        EffectNode("damage", "_update_damage", enabled_by=("damage_effect_enabled",), reads=("Damage",),
+                   effects=("damage",)),
+        EffectNode("speedbrakes", "_update_speed_brakes", args=("speedbrakes_value", "TAS"),
+                   enabled_by=("speedbrake_motion_effect_enabled", "speedbrake_buffet_effect_enabled"),
+                   reads=("speedbrakes_value", "TAS"),
+                   effects=("speedbrakemovement", "speedbrakebuffet", "speedbrakebuffet2")),
+        EffectNode("landing_gear", "_update_landing_gear", args=("gear_value", "TAS"),
+                   enabled_by=("gear_motion_effect_enabled", "gear_buffet_effect_enabled"), reads=("gear_value", "TAS"),
+                   effects=("gearmovement", "gearmovement2", "gearbuffet", "gearbuffet2")),
+        EffectNode("flaps", "_update_flaps", args=("flaps_value",), enabled_by=("flaps_motion_effect_enabled",),
+                   reads=("flaps_value",), effects=("flapsmovement",)),
+        EffectNode("canopy", "_update_canopy", args=("canopy_value",), enabled_by=("canopy_motion_effect_enabled",),
+                   reads=("canopy_value",), effects=("canopymovement",)),
+        EffectNode("spoilers", "_update_spoiler", args=("Spoilers", "TAS"),
+                   enabled_by=("spoiler_motion_effect_enabled", "spoiler_buffet_effect_enabled"), reads=("Spoilers", "TAS"),
+                   effects=("spoilermovement", "spoilermovement2", "spoilerbuffet1-1", "spoilerbuffet1-2",
+                            "spoilerbuffet2-1", "spoilerbuffet2-2")),
+        EffectNode("jet_engine_rumble", "_update_jet_engine_rumble", enabled_by=("engine_jet_rumble_enabled",),
+                   effects=("je_rumble_1_1", "je_rumble_1_2", "je_rumble_2_1", "je_rumble_2_2")),
+        EffectNode("stick_position", "_update_stick_position", devices=(Device.JOYSTICK,)),
+        EffectNode("pedal_spring", "_override_pedal_spring", devices=(Device.PEDALS,)),
+        EffectNode("collective_spring", "_override_collective_spring", devices=(Device.COLLECTIVE,)),
+        EffectNode("tailhook", "_update_tailhook_effect", enabled_by=("tailhook_motion_effect_enabled",),
+                   reads=("TailHook",), effects=("hookmovement",), devices=(Device.JOYSTICK,)),
+        EffectNode("fuelboom", "_update_fuelboom_effect", enabled_by=("fuelboom_motion_effect_enabled",),
+                   reads=("FuelBoom",), effects=("boommovement",), devices=(Device.JOYSTICK,)),
+        EffectNode("wingfold", "_update_wingfold_effect", enabled_by=("wingfold_motion_effect_enabled",),
+                   reads=("WingFold", "SimOnGround"), effects=("wingfoldmovement_1", "wingfoldmovement_2"),
+                   devices=(Device.JOYSTICK,)),
+        EffectNode("touchdown", "_update_touchdown_effect", enabled_by=("touchdown_effect_enabled",),
+                   reads=("ACCs", "SimOnGround"), effects=("touchdown",), devices=(Device.JOYSTICK,)),
+        EffectNode("stick_shaker", "_update_stick_shaker", enabled_by=("enable_stick_shaker",),
+                   reads=("AoA", "SimOnGround"), effects=("stick_shaker1", "stick_shaker2"),
+                   devices=(Device.JOYSTICK, Device.PEDALS)),
+        EffectNode("spring", "override_spring", args=()),
+        EffectNode("copilot_spring", "override_copilot_spring", devices=(Device.JOYSTICK,)),
+    )
+
     ####
     ####
     def __init__(self, name : str, **kwargs):
@@ -185,35 +240,7 @@ class Aircraft(AircraftBase):
         if telem_data.get("N") == None:
             return
 
-        if not self.cp_spr_override_active:
-            self._update_runway_rumble(telem_data)
-            self._decel_effect(telem_data)
-
-        self._update_buffeting(telem_data)
-        self._update_cm_weapons(telem_data)
-        hyd_loss = self._update_hydraulic_loss_effect(telem_data)
-        if not hyd_loss: 
-            self._update_ffb_forces(telem_data)
-        self._update_damage(telem_data)
-        self._update_speed_brakes(telem_data.get("speedbrakes_value"), telem_data.get("TAS"))
-        self._update_landing_gear(telem_data.get("gear_value"), telem_data.get("TAS"))
-        self._update_flaps(telem_data.get("flaps_value"))
-        self._update_canopy(telem_data.get("canopy_value"))
-        self._update_spoiler(telem_data.get("Spoilers"), telem_data.get("TAS"))
-        self._update_jet_engine_rumble(telem_data)
-        if self.is_joystick():
-            self._update_stick_position(telem_data)
-        if self.is_pedals():
-            self._override_pedal_spring(telem_data)
-        if self.is_collective():
-            self._override_collective_spring(telem_data)
-        self._update_tailhook_effect(telem_data)
-        self._update_fuelboom_effect(telem_data)
-        self._update_wingfold_effect(telem_data)
-        self._update_touchdown_effect(telem_data)
-        self._update_stick_shaker(telem_data)
-        self.override_spring()
-        self.override_copilot_spring(telem_data)
+        self.effect_graph.run(self, telem_data)
 
     @overrides(AircraftBase)
     def on_event(self, event, *args):
@@ -327,7 +354,7 @@ class Aircraft(AircraftBase):
 
         pedal_pos = -telem_data.get('controlsurfaces_rudder_right',0)
         # trim signal needs to be slow to avoid positive feedback
-        lp_x = LPFs.get("x", 5)
+        lp_x = self.filters.lowpass("x", 5)
         # estimate trim from real stick position and virtual stick position
         offs_x = lp_x.update(pedal_pos - x - lp_x.value)
         self.spring_x.cpOffset = utils.clamp_minmax(round(offs_x * 4096), 4096)
@@ -355,8 +382,8 @@ class Aircraft(AircraftBase):
         self.spring_y.negativeCoefficient = 4096
 
         # trim signal needs to be slow to avoid positive feedback
-        lp_y = LPFs.get("y", 5)
-        lp_x = LPFs.get("x", 5)
+        lp_y = self.filters.lowpass("y", 5)
+        lp_x = self.filters.lowpass("x", 5)
 
         # estimate trim from real stick position and virtual stick position
         offs_x = lp_x.update(telem_data['StickX'] - x + lp_x.value)
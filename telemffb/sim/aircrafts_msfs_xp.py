@@ -48,6 +48,8 @@ import telemffb.utils as utils
 from telemffb.hw.ffb_rhino import (FFBReport_Input, FFBReport_SetCondition,
                                    HapticEffect)
 from telemffb.sim.aircraft_base import AircraftBase, HPFs, LPFs, effects
+from telemffb.sim.effect_graph import EffectNode
+from telemffb.sim.frame_context import Device, Sim
 from telemffb.utils import Derivative, Dispenser, HighPassFilter, clamp, overrides
 
 deg = 180 / math.pi
@@ -118,7 +120,6 @@ class Aircraft(AircraftBase):
     aileron_force_trim = 0
 
     smoother = utils.Smoother()
-    dampener = utils.Derivative()
     center_spring_on_pause = False
 
     use_legacy_bindings = False
@@ -135,6 +136,37 @@ class Aircraft(AircraftBase):
 
     vne_override: int = 0
 
+    # generic effects, run in this order by on_telemetry
+    effect_nodes = (
+        EffectNode("ffb_overrides", "_update_ffb_overrides"),
+        EffectNode("stick_shaker", "_update_stick_shaker", enabled_by=("enable_stick_shaker",), reads=("StallWarning",),
+                   effects=("stick_shaker",), sims=(Sim.MSFS,)),
+        # no reads: the high pass filters must see every frame
+        EffectNode("runway_rumble", "_update_runway_rumble", enabled_by=("runway_rumble_enabled",),
+                   effects=("runway0", "runway1"), devices=(Device.JOYSTICK, Device.PEDALS)),
+        EffectNode("aoa_buffeting", "_update_buffeting", enabled_by=("aoa_buffeting_enabled",),
+                   reads=("AoA", "StallAoA", "DesignSpeed", "Flaps", "WeightOnWheels", "TAS"), effects=("buffeting",)),
+        EffectNode("flight_controls", "_update_flight_controls"),
+        # no reads: the smoother and the per frame change must see every frame
+        EffectNode("deceleration", "_decel_effect", enabled_by=("deceleration_effect_enable",),
+                   effects=("decel",), devices=(Device.JOYSTICK,)),
+        EffectNode("touchdown", "_update_touchdown_effect", enabled_by=("touchdown_effect_enabled",),
+                   reads=("AccBody", "SimOnGround"), effects=("touchdown",), devices=(Device.JOYSTICK,)),
+        EffectNode("canopy", "_update_canopy_motion", enabled_by=("canopy_motion_effect_enabled",),
+                   reads=("CanopyPos",), effects=("canopymovement",), sims=(Sim.XPLANE,)),
+        EffectNode("flaps", "_update_flaps_motion", enabled_by=("flaps_motion_effect_enabled",), reads=("Flaps",),
+                   effects=("flapsmovement",)),
+        EffectNode("landing_gear", "_update_gear_motion",
+                   enabled_by=("gear_motion_effect_enabled", "gear_buffet_effect_enabled"),
+                   reads=("RetractableGear", "Gear", "IAS", "Vle"),
+                   effects=("gearmovement", "gearmovement2", "gearbuffet", "gearbuffet2")),
+        EffectNode("aoa_reduction", "_aoa_reduction_force_effect", enabled_by=("aoa_reduction_effect_enabled",),
+                   effects=("crit_aoa",), devices=(Device.JOYSTICK,)),
+        EffectNode("nosewheel_shimmy", "_update_nosewheel_shimmy", enabled_by=("nosewheel_shimmy",),
+                   reads=("IsTaildragger", "Brakes", "SimOnGround", "WeightOnWheels", "GroundSpeed"),
+                   effects=("nw_shimmy",), devices=(Device.PEDALS,), sims=(Sim.MSFS,)),
+    )
+
     @classmethod
     def set_simconnect(cls, sc):
         cls._simconnect = sc
@@ -152,6 +184,8 @@ class Aircraft(AircraftBase):
         self.spring_x = FFBReport_SetCondition(parameterBlockOffset=0)
         self.spring_y = FFBReport_SetCondition(parameterBlockOffset=1)
         self.const_force = HapticEffect().constant(0, 0)
+        # world to body frame rotation of the current frame (MSFS, X-Plane sends body frame velocities)
+        self.world_to_body = utils.Rotation()
 
         # aileron_max_deflection = 20.0*0.01745329
         self.elevator_max_deflection = 12.0 * 0.01745329
@@ -228,13 +262,15 @@ class Aircraft(AircraftBase):
         self.xplane_axis_override_active = False
 
     def _update_nosewheel_shimmy(self, telem_data):
+        if telem_data.get("IsTaildragger", 0):
+            return
         curve = 2.5
         # freq = 8
         freq_lo = 8
         freq_hi = 16
         brakes = telem_data.get("Brakes", (0, 0))
         on_ground = telem_data.get("SimOnGround", 0)
-        wow = sum(telem_data.get("WeightOnWheels", 0))
+        wow = self.frame.wow_sum
         if not wow or not on_ground:
             effects.dispose("nw_shimmy")
             return
@@ -281,7 +317,7 @@ class Aircraft(AircraftBase):
 
                 elev_trim = telem_data.get("ElevTrimPct", 0)
 
-                elev_trim = self.dampener.dampen_value(elev_trim, '_elev_trim', derivative_hz=5, derivative_k=0.15)
+                elev_trim = self.filters.dampen(elev_trim, '_elev_trim', derivative_hz=5, derivative_k=0.15)
 
                 # print(f"raw:{raw_elev_trim}, smooth:{elev_trim}")
                 aileron_trim = telem_data.get("AileronTrimPct", 0)
@@ -301,11 +337,11 @@ class Aircraft(AircraftBase):
                         aileron_pos = telem_data.get("AileronDeflPctLR", (0, 0))
                         elevator_pos = telem_data.get("ElevDeflPct", 0)
                         aileron_pos = aileron_pos[0]
-                        aileron_pos = self.dampener.dampen_value(aileron_pos, '_aileron_pos', derivative_hz=5, derivative_k=0.15)
+                        aileron_pos = self.filters.dampen(aileron_pos, '_aileron_pos', derivative_hz=5, derivative_k=0.15)
 
                     if self._sim_is_xplane():
                         aileron_pos = telem_data.get("APRollServo", 0)
-                        aileron_pos = self.dampener.dampen_value(aileron_pos, '_aileron_pos', derivative_hz=5, derivative_k=0.15)
+                        aileron_pos = self.filters.dampen(aileron_pos, '_aileron_pos', derivative_hz=5, derivative_k=0.15)
                         elevator_pos = telem_data.get("APPitchServo", 0)
                         phys_stick_y_offs = int(elevator_pos*4096)
 
@@ -402,7 +438,7 @@ class Aircraft(AircraftBase):
                     if self._sim_is_xplane():
                         rudder_pos = telem_data.get("APYawServo", 0)
 
-                    rudder_pos = self.dampener.dampen_value(rudder_pos, '_rudder_pos', derivative_hz=5, derivative_k=0.15)
+                    rudder_pos = self.filters.dampen(rudder_pos, '_rudder_pos', derivative_hz=5, derivative_k=0.15)
                     # derivative_hz = 5  # derivative lpf filter -3db Hz
                     # derivative_k = 0.1  # derivative gain value, or damping ratio
                     #
@@ -509,12 +545,12 @@ class Aircraft(AircraftBase):
             rudder_base_gain = self.rudder_spring_gain
             logging.debug(f"Aircraft controls are center sprung, setting x:y base gain to{ailer_base_gain}:{elev_base_gain}, rudder base gain to {rudder_base_gain}")
         
-        incidence_vec = utils.Vector(telem_data["Incidence"])
+        inc_x, inc_y, inc_z = telem_data["Incidence"]
 
         force_trim_x_offset = self.force_trim_x_offset
         force_trim_y_offset = self.force_trim_y_offset
 
-        _airspeed = incidence_vec.z
+        _airspeed = inc_z
         telem_data["TAS"] = _airspeed   # why not use simvar AIRSPEED TRUE?
         telem_data['TAS3'] = _airspeed  # what is this for?
         IAS = telem_data['IAS']
@@ -533,12 +569,12 @@ class Aircraft(AircraftBase):
 
         # print(data["ElevDefl"] / data["ElevDeflPct"] * 100)
 
-        slip_angle = atan2(incidence_vec.x, incidence_vec.z)
+        slip_angle = atan2(inc_x, inc_z)
         telem_data["SideSlip"] = slip_angle*deg # overwrite sideslip with our calculated version (including wind)
 
         g_force = telem_data["G"] # this includes earths gravity
 
-        _aoa = -atan2(incidence_vec.y, incidence_vec.z)*deg
+        _aoa = -atan2(inc_y, inc_z)*deg
         telem_data["AoA"] = _aoa
 
         # calculate air flow velocity exiting the prop
@@ -554,8 +590,8 @@ class Aircraft(AircraftBase):
 
         telem_data['_prop_thrust'] = _prop_thrust
 
-        if abs(incidence_vec.y) > 0.5 or _prop_air_vel > 1: # avoid edge cases
-            _elevator_aoa = atan2(-incidence_vec.y, _prop_air_vel) * deg
+        if abs(inc_y) > 0.5 or _prop_air_vel > 1: # avoid edge cases
+            _elevator_aoa = atan2(-inc_y, _prop_air_vel) * deg
         else:
             _elevator_aoa = 0
         telem_data["_elevator_aoa"] = _elevator_aoa
@@ -648,7 +684,7 @@ class Aircraft(AircraftBase):
         telem_data["_rud_coeff"] = rudder_coeff
         rud = (slip_angle - rudder_angle) * _dyn_pressure * _slip_gain
         rud_force = clamp((rud * self.rudder_gain), -1, 1)
-        rud_force = self.dampener.dampen_value(rud_force, '_rud_force', derivative_hz=5, derivative_k=.015)
+        rud_force = self.filters.dampen(rud_force, '_rud_force', derivative_hz=5, derivative_k=.015)
 
         if ffb_type == 'joystick':
 
@@ -662,7 +698,7 @@ class Aircraft(AircraftBase):
 
                 elev_trim = clamp(elev_trim * self.joystick_trim_follow_gain_physical_y, -1, 1)
 
-                elev_trim = self.dampener.dampen_value(elev_trim, '_elev_trim', derivative_hz=5, derivative_k=0.15)
+                elev_trim = self.filters.dampen(elev_trim, '_elev_trim', derivative_hz=5, derivative_k=0.15)
 
                 virtual_stick_y_offs = elev_trim - (elev_trim * self.joystick_trim_follow_gain_virtual_y)
                 phys_stick_y_offs = int(elev_trim * 4096)
@@ -672,7 +708,7 @@ class Aircraft(AircraftBase):
                     if self._sim_is_msfs():
                         aileron_pos = telem_data.get("AileronDeflPctLR", (0, 0))
                         aileron_pos = aileron_pos[0]
-                        aileron_pos = self.dampener.dampen_value(aileron_pos, '_aileron_pos', derivative_hz=5, derivative_k=0.15)
+                        aileron_pos = self.filters.dampen(aileron_pos, '_aileron_pos', derivative_hz=5, derivative_k=0.15)
                     if self._sim_is_xplane():
                         aileron_pos = telem_data.get("APRollServo", 0)
 
@@ -732,7 +768,7 @@ class Aircraft(AircraftBase):
                     self._simconnect.send_event_to_msfs(y_var, pos_y_pos)
 
                 #give option to disable if desired by user
-            if self.aoa_effect_enabled and telem_data.get("ElevDeflPct", 0) != 0 and not max(telem_data.get("WeightOnWheels")):
+            if self.aoa_effect_enabled and telem_data.get("ElevDeflPct", 0) != 0 and not self.frame.wow_max:
                 # calculate maximum angle based on current angle and percentage
                 tot = telem_data["ElevDefl"] / telem_data["ElevDeflPct"]
 
@@ -965,40 +1001,34 @@ class Aircraft(AircraftBase):
         super().on_telemetry(telem_data)
 
         if telem_data['src'] == "XPLANE":
-            incidence_vec = utils.Vector(telem_data["VelAcf"])
+            telem_data["Incidence"] = list(telem_data["VelAcf"])
         else:
-            incidence_vec = utils.Vector(telem_data["VelWorld"])
-            wind_vec = utils.Vector(telem_data["AmbWind"])
-            incidence_vec = incidence_vec - wind_vec
-            # Rotate the vector from world frame into body frame
-            incidence_vec = incidence_vec.rotY(-(telem_data["Heading"] * rad))
-            incidence_vec = incidence_vec.rotX(-telem_data["Pitch"] * rad)
-            incidence_vec = incidence_vec.rotZ(-telem_data["Roll"] * rad)
-
-        telem_data["Incidence"] = list(incidence_vec)
+            world_to_body = self.world_to_body
+            world_to_body.set_world_to_body(telem_data["Heading"] * rad, telem_data["Pitch"] * rad, telem_data["Roll"] * rad)
+            vx, vy, vz = telem_data["VelWorld"]
+            wx, wy, wz = telem_data["AmbWind"]
+            # relative wind rotated from world frame into body frame
+            telem_data["Incidence"] = list(world_to_body.apply(vx - wx, vy - wy, vz - wz))
 
         #
         ### Generic Aircraft Class Telemetry Handler
         if not "AircraftClass" in telem_data:
             telem_data["AircraftClass"] = "GenericAircraft"  # inject aircraft class into telemetry
 
-        hyd_loss = self._update_hydraulic_loss_effect(telem_data)
-        if not hyd_loss: self._update_ffb_forces(telem_data)
-        self._update_stick_shaker(telem_data)
-        self._update_runway_rumble(telem_data)
-        self._update_buffeting(telem_data)
-        self._update_flight_controls(telem_data)
-        self._decel_effect(telem_data)
-        self._update_touchdown_effect(telem_data)
-        if self._sim_is_xplane():
-            self._update_canopy(telem_data.get("CanopyPos", 0))
-        #
+        self.effect_graph.run(self, telem_data)
+
+    def _update_canopy_motion(self, telem_data):
+        self._update_canopy(telem_data.get("CanopyPos", 0))
+
+    def _update_flaps_motion(self, telem_data):
         if self.flaps_motion_intensity > 0:
             flps = telem_data.get("Flaps", 0)
             if isinstance(flps, list):
                 flps = max(flps)
 
             self._update_flaps(flps)
+
+    def _update_gear_motion(self, telem_data):
         retracts = telem_data.get("RetractableGear", 0)
         if isinstance(retracts, list):
             retracts = max(retracts)
@@ -1006,11 +1036,6 @@ class Aircraft(AircraftBase):
             gear = max(telem_data.get("Gear", 0))
             self._update_landing_gear(gear, telem_data.get("IAS"))
 
-        self._aoa_reduction_force_effect(telem_data)
-        if self._sim_is_msfs():
-            if self.nosewheel_shimmy and telem_data.get("FFBType") == "pedals" and not telem_data.get("IsTaildragger", 0):
-                self._update_nosewheel_shimmy(telem_data)
-
     def on_timeout(self):
         if not effects["pause_spring"].started:
             super().on_timeout()
@@ -1019,6 +1044,8 @@ class Aircraft(AircraftBase):
 
         self.const_force.stop()
         self._spring_handle.stop()
+        # super() is skipped while the pause spring is on, the stops above still have to rerun their nodes
+        self.effect_graph.invalidate()
         if self.center_spring_on_pause:
             self.spring_x.negativeCoefficient = self.spring_x.positiveCoefficient = 4096
             self.spring_y.negativeCoefficient = self.spring_y.positiveCoefficient = 4096
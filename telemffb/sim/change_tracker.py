@@ -0,0 +1,120 @@
+#
+# This file is part of the TelemFFB distribution (https://github.com/walmis/TelemFFB).
+# Copyright (c) 2023 Valmantas Palikša.
+# Copyright (c) 2023 Micah Frisby
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+Change tracking behind ``AircraftBase.anything_has_changed`` and ``has_changed``.
+
+Every tracked item gets one slot that is updated in place.  All checks of a frame use the timestamp taken
+by ``begin_frame()``, floats are compared with an absolute epsilon.
+"""
+
+import time
+from typing import Dict
+
+perf_counter = time.perf_counter
+
+DEFAULT_EPSILON = 0.0005    # same resolution as the former round(value, 3) comparison
+
+
+class _Slot:
+    __slots__ = ("value", "time", "changed_yet", "epsilon")
+
+    def __init__(self, value, epsilon):
+        self.value = value
+        self.time = 0.0             # time of the last change, 0 until the first one
+        self.changed_yet = False
+        self.epsilon = epsilon
+
+
+class ChangeTracker:
+    def __init__(self, epsilon=DEFAULT_EPSILON):
+        self.epsilon = epsilon
+        self.now = perf_counter()
+        self._slots: Dict[str, _Slot] = {}
+        self._keys: Dict[str, _Slot] = {}      # telemetry keys of changed()
+
+    def begin_frame(self, now=None):
+        """
+        Takes the timestamp used by all checks until the next frame
+
+        :param now: timestamp in seconds, perf_counter() by default
+        """
+        self.now = perf_counter() if now is None else now
+
+    def check(self, item: str, value, delta_ms=0, epsilon=None):
+        """
+        Compares value with the value of the previous check of item
+
+        :param delta_ms: hold time, keeps returning True for this long after the last change
+        :param epsilon: float tolerance of a new item, the tracker default when None
+        :return: (previous, new, seconds since the change before) when changed, else whether a change happened
+                 within delta_ms.  None is ignored until item has changed at least once.
+        """
+        slot = self._slots.get(item)
+        if slot is None:
+            slot = self._slots[item] = _Slot(value, self.epsilon if epsilon is None else epsilon)
+            prev = value
+        else:
+            prev = slot.value
+            if prev is None and not slot.changed_yet:
+                slot.value = prev = value
+
+        now = self.now
+        tm = slot.time
+        if value is not prev and _differs(prev, value, slot.epsilon):
+            slot.value = value
+            slot.time = now
+            slot.changed_yet = True
+            if prev is not None and value is not None:
+                return (prev, value, now - tm)
+
+        return now - tm < delta_ms / 1000.0
+
+    def changed(self, key: str, value, delta_ms=0):
+        """
+        Compares the value of telemetry key with the value of the previous call for key, unlike check() the
+        first value counts as a change from None
+
+        :return: (previous, new) when changed, else whether a change happened within delta_ms
+        """
+        slot = self._keys.get(key)
+        if slot is None:
+            slot = self._keys[key] = _Slot(None, self.epsilon)
+        prev = slot.value
+        now = self.now
+        tm = slot.time
+        if value is not prev and _differs(prev, value, slot.epsilon):
+            slot.value = value
+            slot.time = now
+            if prev is not None and value is not None:
+                return (prev, value)
+
+        return now - tm < delta_ms / 1000.0
+
+    def clear(self):
+        self._slots.clear()
+        self._keys.clear()
+
+
+def _differs(a, b, epsilon) -> bool:
+    if type(a) is float or type(b) is float:
+        try:
+            return not abs(a - b) <= epsilon
+        except TypeError:
+            return True
+    return a != b
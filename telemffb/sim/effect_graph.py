@@ -0,0 +1,150 @@
+#
+# This file is part of the TelemFFB distribution (https://github.com/walmis/TelemFFB).
+# Copyright (c) 2023 Valmantas Palikša.
+# Copyright (c) 2023 Micah Frisby
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+Declarative effect graph.
+
+Aircraft classes declare their effect updaters as a tuple of ``EffectNode`` in ``effect_nodes``, every
+aircraft instance runs them through its own ``EffectGraph`` in declaration order.  A node is
+
+* not called at all on devices and sims it does not apply to,
+* not called while none of its enabling settings is set, its effects are disposed once when it gets disabled,
+* skipped while the telemetry it reads is unchanged since its last call and none of its effects is playing.
+
+Nodes without ``reads`` run every frame, use that for updaters with internal state that must see every
+frame (filters, moving averages, time modulated effects).  ``invalidate()`` makes all nodes run on the next
+frame and logs the inventory of running and disabled effects, it is called whenever settings are applied.
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+from telemffb.sim.frame_context import Device, Sim
+
+_unset = object()
+
+
+@dataclass(frozen=True)
+class EffectNode:
+    """
+    :param name: name of the effect in the inventory
+    :param method: aircraft method name, looked up on every call so subclass overrides and the profiler apply
+    :param args: telemetry keys passed as positional arguments, the telemetry dict is passed when None
+    :param enabled_by: settings of which at least one must be truthy for the node to run
+    :param reads: telemetry keys the method depends on, None to run every frame
+    :param effects: names of the effects played by the method
+    :param devices: device types the node applies to, all when empty
+    :param sims: sims the node applies to, all when empty
+    :param skip_if: aircraft attributes which skip the node while truthy, nothing is disposed
+    """
+    name: str
+    method: str
+    args: Optional[Tuple[str, ...]] = None
+    enabled_by: Tuple[str, ...] = ()
+    reads: Optional[Tuple[str, ...]] = None
+    effects: Tuple[str, ...] = ()
+    devices: Tuple[Device, ...] = ()
+    sims: Tuple[Sim, ...] = ()
+    skip_if: Tuple[str, ...] = ()
+
+
+class EffectGraph:
+    def __init__(self, nodes, effects):
+        """
+        :param nodes: EffectNode declarations, run in this order
+        :param effects: effect dispenser the node effects are allocated from
+        """
+        self.nodes: Tuple[EffectNode, ...] = tuple(nodes)
+        self._effects = effects
+        count = len(self.nodes)
+        self._inputs = [_unset] * count     # telemetry read by the last call of each node
+        self._enabled = [False] * count
+        self.calls = [0] * count
+        self.skips = [0] * count
+        self._log_pending = False
+
+    def invalidate(self):
+        self._inputs = [_unset] * len(self.nodes)
+        self._log_pending = True
+
+    def _playing(self, names) -> bool:
+        allocated = self._effects.dict
+        for name in names:
+            effect = allocated.get(name)
+            if effect is not None and effect.started:
+                return True
+        return False
+
+    def run(self, aircraft, telem_data: dict):
+        frame = aircraft.frame
+        if self._log_pending:
+            self._log_pending = False
+            self.log_inventory(aircraft)
+        inputs = self._inputs
+        enabled = self._enabled
+        for i, node in enumerate(self.nodes):
+            if node.devices and frame.device not in node.devices:
+                continue
+            if node.sims and frame.sim not in node.sims:
+                continue
+            if node.skip_if and any(getattr(aircraft, attr) for attr in node.skip_if):
+                continue
+
+            if node.enabled_by and not any(getattr(aircraft, attr) for attr in node.enabled_by):
+                if enabled[i]:
+                    enabled[i] = False
+                    inputs[i] = _unset
+                    for name in node.effects:
+                        self._effects.dispose(name)
+                continue
+            enabled[i] = True
+
+            if node.reads is not None:
+                values = tuple([telem_data.get(key) for key in node.reads])
+                if values == inputs[i] and not self._playing(node.effects):
+                    self.skips[i] += 1
+                    continue
+                inputs[i] = values
+
+            self.calls[i] += 1
+            method = getattr(aircraft, node.method)
+            if node.args is None:
+                method(telem_data)
+            else:
+                method(*[telem_data.get(key) for key in node.args])
+
+    def inventory(self, aircraft) -> List[dict]:
+        """:return: per node declaration, whether it applies to and is enabled on aircraft, and call counts"""
+        frame = aircraft.frame
+        result = []
+        for i, node in enumerate(self.nodes):
+            applies = (not node.devices or frame.device in node.devices) and (not node.sims or frame.sim in node.sims)
+            result.append(dict(name=node.name, method=node.method, applies=applies,
+                               enabled=not node.enabled_by or any(getattr(aircraft, a) for a in node.enabled_by),
+                               reads=node.reads, calls=self.calls[i], skips=self.skips[i]))
+        return result
+
+    def log_inventory(self, aircraft):
+        if not self.nodes:
+            return
+        rows = self.inventory(aircraft)
+        active = [r["name"] for r in rows if r["applies"] and r["enabled"]]
+        disabled = [r["name"] for r in rows if r["applies"] and not r["enabled"]]
+        logging.info(f"{type(aircraft).__name__} effects: running {', '.join(active) or '-'}; "
+                     f"disabled {', '.join(disabled) or '-'}")
@@ -0,0 +1,306 @@
+#
+# This file is part of the TelemFFB distribution (https://github.com/walmis/TelemFFB).
+# Copyright (c) 2023 Valmantas Palikša.
+# Copyright (c) 2023 Micah Frisby
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+Per aircraft filter bank running on a shared frame clock.
+
+The filters of a bank read the frame timestamp taken once per frame by ``FilterBank.begin_frame()``
+instead of calling ``time.perf_counter()`` on every update, filters updated in the same frame share exactly
+the same step.  Each filter computes its step from its own previous update, but after more than RESET_AFTER
+seconds without an update the step is discarded: the filter re-initializes and the high pass and derivative
+outputs are 0 for that frame.  Bank filters must therefore be updated on every frame, an updater that uses
+them must not be skipped by the effect graph (declare its node without ``reads``).
+
+``LowPass``, ``HighPass`` and ``Derivative`` behave like their ``utils`` counterparts, including the
+re-initialization after more than a second without updates.  ``Biquad`` is a second order low or high
+pass (RBJ cookbook) for smoothing that needs a steeper roll-off than the first order filters, its
+coefficients are recomputed when the update rate drifts away from the rate they were designed for.
+"""
+
+import math
+import time
+from typing import Dict
+
+perf_counter = time.perf_counter
+
+RESET_AFTER = 1.0       # seconds without update after which a filter re-initializes to its input
+RATE_TOLERANCE = 0.1    # relative step change that makes Biquad recompute its coefficients
+
+
+class FrameClock:
+    __slots__ = ("now",)
+
+    def __init__(self):
+        self.now = perf_counter()
+
+    def tick(self, now=None) -> float:
+        self.now = perf_counter() if now is None else now
+        return self.now
+
+
+class _Filter:
+    """
+    Base of the bank filters, update() takes the step from the clock of the bank
+
+    The step is 0 for a second update within one frame. A filter re-initializes to its input on the first
+    update and after more than RESET_AFTER seconds without updates.
+    """
+    __slots__ = ("clock", "last_update")
+
+    def __init__(self, clock: FrameClock):
+        self.clock = clock
+        self.last_update = -math.inf
+
+    def reset(self):
+        """Re-initializes the filter to its input on the next update"""
+        self.last_update = -math.inf
+
+    def __call__(self, x):
+        return self.update(x)
+
+
+class LowPass(_Filter):
+    __slots__ = ("cutoff_freq_hz", "x_filt")
+
+    def __init__(self, clock, cutoff_freq_hz, init_val=0.0):
+        super().__init__(clock)
+        self.cutoff_freq_hz = cutoff_freq_hz
+        self.x_filt = init_val
+
+    def update(self, x):
+        now = self.clock.now
+        dt = now - self.last_update
+        self.last_update = now
+        if dt > RESET_AFTER:
+            self.x_filt = x
+            return x
+        alpha = dt / (1.0 / self.cutoff_freq_hz + dt)
+        self.x_filt = alpha * x + (1.0 - alpha) * self.x_filt
+        return self.x_filt
+
+    @property
+    def value(self):
+        return self.x_filt
+
+
+class HighPass(_Filter):
+    __slots__ = ("cutoff_freq_hz", "RC", "last_input", "value")
+
+    def __init__(self, clock, cutoff_freq_hz, init_val=0.0):
+        super().__init__(clock)
+        self.set_cutoff(cutoff_freq_hz)
+        self.last_input = init_val
+        self.value = init_val
+
+    def set_cutoff(self, cutoff_freq_hz):
+        self.cutoff_freq_hz = cutoff_freq_hz
+        self.RC = 1.0 / (2 * math.pi * cutoff_freq_hz)
+
+    def update(self, x):
+        now = self.clock.now
+        dt = now - self.last_update
+        self.last_update = now
+        if dt > RESET_AFTER:
+            # a constant input has no high frequency content, utils.HighPassFilter decays to ~0 after a gap too
+            self.last_input = x
+            self.value = 0.0
+            return 0.0
+        alpha = self.RC / (self.RC + dt)
+        self.value = alpha * (self.value + x - self.last_input)
+        self.last_input = x
+        return self.value
+
+
+class Derivative(_Filter):
+    __slots__ = ("prev_value", "value", "lpf")
+
+    def __init__(self, clock, filter_hz=None):
+        super().__init__(clock)
+        self.prev_value = 0
+        self.value = 0
+        self.lpf = LowPass(clock, filter_hz) if filter_hz else None
+
+    def update(self, value):
+        now = self.clock.now
+        dt = now - self.last_update
+        self.last_update = now
+        dx = value - self.prev_value
+        self.prev_value = value
+        if dt > RESET_AFTER:
+            val = 0.0       # no usable step, utils.Derivative returns ~0 after a gap as well
+        elif dt <= 0:
+            val = self.value
+        else:
+            val = dx / dt
+        if self.lpf:
+            val = self.lpf.update(val)
+        self.value = val
+        return val
+
+
+class Biquad(_Filter):
+    __slots__ = ("kind", "cutoff_freq_hz", "q", "design_dt", "b0", "b1", "b2", "a1", "a2", "x1", "x2", "y1", "y2",
+                 "value", "settle_input")
+
+    def __init__(self, clock, cutoff_freq_hz, q=0.7071, kind="lowpass"):
+        """
+        :param q: quality factor, 0.7071 is maximally flat (Butterworth)
+        :param kind: "lowpass" or "highpass"
+        """
+        if kind not in ("lowpass", "highpass"):
+            raise ValueError(f"Unknown biquad type {kind}")
+        super().__init__(clock)
+        self.kind = kind
+        self.cutoff_freq_hz = cutoff_freq_hz
+        self.q = q
+        self.design_dt = 0.0
+        self.b0 = 1.0
+        self.b1 = self.b2 = self.a1 = self.a2 = 0.0
+        # direct form I, the state is the past inputs and outputs, so it stays valid when the coefficients change
+        self.x1 = self.x2 = self.y1 = self.y2 = 0.0
+        self.value = 0.0
+        self.settle_input = None    # input to settle the state on once the step is known
+
+    def design(self, dt):
+        """Computes the coefficients for updates every dt seconds"""
+        fs = 1.0 / dt
+        fc = min(self.cutoff_freq_hz, 0.45 * fs)    # stay below nyquist
+        w0 = 2 * math.pi * fc / fs
+        cos_w0 = math.cos(w0)
+        alpha = math.sin(w0) / (2 * self.q)
+        a0 = 1 + alpha
+        if self.kind == "lowpass":
+            b0 = (1 - cos_w0) / 2
+            b1 = 1 - cos_w0
+        else:
+            b0 = (1 + cos_w0) / 2
+            b1 = -(1 + cos_w0)
+        self.b0 = b0 / a0
+        self.b1 = b1 / a0
+        self.b2 = b0 / a0
+        self.a1 = -2 * cos_w0 / a0
+        self.a2 = (1 - alpha) / a0
+        self.design_dt = dt
+
+    def _settle(self, x):
+        """Sets the state to the steady state for a constant input x"""
+        self.x1 = self.x2 = x
+        self.y1 = self.y2 = x if self.kind == "lowpass" else 0.0
+        self.settle_input = None
+
+    def update(self, x):
+        now = self.clock.now
+        dt = now - self.last_update
+        self.last_update = now
+        if dt > RESET_AFTER:
+            # the coefficients depend on the step, settle on the next update
+            self.settle_input = x
+            self.value = x if self.kind == "lowpass" else 0.0
+            return self.value
+        if dt <= 0:
+            return self.value
+        if abs(dt - self.design_dt) > RATE_TOLERANCE * self.design_dt:
+            self.design(dt)
+        if self.settle_input is not None:
+            self._settle(self.settle_input)
+        y = self.b0 * x + self.b1 * self.x1 + self.b2 * self.x2 - self.a1 * self.y1 - self.a2 * self.y2
+        self.x2 = self.x1
+        self.x1 = x
+        self.y2 = self.y1
+        self.y1 = y
+        self.value = y
+        return y
+
+
+class FilterBank:
+    """
+    Named filters of one aircraft, created on first use like the LPFs/HPFs dispensers
+
+    Getters return the existing filter of that name and apply a changed cutoff frequency to it.
+    """
+
+    def __init__(self, clock: FrameClock = None):
+        self.clock = clock or FrameClock()
+        self._filters: Dict[str, _Filter] = {}
+
+    def begin_frame(self, now=None):
+        """Takes the timestamp all filter updates of this frame use"""
+        self.clock.tick(now)
+
+    def _create(self, name, cls, *args):
+        if name in self._filters:
+            f = self._filters[name]
+            raise TypeError(f"Filter '{name}' is a {type(f).__name__}, not a {cls.__name__}")
+        f = self._filters[name] = cls(self.clock, *args)
+        return f
+
+    def lowpass(self, name, cutoff_freq_hz, init_val=0.0) -> LowPass:
+        f = self._filters.get(name)
+        if f.__class__ is not LowPass:
+            return self._create(name, LowPass, cutoff_freq_hz, init_val)
+        f.cutoff_freq_hz = cutoff_freq_hz
+        return f
+
+    def highpass(self, name, cutoff_freq_hz, init_val=0.0) -> HighPass:
+        f = self._filters.get(name)
+        if f.__class__ is not HighPass:
+            return self._create(name, HighPass, cutoff_freq_hz, init_val)
+        if f.cutoff_freq_hz != cutoff_freq_hz:
+            f.set_cutoff(cutoff_freq_hz)
+        return f
+
+    def biquad(self, name, cutoff_freq_hz, q=0.7071, kind="lowpass") -> Biquad:
+        f = self._filters.get(name)
+        if f.__class__ is not Biquad:
+            return self._create(name, Biquad, cutoff_freq_hz, q, kind)
+        if f.cutoff_freq_hz != cutoff_freq_hz or f.q != q:
+            f.cutoff_freq_hz = cutoff_freq_hz
+            f.q = q
+            f.design_dt = 0.0   # redesign on the next update
+        return f
+
+    def derivative(self, name, filter_hz=None) -> Derivative:
+        f = self._filters.get(name)
+        if f.__class__ is not Derivative:
+            return self._create(name, Derivative, filter_hz)
+        if filter_hz and f.lpf:
+            f.lpf.cutoff_freq_hz = filter_hz
+        return f
+
+    def dampen(self, value, name, derivative_hz=5, derivative_k=0.1):
+        """Subtracts the low passed derivative of value, replaces utils.Derivative.dampen_value"""
+        return value - self.derivative(name, derivative_hz).update(value) * derivative_k
+
+    def update_many(self, values: Dict[str, float]) -> Dict[str, float]:
+        """
+        Updates existing filters in one call
+
+        :param values: filter name -> input
+        :return: filter name -> output
+        """
+        filters = self._filters
+        return {name: filters[name].update(x) for name, x in values.items()}
+
+    def __contains__(self, name):
+        return name in self._filters
+
+    def __getitem__(self, name) -> _Filter:
+        return self._filters[name]
+
+    def clear(self):
+        self._filters.clear()
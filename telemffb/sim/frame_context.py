@@ -0,0 +1,108 @@
+#
+# This file is part of the TelemFFB distribution (https://github.com/walmis/TelemFFB).
+# Copyright (c) 2023 Valmantas Palikša.
+# Copyright (c) 2023 Micah Frisby
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+Per frame cache of values derived from the telemetry that several effects need.
+
+TelemManager resets the context with every frame before calling ``Aircraft.on_telemetry``.  The sim and
+device type are resolved on reset, everything else is computed on first access and memoized until the
+next reset.
+"""
+
+import enum
+
+import telemffb.utils as utils
+
+knots = 0.514444
+AIRFLOW_FULL_SPEED = 75 * knots     # m/s TAS where the airflow factor reaches 1.0
+
+
+class Sim(enum.Enum):
+    UNKNOWN = None
+    DCS = "DCS"
+    IL2 = "IL2"
+    MSFS = "MSFS"
+    XPLANE = "XPLANE"
+
+
+class Device(enum.Enum):
+    UNKNOWN = None
+    JOYSTICK = "joystick"
+    PEDALS = "pedals"
+    COLLECTIVE = "collective"
+
+
+# value -> (member, flags...), so reset resolves everything with one lookup; enum member access through
+# the class is comparatively slow and is kept off the per frame path
+_sims = {s.value: (s, s is Sim.DCS, s is Sim.IL2, s is Sim.MSFS, s is Sim.XPLANE) for s in Sim}
+_devices = {d.value: (d, d is Device.JOYSTICK, d is Device.PEDALS, d is Device.COLLECTIVE) for d in Device}
+_unknown_sim = _sims[None]
+_unknown_device = _devices[None]
+
+_unset = object()
+
+
+class FrameContext:
+    __slots__ = ("data", "sim", "is_dcs", "is_il2", "is_msfs", "is_xplane",
+                 "device", "is_joystick", "is_pedals", "is_collective",
+                 "_wow", "_flaps_avg", "_airflow_factor")
+
+    def __init__(self, data=None):
+        self.reset({} if data is None else data)
+
+    def reset(self, data: dict):
+        self.data = data
+        self.sim, self.is_dcs, self.is_il2, self.is_msfs, self.is_xplane = _sims.get(data.get("src"), _unknown_sim)
+        self.device, self.is_joystick, self.is_pedals, self.is_collective = \
+            _devices.get(data.get("FFBType", "joystick"), _unknown_device)
+        self._wow = None
+        self._flaps_avg = self._airflow_factor = _unset
+
+    def _weight_on_wheels(self):
+        wow = self.data.get("WeightOnWheels", 0)
+        try:
+            self._wow = (sum(wow), max(wow) if wow else 0)
+        except TypeError:   # single value
+            self._wow = (wow, wow)
+        return self._wow
+
+    @property
+    def wow_sum(self):
+        """Sum of WeightOnWheels over all wheels, 0 when not sent"""
+        return (self._wow or self._weight_on_wheels())[0]
+
+    @property
+    def wow_max(self):
+        """Largest WeightOnWheels value of all wheels, 0 when not sent"""
+        return (self._wow or self._weight_on_wheels())[1]
+
+    @property
+    def flaps_avg(self):
+        """Average flaps position over all flaps"""
+        if self._flaps_avg is _unset:
+            flaps = self.data.get("Flaps", 0)
+            self._flaps_avg = utils.average(flaps) if isinstance(flaps, (list, tuple)) else flaps
+        return self._flaps_avg
+
+    @property
+    def airflow_factor(self):
+        """TAS scaled to 0..1, reaching 1.0 at AIRFLOW_FULL_SPEED"""
+        if self._airflow_factor is _unset:
+            # same as utils.scale_clamp(tas, (0, AIRFLOW_FULL_SPEED), (0, 1.0))
+            self._airflow_factor = min(max(self.data.get("TAS", 0) / AIRFLOW_FULL_SPEED, 0.0), 1.0)
+        return self._airflow_factor
@@ -39,7 +39,12 @@ from enum import IntEnum
 from dataclasses import dataclass
 import telemffb.utils as utils
 import telemffb.globals as G
-import pygetwindow as get_focus_window
+from telemffb.telem.TelemFrame import copy_frame
+try:
+    import pygetwindow as get_focus_window
+except (ImportError, NotImplementedError):
+    # not available on this platform (e.g. headless benchmark runs), focus reads as "unknown"
+    get_focus_window = None
 
 
 knots = 0.514444
@@ -232,7 +237,7 @@ class IL2Manager():
 
         self.state = StateDataStructure()
 
-    def process_packet(self, packet: bytes) -> bytes:
+    def process_packet(self, packet: bytes) -> dict:
         data = BinaryDataReader(packet)
         packet_header = data.get_uint32()
         lenpack = len(packet)
@@ -308,8 +313,7 @@ class IL2Manager():
             self.telem_data['MPMenu'] = False
         self.last_paused_data = paused_data
 
-        packet = bytes(";".join([f"{k}={self.fmt(v)}" for k, v in self.telem_data.items()]), "utf-8")
-        return packet
+        return copy_frame(self.telem_data)
 
     def decode_motion(self, data : BinaryDataReader):
         tick = data.get_uint32()
@@ -559,11 +563,6 @@ class IL2Manager():
                 logging.error(f"Unknown event type: {eventType}")
 
 
-    def fmt(self, val):
-        if isinstance(val, list):
-            return "~".join([str(x) for x in val])
-        return val
-
 
 def log_il2_trace():
     import gzip
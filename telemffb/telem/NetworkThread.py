@@ -22,6 +22,7 @@ import socket
 import threading
 
 from telemffb.telem.TelemManager import TelemManager
+from telemffb.telem.TelemFrame import FrameDecoder, is_binary_frame
 
 class NetworkThread(threading.Thread):
     def __init__(self, telemetry: TelemManager, host="", port=34380, telem_parser=None):
@@ -31,6 +32,7 @@ class NetworkThread(threading.Thread):
         self._host = host
         self._telem : TelemManager = telemetry
         self._telem_parser = telem_parser
+        self._frame_decoder = FrameDecoder()
 
     def run(self):
         self._run = True
@@ -47,6 +49,10 @@ class NetworkThread(threading.Thread):
                 data, sender = s.recvfrom(4096)
                 if self._telem_parser is not None:
                     data = self._telem_parser.process_packet(data)
+                elif is_binary_frame(data):
+                    data = self._frame_decoder.decode(data, sender)
+                    if data is None:
+                        continue
 
                 self._telem.submit_frame(data)
             except ConnectionResetError:
@@ -23,6 +23,7 @@ from telemffb.utils import overrides
 import telemffb.globals as G
 
 from telemffb.telem.TelemManager import TelemManager
+from telemffb.telem.TelemFrame import copy_frame
 
 class SimConnectSock(SimConnectManager):
     def __init__(self, telem: TelemManager):
@@ -31,16 +32,12 @@ class SimConnectSock(SimConnectManager):
         self._telem : TelemManager = telem
 
 
-    def fmt(self, val):
-        if isinstance(val, list):
-            return "~".join([str(x) for x in val])
-        return val
-    
     @overrides(SimConnectManager)
     def emit_packet(self, data):
-        data["src"] = "MSFS"
-        packet = bytes(";".join([f"{k}={self.fmt(v)}" for k, v in data.items()]), "utf-8")
-        self._telem.submit_frame(packet)
+        # hand over the decoded values directly, no need to serialize and re-parse in-process data
+        frame = copy_frame(data)
+        frame["src"] = "MSFS"
+        self._telem.submit_frame(frame)
     
     @overrides(SimConnectManager)
     def emit_event(self, event, *args):
@@ -0,0 +1,302 @@
+#
+# This file is part of the TelemFFB distribution (https://github.com/walmis/TelemFFB).
+# Copyright (c) 2023 Valmantas Palikša.
+# Copyright (c) 2023 Micah Frisby
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+Binary telemetry frame format.
+
+The text format (``key=value~value;...``) remains the default and is always accepted.  Senders that
+want to avoid per-frame string formatting and parsing can use the binary format instead.  All integers
+are little endian.
+
+Every packet starts with a 6 byte header::
+
+    magic    3 bytes   b"\\xf5TF"  (0xF5 never appears in utf-8 text, so text frames can't collide)
+    version  u8        FRAME_VERSION
+    type     u8        MSG_SCHEMA or MSG_DATA
+    schema   u8        schema id chosen by the sender
+
+A schema packet (``MSG_SCHEMA``) declares the key table once::
+
+    count    u16
+    count x [ typecode u8 | array_len u8 | name_len u8 | name utf-8 ]
+
+    typecode is one of the struct format characters "d" (float64), "f" (float32), "i" (int32),
+    "?" (bool) or "s" (utf-8 string), or "t" (text items, see below).  array_len > 1 declares a fixed
+    size array of that type, decoded as a list, the same as a "~" separated text value.
+
+A data packet (``MSG_DATA``) carries the values in schema order.  All numeric and bool fields come
+first, packed back to back so the whole block decodes with one precompiled ``struct`` call.  String
+and text fields follow in schema order, strings as ``len u8 | utf-8 bytes``, text as
+``len u16 | utf-8 bytes``.
+
+A text field named ``TEXT_ITEMS`` carries ``key=value;...`` items in the text format.  TelemManager
+parses them like a text frame (unit suffixes, "~" arrays, true/false) and merges them into the frame.
+Senders use it for values that only exist as text, e.g. the DCS module specific keys, while the
+fixed numeric keys travel binary.
+
+Senders should repeat the schema packet periodically (e.g. once per second) so that a receiver started
+later, or one that dropped the schema packet, picks it up.  Data packets for an unknown schema are
+dropped.  Values are expected in the units TelemFFB uses internally, no unit suffix conversion is done.
+"""
+
+import logging
+import struct
+from typing import Dict, List, Optional, Tuple
+
+from telemffb.telem.ValueParser import parse_value
+
+FRAME_MAGIC = b"\xf5TF"
+FRAME_VERSION = 1
+
+MSG_SCHEMA = 1
+MSG_DATA = 2
+
+TYPECODES = "dfi?st"
+VARIABLE_TYPECODES = "st"
+
+TEXT_ITEMS = "~text"
+
+_header = struct.Struct("<3sBBB")
+_u8 = struct.Struct("<B")
+_u16 = struct.Struct("<H")
+
+
+def is_binary_frame(data) -> bool:
+    return data[:3] == FRAME_MAGIC
+
+
+def _read_bytes(mv: memoryview, offset, length) -> bytes:
+    if offset + length > len(mv):
+        raise ValueError(f"packet truncated at byte {len(mv)}, expected {offset + length}")
+    return bytes(mv[offset:offset + length])
+
+
+def _frame_value(v):
+    """Parses a scalar or array element the way the text path parses ``str(v)``"""
+    t = type(v)
+    if t is float:
+        return round(v, 4)
+    if t is int or t is bool:
+        return v
+    return parse_value(v if t is str else str(v))
+
+
+def copy_frame(data: dict) -> dict:
+    """
+    Copies a telemetry dict for handing it to TelemManager.submit_frame without serializing it.
+
+    The values have the types the text path (``key=value~value;...`` parsed by TelemValueParser) gives:
+
+    * floats are rounded to 4 decimals, ints and bools are kept
+    * strings are parsed, so numeric strings become numbers and unit suffixes are converted
+    * lists and tuples become new lists of parsed elements, a single element becomes a scalar and an
+      empty list becomes ""
+    * nested lists and other objects become their parsed ``str()``
+
+    The one difference: floats that ``str()`` writes without a "." (1e-05, inf, nan) stay floats, the
+    text path returned those as strings.
+
+    The copy also decouples the frame from the source, which keeps mutating its lists (SimVarArray
+    values, IL2 event counters) in place.
+
+    :param data: telemetry dict produced by an in-process source
+    :return: frame dict safe to pass across threads
+    """
+    frame = {}
+    for k, v in data.items():
+        t = type(v)
+        if t is list or t is tuple:
+            if len(v) == 1:
+                v = _frame_value(v[0])
+            elif v:
+                v = [_frame_value(x) for x in v]
+            else:
+                v = ""
+        else:
+            v = _frame_value(v)
+        frame[k] = v
+    return frame
+
+
+class FrameSchema:
+    """Decoded key table of one sender schema"""
+
+    def __init__(self, fields: List[Tuple[str, str, int]]):
+        """
+        :param fields: list of (name, typecode, array_len)
+        """
+        self.fields = fields
+        self.numeric = [(name, count) for name, tc, count in fields if tc not in VARIABLE_TYPECODES]
+        self.variable = [(name, tc) for name, tc, count in fields if tc in VARIABLE_TYPECODES]
+        self.numeric_struct = struct.Struct("<" + "".join(f"{count}{tc}" for name, tc, count in fields
+                                                          if tc not in VARIABLE_TYPECODES))
+
+    def encode(self, schema_id) -> bytes:
+        out = [_header.pack(FRAME_MAGIC, FRAME_VERSION, MSG_SCHEMA, schema_id), _u16.pack(len(self.fields))]
+        for name, tc, count in self.fields:
+            raw = name.encode("utf-8")
+            out.append(struct.pack("<cBB", tc.encode(), count, len(raw)))
+            out.append(raw)
+        return b"".join(out)
+
+    @classmethod
+    def decode(cls, mv: memoryview, offset) -> "FrameSchema":
+        count, = _u16.unpack_from(mv, offset)
+        offset += 2
+        fields = []
+        for _ in range(count):
+            tc, array_len, name_len = struct.unpack_from("<cBB", mv, offset)
+            offset += 3
+            name = _read_bytes(mv, offset, name_len).decode("utf-8")
+            offset += name_len
+            tc = tc.decode()
+            if tc not in TYPECODES:
+                raise ValueError(f"unknown typecode {tc!r} for {name}")
+            fields.append((name, tc, max(array_len, 1)))
+        return cls(fields)
+
+    def encode_values(self, schema_id, values: dict) -> bytes:
+        flat = []
+        for name, count in self.numeric:
+            v = values[name]
+            if count > 1:
+                flat.extend(v)
+            else:
+                flat.append(v)
+        out = [_header.pack(FRAME_MAGIC, FRAME_VERSION, MSG_DATA, schema_id), self.numeric_struct.pack(*flat)]
+        for name, tc in self.variable:
+            raw = str(values.get(name, "")).encode("utf-8")
+            if tc == "s":
+                raw = raw[:255]
+                out.append(_u8.pack(len(raw)))
+            else:
+                raw = raw[:65535]
+                out.append(_u16.pack(len(raw)))
+            out.append(raw)
+        return b"".join(out)
+
+    def decode_values(self, mv: memoryview, offset) -> dict:
+        flat = self.numeric_struct.unpack_from(mv, offset)
+        offset += self.numeric_struct.size
+        result = {}
+        i = 0
+        for name, count in self.numeric:
+            if count > 1:
+                result[name] = list(flat[i:i + count])
+            else:
+                result[name] = flat[i]
+            i += count
+        for name, tc in self.variable:
+            if tc == "s":
+                length = mv[offset]
+                offset += 1
+            else:
+                length, = _u16.unpack_from(mv, offset)
+                offset += 2
+            result[name] = _read_bytes(mv, offset, length).decode("utf-8")
+            offset += length
+        return result
+
+
+class FrameEncoder:
+    """
+    Builds binary frames for a fixed key table.  Used by in-tree tools and as the reference
+    implementation for external senders.
+    """
+
+    def __init__(self, fields: List[Tuple[str, str, int]], schema_id=1):
+        self.schema_id = schema_id
+        self.schema = FrameSchema(fields)
+
+    @classmethod
+    def from_sample(cls, sample: dict, schema_id=1) -> "FrameEncoder":
+        """Derives the key table from a sample telemetry dict"""
+        fields = []
+        for k, v in sample.items():
+            if k == TEXT_ITEMS:
+                fields.append((k, "t", 1))
+            elif isinstance(v, (list, tuple)):
+                tc = "d" if any(isinstance(x, float) for x in v) else "i"
+                fields.append((k, tc, len(v)))
+            elif isinstance(v, bool):
+                fields.append((k, "?", 1))
+            elif isinstance(v, int):
+                fields.append((k, "i", 1))
+            elif isinstance(v, float):
+                fields.append((k, "d", 1))
+            else:
+                fields.append((k, "s", 1))
+        return cls(fields, schema_id)
+
+    def schema_packet(self) -> bytes:
+        return self.schema.encode(self.schema_id)
+
+    def data_packet(self, values: dict) -> bytes:
+        return self.schema.encode_values(self.schema_id, values)
+
+
+class FrameDecoder:
+    """Decodes binary frames, keeping the negotiated schemas per sender"""
+
+    def __init__(self):
+        self._schemas: Dict[tuple, FrameSchema] = {}
+        self._warned = set()
+
+    def decode(self, data: bytes, sender=None) -> Optional[dict]:
+        """
+        Decodes a binary packet.
+
+        :param data: raw packet starting with FRAME_MAGIC
+        :param sender: sender address, schemas are tracked per sender
+        :return: telemetry dict for data packets, None for schema packets or undecodable data
+        """
+        if len(data) < _header.size:
+            self._warn_once(("short", sender), f"Truncated binary telemetry packet from {sender} ({len(data)} bytes)")
+            return None
+        mv = memoryview(data)
+        magic, version, msg_type, schema_id = _header.unpack_from(mv, 0)
+        if version != FRAME_VERSION:
+            self._warn_once(("version", version), f"Unsupported binary telemetry version {version}")
+            return None
+
+        key = (sender, schema_id)
+        try:
+            if msg_type == MSG_SCHEMA:
+                schema = FrameSchema.decode(mv, _header.size)
+                if key not in self._schemas:
+                    logging.info(f"Binary telemetry schema {schema_id} from {sender}: {len(schema.fields)} keys")
+                self._schemas[key] = schema
+                return None
+
+            if msg_type == MSG_DATA:
+                schema = self._schemas.get(key)
+                if schema is None:
+                    self._warn_once(key, f"Binary telemetry from {sender} with unknown schema {schema_id}, waiting for schema")
+                    return None
+                return schema.decode_values(mv, _header.size)
+        except (struct.error, ValueError, IndexError, UnicodeDecodeError) as e:
+            self._warn_once(("error", key), f"Malformed binary telemetry packet from {sender}: {e}")
+            return None
+
+        self._warn_once(("type", msg_type), f"Unknown binary telemetry message type {msg_type}")
+        return None
+
+    def _warn_once(self, key, msg):
+        if key not in self._warned:
+            self._warned.add(key)
+            logging.warning(msg)
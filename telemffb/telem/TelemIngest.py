@@ -0,0 +1,177 @@
+#
+# This file is part of the TelemFFB distribution (https://github.com/walmis/TelemFFB).
+# Copyright (c) 2023 Valmantas Palikša.
+# Copyright (c) 2023 Micah Frisby
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+Ingest stage between the sim listeners and the TelemManager thread.
+
+Every telemetry source gets a bounded ring buffer of (arrival time, frame).  When the TelemManager
+thread picks up work, only the newest frame of a source is processed (latest wins), the older ones are
+counted as dropped: sending stale telemetry to the device only adds latency.  Events are never
+coalesced, they are queued FIFO.
+
+The buffers are not locked, TelemManager accesses them under its condition lock.
+"""
+
+import time
+from collections import deque
+from typing import Dict, List, Tuple
+
+DEFAULT_CAPACITY = 16
+UNKNOWN_SOURCE = "?"
+
+
+def frame_source(data) -> str:
+    """:return: value of the ``src`` key of a text or dict frame"""
+    if isinstance(data, dict):
+        return data.get("src") or UNKNOWN_SOURCE
+    i = data.find("src=")
+    if i < 0:
+        return UNKNOWN_SOURCE
+    end = data.find(";", i)
+    return data[i + 4:end if end >= 0 else len(data)] or UNKNOWN_SOURCE
+
+
+class SourceBuffer:
+    """Ring buffer and statistics of one telemetry source"""
+
+    def __init__(self, name, capacity=DEFAULT_CAPACITY):
+        self.name = name
+        self.frames = deque(maxlen=capacity)    # (arrival perf_counter, frame)
+        self.received = 0
+        self.processed = 0
+        self.dropped = 0            # superseded by a newer frame before being processed
+        self.overruns = 0           # of the dropped frames, the ones pushed out of the full ring buffer
+        self.burst = 0              # frames that arrived since the previous take, up to the last one taken
+        self.max_burst = 0
+        self.age = 0.0              # seconds from arrival until processing of the last frame
+        self.max_age = 0.0
+        self.avg_age = 0.0
+        self.drop_rate = 0.0        # fraction of frames dropped during the last completed second
+        self.last_arrival = 0.0
+        self._window_start = time.perf_counter()
+        self._window_received = 0
+        self._window_dropped = 0
+        self._arrived = 0
+
+    def put(self, frame, now):
+        if len(self.frames) == self.frames.maxlen:
+            self.overruns += 1
+        self.frames.append((now, frame))
+        self.received += 1
+        self._arrived += 1
+        self._window_received += 1
+        self.last_arrival = now
+
+    def take(self, now) -> Tuple[float, object]:
+        """Takes the newest frame and drops the older ones, :return: (arrival time, frame)"""
+        frames = self.frames
+        burst = self._arrived
+        arrival, frame = frames[-1]
+        frames.clear()
+        self._arrived = 0
+
+        dropped = burst - 1
+        self.dropped += dropped
+        self._window_dropped += dropped
+        self.processed += 1
+        self.burst = burst
+        if burst > self.max_burst:
+            self.max_burst = burst
+
+        age = now - arrival
+        self.age = age
+        if age > self.max_age:
+            self.max_age = age
+        if self.processed == 1:
+            self.avg_age = age
+        else:
+            self.avg_age += (age - self.avg_age) * 0.05
+
+        if now - self._window_start >= 1.0:
+            self.drop_rate = self._window_dropped / self._window_received if self._window_received else 0.0
+            self._window_start = now
+            self._window_received = 0
+            self._window_dropped = 0
+        return arrival, frame
+
+    def stats(self) -> dict:
+        return dict(source=self.name, received=self.received, processed=self.processed, dropped=self.dropped,
+                    overruns=self.overruns, drop_rate=self.drop_rate, burst=self.burst,
+                    max_burst=self.max_burst, age=self.age, avg_age=self.avg_age, max_age=self.max_age)
+
+
+class TelemIngest:
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self.sources: Dict[str, SourceBuffer] = {}
+        self.events = deque()
+        self.events_received = 0
+        self.max_event_backlog = 0
+        self._pending = 0           # number of sources with frames waiting
+
+    def put_frame(self, data, source=None, now=None):
+        """
+        :param source: name of the source, taken from the frame's ``src`` when not given
+        """
+        if source is None:
+            source = frame_source(data)
+        buf = self.sources.get(source)
+        if buf is None:
+            buf = self.sources[source] = SourceBuffer(source, self.capacity)
+        if not buf.frames:
+            self._pending += 1
+        buf.put(data, time.perf_counter() if now is None else now)
+
+    def put_event(self, event):
+        self.events.append(event)
+        self.events_received += 1
+        if len(self.events) > self.max_event_backlog:
+            self.max_event_backlog = len(self.events)
+
+    @property
+    def pending(self) -> bool:
+        return self._pending > 0 or bool(self.events)
+
+    def take_frame(self, now=None) -> Tuple[SourceBuffer, object]:
+        """
+        Takes the newest frame of the source that has been waiting the longest
+
+        :return: (source buffer, frame) or None
+        """
+        if not self._pending:
+            return None
+        if now is None:
+            now = time.perf_counter()
+        waiting = [b for b in self.sources.values() if b.frames]
+        buf = min(waiting, key=lambda b: b.frames[0][0]) if len(waiting) > 1 else waiting[0]
+        self._pending -= 1
+        return buf, buf.take(now)[1]
+
+    def take_events(self) -> List[str]:
+        events = self.events
+        out = []
+        while events:
+            out.append(events.popleft())
+        return out
+
+    @property
+    def dropped(self) -> int:
+        return sum(b.dropped for b in self.sources.values())
+
+    def stats(self) -> List[dict]:
+        return [b.stats() for b in self.sources.values()]
@@ -19,10 +19,10 @@
 
 import json
 import logging
-import os
 import subprocess
 import threading
 import time
+from types import MappingProxyType
 
 from PyQt5.QtCore import QObject, pyqtSignal
 
@@ -30,41 +30,20 @@ import telemffb.globals as G
 import telemffb.utils as utils
 from telemffb.utils import dbprint
 import telemffb.xmlutils as xmlutils
+from telemffb.ConfigWatcher import ConfigWatcher
+from telemffb.Profiler import profiler
+from telemffb.RollingStats import RollingStats
+from telemffb.telem.ValueParser import TelemValueParser
+from telemffb.telem.TelemFrame import TEXT_ITEMS
+from telemffb.telem.TelemRecorder import TelemLogWriter
+from telemffb.telem.TelemIngest import SourceBuffer, TelemIngest
 from telemffb.hw.ffb_rhino import HapticEffect
 from telemffb.sim import aircrafts_dcs, aircrafts_il2, aircrafts_msfs_xp
+from telemffb.sim.frame_context import FrameContext
 from telemffb.telem.SimConnectManager import SimConnectManager
 from telemffb.utils import set_vpconf_profile
 
-_config_mtime = 0
-_future_config_update_time = time.time()
-_pending_config_update = False
-
-def config_has_changed(update=False) -> bool:
-    # if update is true, update the current modified time
-    global _config_mtime, _future_config_update_time, _pending_config_update
-    # "hash" both mtimes together
-    tm = int(os.path.getmtime(G.userconfig_path)) + int(os.path.getmtime(G.defaults_path))
-    time_now = time.time()
-    update_delay = 0.4  # Delay added here to avoid file access errors with multiple instances
-
-    if not _config_mtime:
-        # if the first time called, initialize times and return - to avoid double config load on first call
-        _config_mtime = tm
-        return False
-
-    if _config_mtime != tm:
-        _future_config_update_time = time_now + update_delay
-        _pending_config_update = True
-        _config_mtime = tm
-        logging.info(f'Config changed: Waiting {update_delay} seconds to read changes')
-    if _pending_config_update and time_now >= _future_config_update_time:
-        _pending_config_update = False
-        logging.info(f'Config changed: {update_delay} second timer expired, reading changes')
-        return True
-    return False
-
 class TelemManager(QObject, threading.Thread):
-    telemetryReceived = pyqtSignal(object)
     eventReceived = pyqtSignal(tuple)
 
     aircraftUpdated = pyqtSignal()
@@ -84,17 +63,25 @@ class TelemManager(QObject, threading.Thread):
 
         self._run = True
         self._cond = threading.Condition()
-        self._data = None
-        self._events = []
-        self._dropped_frames = 0
+        self.ingest = TelemIngest()
+        self._busy = False
+        self._frame_source : SourceBuffer = None    # ingest buffer of the frame being processed
         self.last_frame_time = time.perf_counter()
-        self.frame_times = []
+        self.frame_times = RollingStats(500)   # ms, shared with the UI
+        self._frame_time_pct = ""
+        self._frame_time_pct_at = 0.0
         self.max_frame_time = 0
         self.timeout_sec = 0.2
         self._ipc_telem_data = {}
         self._simconnect : SimConnectManager= None
         self.gain_overrides_active = False
         self.stop_state = False
+        self.config_watcher : ConfigWatcher = None
+        self._sc_overrides = None
+        self._value_parser = TelemValueParser()
+        self.recorder : TelemLogWriter = None
+        self._frame_context = FrameContext()    # derived values of the frame being processed
+        self._snapshot = (0, None)     # (sequence number, read only copy of the last processed frame)
 
     def set_simconnect(self, sc : SimConnectManager):
         self._simconnect = sc
@@ -103,6 +90,14 @@ class TelemManager(QObject, threading.Thread):
     def simconnect(self) -> SimConnectManager:
         return self._simconnect
 
+    def latest_telemetry(self):
+        """
+        Latest processed telemetry frame, for consumers polling at their own rate (e.g. the UI)
+
+        :return: (sequence number, read only mapping or None), the sequence number changes with every new frame
+        """
+        return self._snapshot
+
     def get_aircraft_config(self, aircraft_name, data_source):
         params = {}
         cls_name = "UNKNOWN"
@@ -125,23 +120,7 @@ class TelemManager(QObject, threading.Thread):
             #globals.settings_mgr.current_pattern = pattern
             if cls_name == '': 
                 cls_name = 'Aircraft'
-            for setting in result:
-                k = setting['name']
-                v = setting['value']
-                u = setting['unit']
-                if v is None:
-                    v = '0'
-                if u is not None:
-                    vu = v + u
-                else:
-                    vu = v
-                if setting['value'] != '-':
-                    params[k] = vu
-                    logging.debug(f"Got from Settings Manager: {k} : {vu}")
-                else:
-                    logging.debug(f"Ignoring blank setting from Settings Manager: {k} : {vu}")
-                # print(f"SETTING:\n{setting}")
-            params = utils.sanitize_dict(params)
+            params = utils.sanitize_dict(xmlutils.model_settings_to_params(result))
 
             G.settings_mgr.update_state_vars(
                 current_sim=the_sim,
@@ -158,81 +137,173 @@ class TelemManager(QObject, threading.Thread):
     def quit(self):
         self._run = False
         self.join()
+        if self.config_watcher:
+            self.config_watcher.stop()
+        self.stop_recording()
+
+    def start_recording(self, path):
+        """Record every submitted frame and event into a telemetry log, see TelemRecorder"""
+        self.stop_recording()
+        self.recorder = TelemLogWriter(path)
+
+    def stop_recording(self):
+        recorder, self.recorder = self.recorder, None
+        if recorder:
+            recorder.close()
+
+    def wait_idle(self, timeout=None) -> bool:
+        """
+        Waits until all submitted frames and events have been processed, used by the replayer
+
+        :return: False if the timeout expired
+        """
+        with self._cond:
+            return self._cond.wait_for(lambda: not self.ingest.pending and not self._busy, timeout)
+
+    def watch_config_files(self):
+        """(Re)start watching the xml config files, called on startup and when a different userconfig is loaded"""
+        files = [G.userconfig_path, G.defaults_path]
+        if self.config_watcher is None:
+            poll_interval = int(G.system_settings.get('configPollInterval', 1000)) / 1000.0
+            # settle delay avoids file access errors when multiple instances write the config
+            self.config_watcher = ConfigWatcher(files, settle_delay=0.4, poll_interval=poll_interval)
+            self.config_watcher.start()
+        else:
+            self.config_watcher.set_files(files)
+
+    def submit_frame(self, data, source=None):
+        """
+        Queues a telemetry frame for processing.
 
-    def submit_frame(self, data: bytes):
+        Frames of a source that arrive faster than they are processed replace each other, only the newest
+        one is processed (see TelemIngest).  This is not necessarily a bad thing, USB interrupt transfers
+        (1ms) might take longer than one video frame, we drop frames to keep latency to a minimum.
+
+        :param data: text frame (bytes or str, ``key=value;...`` or ``Ev=...`` event), or an already
+            decoded telemetry dict from a binary or in-process source
+        :param source: source name for the ingest statistics, defaults to the ``src`` of the frame
+        """
         if isinstance(data, bytes):
             data = data.decode("utf-8")
 
+        recorder = self.recorder
+        if recorder is not None:
+            recorder.write(data)
+
         with self._cond:
-            if data.startswith("Ev="):
-                self._events.append(data.lstrip("Ev="))
-                self._cond.notify()
-            elif self._data is None:
-                self._data = data
-                self._cond.notify()  # notify waiting thread of new data
+            if not isinstance(data, dict) and data.startswith("Ev="):
+                self.ingest.put_event(data[3:])
             else:
-                self._dropped_frames += 1
-                # log dropped frames, this is not necessarily a bad thing
-                # USB interrupt transfers (1ms) might take longer than one video frame
-                # we drop frames to keep latency to a minimum
-                logging.debug(f"Droppped frame (total {self._dropped_frames})")
-
-    def process_events(self):
-        while self._events:
-            ev = self._events.pop(0)
+                self.ingest.put_frame(data, source)
+            self._cond.notify_all()  # notify waiting thread of new data
+
+    def process_events(self, events):
+        for ev in events:
             ev = ev.split(";")
 
             if self.currentAircraft:
                 self.currentAircraft.on_event(*ev)
-            self.eventReceived.emit(tuple(ev))
+            with profiler.section("signal eventReceived"):
+                self.eventReceived.emit(tuple(ev))
             continue
 
-    def get_changed_params(self, params):
+    def get_changed_params(self, params, keys=None):
+        """
+        Returns the settings in params that differ from the currently applied aircraft config
+        and merges them into it.
+
+        :param params: freshly resolved aircraft settings
+        :param keys: optional set of setting names known to have changed, only those are compared
+        :return: dict of changed settings
+        """
         diff_dict = {}
 
+        if keys is not None:
+            items = ((k, params[k]) for k in keys if k in params)
+        else:
+            items = params.items()
+
         # Check for new keys or keys with different values
-        for key, new_value in params.items():
+        for key, new_value in items:
             if key not in self.currentAircraftConfig or self.currentAircraftConfig[key] != new_value:
                 diff_dict[key] = new_value
         logging.debug(f"get_changed_settings: {diff_dict.items()}")
         self.currentAircraftConfig.update(diff_dict)
         return diff_dict
     
+    def update_sc_overrides(self, aircraft_name) -> bool:
+        """
+        Reads the SimConnect overrides for the aircraft and resubscribes only if they differ
+        from the ones already applied.
+
+        :return: True if a resubscribe was requested
+        """
+        overrides = xmlutils.read_sc_overrides(aircraft_name)
+        if overrides == self._sc_overrides:
+            return False
+        self._sc_overrides = overrides
+        for sv in overrides:
+            self._simconnect.add_simvar(name=sv['name'], var=sv['var'], sc_unit=sv['sc_unit'], scale=sv['scale'])
+        self._simconnect._resubscribe()
+        return True
+
     def process_data(self, data):
 
-        data = data.split(";")
+        if isinstance(data, dict):
+            # already typed by the source, only the text items of a binary frame need parsing
+            frame = data
+            text = frame.get(TEXT_ITEMS)
+            data = text.split(";") if text else ()
+        else:
+            frame = None
+            data = data.split(";")
 
         telem_data = {}
         telem_data["FFBType"] = G.device_type
 
-        self.frame_times.append(int((time.perf_counter() - self.last_frame_time)*1000))
-        if len(self.frame_times) > 500: 
-            self.frame_times.pop(0)
+        now = time.perf_counter()
+        frame_time = int((now - self.last_frame_time)*1000)
+        ft = self.frame_times
+        ft.add(frame_time)
 
-        if self.frame_times[-1] > self.max_frame_time and len(self.frame_times) > 40:  # skip the first frames before counting frametime as max
+        if frame_time > self.max_frame_time and len(ft) > 40:  # skip the first frames before counting frametime as max
             threshold = 100
-            if self.frame_times[-1] > threshold:
+            if frame_time > threshold:
                 logging.debug(
-                    f'*!*!*!* - Frametime threshold of {threshold}ms exceeded: time = {self.frame_times[-1]}ms')
+                    f'*!*!*!* - Frametime threshold of {threshold}ms exceeded: time = {frame_time}ms')
 
-            self.max_frame_time = self.frame_times[-1]
+            self.max_frame_time = frame_time
 
-        telem_data["frameTimes"] = [self.frame_times[-1], max(self.frame_times)]
+        telem_data["frameTimes"] = [frame_time, int(ft.max)]
         telem_data["maxFrameTime"] = f"{round(self.max_frame_time, 3)}"
-        telem_data["avgFrameTime"] = f"{round(sum(self.frame_times) / len(self.frame_times), 3):.3f}"
+        telem_data["avgFrameTime"] = f"{ft.mean:.3f}"
+        if now - self._frame_time_pct_at > 0.5:
+            # percentiles need a histogram scan, refresh them twice a second
+            self._frame_time_pct = f"{ft.percentile(50):.0f}/{ft.percentile(95):.0f}/{ft.percentile(99):.0f}ms"
+            self._frame_time_pct_at = now
+        telem_data["frameTimePct"] = self._frame_time_pct
 
-        self.last_frame_time = time.perf_counter()
+        src = self._frame_source
+        if src is not None:
+            telem_data["ingestAge"] = f"{src.age * 1000:.3f}ms"
+            telem_data["ingestDrops"] = f"{src.drop_rate * 100:.1f}% ({src.dropped})"
+            telem_data["ingestBurst"] = [src.burst, src.max_burst]
+
+        self.last_frame_time = now
 
         for i in data:
             try:
                 if len(i):
                     section, conf = i.split("=")
-                    values = conf.split("~")
-                    telem_data[section] = [utils.to_number(v) for v in values] if len(values) > 1 else utils.to_number(conf)
+                    telem_data[section] = self._value_parser.parse_item(section, conf)
 
             except Exception:
                 logging.exception("Error Parsing Parameter: %s", repr(i))
 
+        if frame is not None:
+            telem_data.update(frame)
+            telem_data.pop(TEXT_ITEMS, None)
+
         # Read telemetry sent via IPC channel from child instances and update local telemetry stream
         if G.master_instance and G.launched_instances:
             self._ipc_telem_data = G.ipc_instance._ipc_telem
@@ -372,11 +443,9 @@ class TelemManager(QObject, threading.Thread):
 
                 self.currentAircraft.apply_settings(params)
                 self.currentAircraftConfig = params
+                self._sc_overrides = None
                 if data_source == "MSFS" and aircraft_name != '':
-                    d1 = xmlutils.read_sc_overrides(aircraft_name)
-                    for sv in d1:
-                        self._simconnect.add_simvar(name=sv['name'], var=sv['var'], sc_unit=sv['sc_unit'], scale=sv['scale'])
-                    self._simconnect._resubscribe()
+                    self.update_sc_overrides(aircraft_name)
 
                 if G.settings_mgr.isVisible():
                     G.settings_mgr.b_getcurrentmodel.click()
@@ -387,10 +456,14 @@ class TelemManager(QObject, threading.Thread):
             self.currentAircraftName = aircraft_name
 
         if self.currentAircraft:
-            if config_has_changed():
+            if self.config_watcher.consume():
                 logging.info("Configuration has changed, reloading")
+                # change-set recorded by our own xml writers, None if the files were changed elsewhere
+                changes = xmlutils.pop_config_changes()
                 params, cls_name = self.get_aircraft_config(aircraft_name, data_source)
-                updated_params = self.get_changed_params(params)
+                keys = changes.keys_to_compare(params, self.currentAircraftConfig) if changes is not None else None
+                updated_params = self.get_changed_params(params, keys)
+                logging.info(f"Configuration reload: {len(updated_params)} changed setting(s)")
                 self.currentAircraft.apply_settings(updated_params)
 
                 if "vpconf" in params:
@@ -411,14 +484,17 @@ class TelemManager(QObject, threading.Thread):
                         set_vpconf_profile(global_path, HapticEffect.device.serial)
                         G.vpconf_configurator_gains = HapticEffect.device.get_gains()  # set here to keep track of gains set by last vpconf
                     # utils.dbprint("blue", f"Gains: {G.vpconf_configurator_gains}")
-                if params.get('command_runner_enabled', False):
+                if params.get('command_runner_enabled', False) and \
+                        any(k.startswith('command_runner') for k in updated_params):
                     if params.get('command_runner_command', '') != '' and 'Enter full path' not in params.get('command_runner_command', ''):
                         try:
                             subprocess.Popen(params['command_runner_command'], shell=True)
                         except Exception as e:
                             logging.error(f"Error running Command Executor for model: {e}")
 
-                if params.get('configurator_override_enabled', False):
+                if 'configurator_override_enabled' not in updated_params and 'configurator_gains' not in updated_params:
+                    pass  # gains are untouched by this change
+                elif params.get('configurator_override_enabled', False):
                     state = params.get('configurator_gains', 'none')
                     if state != "none":
                         state = json.loads(params.get('configurator_gains', '{}'))
@@ -448,21 +524,37 @@ class TelemManager(QObject, threading.Thread):
                     self.currentAircraft.apply_settings(params)
                     self.currentAircraftConfig = params
 
-                if data_source == "MSFS" and aircraft_name != '':
-                    d1 = xmlutils.read_sc_overrides(aircraft_name)
-                    for sv in d1:
-                        self._simconnect.add_simvar(name=sv['name'], var=sv['var'], sc_unit=sv['sc_unit'], scale=sv['scale'])
-                    self._simconnect._resubscribe()
+                sc_changed = False
+                if data_source == "MSFS" and aircraft_name != '' and (changes is None or changes.sc_overrides):
+                    sc_changed = self.update_sc_overrides(aircraft_name)
 
-                self.aircraftUpdated.emit()
+                if updated_params or sc_changed:
+                    self.aircraftUpdated.emit()
                 # dbprint("red", "Aircraft Updated Emit : #2")
 
             try:
                 _tm = time.perf_counter()
                 self.currentAircraft._last_telem_data = self.currentAircraft._telem_data.copy() # Keep copy of last data for frame-to-frame comparison
                 self.currentAircraft._telem_data = telem_data
-                self.currentAircraft.on_telemetry(telem_data)
+                self._frame_context.reset(telem_data)
+                self.currentAircraft.frame = self._frame_context
+                self.currentAircraft.changes.begin_frame(_tm)
+                self.currentAircraft.filters.begin_frame(_tm)
+                # collect all effect updates of this frame and send them in one burst
+                dev = HapticEffect.device
+                dev.begin_frame()
+                try:
+                    with profiler.section("on_telemetry"):
+                        self.currentAircraft.on_telemetry(telem_data)
+                finally:
+                    dev.commit_frame()
                 telem_data["perf"] = f"{(time.perf_counter() - _tm) * 1000:.3f}ms"
+                m = dev.write_metrics
+                telem_data["hidWrites"] = [m.frame_written, m.frame_submitted]
+                telem_data["hidFlush"] = f"{m.flush_latency * 1000:.3f}ms"
+                pool = dev.effect_pool
+                telem_data["fxPool"] = f"{pool.spare} spare, {pool.hits}/{pool.misses} hit/miss" + \
+                    (" FULL" if pool.pressure else "")
 
             except Exception:
                 logging.exception(".on_telemetry Exception")
@@ -481,9 +573,9 @@ class TelemManager(QObject, threading.Thread):
                     else:
                         utils.teleplot.sendTelemetry(item, telem_data[item])
 
-        try:  # sometime Qt object is destroyed first on exit and this may cause a runtime exception
-            self.telemetryReceived.emit(telem_data)
-        except: pass
+        # publish a copy, the aircraft keeps working on telem_data; replacing the tuple is atomic so
+        # readers on other threads never see a half updated snapshot
+        self._snapshot = (self._snapshot[0] + 1, MappingProxyType(dict(telem_data)))
 
     def getTelemValue(self, key):
         if self.currentAircraft:
@@ -499,23 +591,40 @@ class TelemManager(QObject, threading.Thread):
     def run(self):
         self.timeout_sec = int(G.system_settings.get('telemTimeout', 200))/1000.0
         logging.info(f"Telemetry timeout: {self.timeout_sec}")
+        self.watch_config_files()
         self._run = True
         while self._run:
             with self._cond:
-                if not self._events and not self._data:
-                    if not self._cond.wait(self.timeout_sec):
-                        self.on_timeout()
-                        continue
-
-                if self._data:
-                    if self.timed_out:
-                        self.telemetryTimeout.emit(False)
-                        self.timed_out = False
-
-                    G.settings_mgr.timed_out = False
-                    data = self._data
-                    self._data = None
-                    self.process_data(data)
-                
-                if self._events:
-                    self.process_events()
\ No newline at end of file
+                if not self.ingest.pending and not self._cond.wait(self.timeout_sec):
+                    expired = True
+                    item, events = None, []
+                else:
+                    expired = False
+                    item = self.ingest.take_frame()
+                    events = self.ingest.take_events()
+                self._busy = item is not None or bool(events)
+
+            if expired:
+                self.on_timeout()
+                continue
+
+            # processing happens outside of the lock, so sources never wait for the effect pipeline
+            if not self._busy:
+                continue    # woken up without new data
+
+            if item is not None:
+                if self.timed_out:
+                    self.telemetryTimeout.emit(False)
+                    self.timed_out = False
+
+                G.settings_mgr.timed_out = False
+                self._frame_source, data = item
+                self.process_data(data)
+
+            if events:
+                self.process_events(events)
+
+            with self._cond:
+                self._busy = False
+                # wake up wait_idle() callers
+                self._cond.notify_all()
\ No newline at end of file
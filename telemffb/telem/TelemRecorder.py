@@ -0,0 +1,288 @@
+#
+# This file is part of the TelemFFB distribution (https://github.com/walmis/TelemFFB).
+# Copyright (c) 2023 Valmantas Palikša.
+# Copyright (c) 2023 Micah Frisby
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+Telemetry recording and replay.
+
+Everything passed to ``TelemManager.submit_frame`` (text frames, events and dict frames from in-process
+sources) can be recorded into a binary log and later fed back into a TelemManager, without any sim running.
+
+Log layout::
+
+    file header   b"TFBLOG" | version u8 | b"\\n"          (written once, when the file is created)
+    record        sync b"\\xa5\\x5a" | kind u8 | time f64 | length u32 | payload
+
+Records are appended, so recording into an existing log simply adds a new session.  ``kind`` is
+KIND_TEXT (utf-8 frame or ``Ev=`` event) or KIND_DICT (json encoded frame dict).  ``time`` is the
+wall clock time of submission.  The sync marker allows the reader to skip over a record torn by a crash.
+"""
+
+import argparse
+import bisect
+import json
+import logging
+import os
+import struct
+import threading
+import time
+from typing import Callable, Iterator, List, Tuple
+
+LOG_MAGIC = b"TFBLOG"
+LOG_VERSION = 1
+LOG_HEADER = LOG_MAGIC + bytes([LOG_VERSION]) + b"\n"
+
+RECORD_SYNC = b"\xa5\x5a"
+KIND_TEXT = 0
+KIND_DICT = 1
+
+_record = struct.Struct("<2sBdI")
+
+
+class TelemLogWriter:
+    """Appends submitted frames to a telemetry log.  Thread safe, call :meth:`write` from any thread"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, "ab")
+        if self._file.tell() == 0:
+            self._file.write(LOG_HEADER)
+        self.records = 0
+        logging.info(f"Recording telemetry to {path}")
+
+    def write(self, data, timestamp=None):
+        """
+        :param data: frame as passed to submit_frame (str, bytes or dict)
+        :param timestamp: wall clock time, defaults to now
+        """
+        if isinstance(data, dict):
+            kind = KIND_DICT
+            payload = json.dumps(data, separators=(",", ":"), default=str).encode("utf-8")
+        else:
+            kind = KIND_TEXT
+            payload = data if isinstance(data, bytes) else data.encode("utf-8")
+
+        if timestamp is None:
+            timestamp = time.time()
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write(_record.pack(RECORD_SYNC, kind, timestamp, len(payload)))
+            self._file.write(payload)
+            self.records += 1
+
+    def flush(self):
+        with self._lock:
+            if self._file:
+                self._file.flush()
+
+    def close(self):
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+                logging.info(f"Telemetry recording closed: {self.records} records written to {self.path}")
+
+
+class TelemLogReader:
+    """Reads a telemetry log, supports iterating and seeking by time"""
+
+    def __init__(self, path):
+        self.path = path
+        self._index: List[Tuple[float, int]] = None
+        with open(path, "rb") as f:
+            header = f.read(len(LOG_HEADER))
+        if header[:len(LOG_MAGIC)] != LOG_MAGIC:
+            raise ValueError(f"{path} is not a TelemFFB telemetry log")
+        if header[len(LOG_MAGIC)] != LOG_VERSION:
+            raise ValueError(f"{path}: unsupported log version {header[len(LOG_MAGIC)]}")
+
+    @staticmethod
+    def decode(kind, payload: bytes):
+        if kind == KIND_DICT:
+            return json.loads(payload)
+        return payload.decode("utf-8")
+
+    def _scan(self, f, offset, read_payload=True) -> Iterator[Tuple[int, int, float, bytes]]:
+        """Yields (offset, kind, timestamp, payload) from offset on, resyncing over damaged records"""
+        f.seek(offset)
+        size = os.fstat(f.fileno()).st_size
+        while offset + _record.size <= size:
+            hdr = f.read(_record.size)
+            sync, kind, ts, length = _record.unpack(hdr)
+            if sync != RECORD_SYNC or kind not in (KIND_TEXT, KIND_DICT) or offset + _record.size + length > size:
+                # damaged record, look for the next sync marker
+                f.seek(offset + 1)
+                chunk = f.read(64 * 1024)
+                pos = chunk.find(RECORD_SYNC)
+                if pos < 0:
+                    offset += 1 + max(len(chunk) - 1, 0)
+                else:
+                    offset += 1 + pos
+                f.seek(offset)
+                continue
+            if read_payload:
+                payload = f.read(length)
+            else:
+                payload = None
+                f.seek(length, os.SEEK_CUR)
+            yield offset, kind, ts, payload
+            offset += _record.size + length
+
+    def index(self) -> List[Tuple[float, int]]:
+        """List of (timestamp, file offset) for every record, built once by scanning record headers only"""
+        if self._index is None:
+            with open(self.path, "rb") as f:
+                self._index = [(ts, offset) for offset, kind, ts, _ in self._scan(f, len(LOG_HEADER), False)]
+        return self._index
+
+    def __len__(self):
+        return len(self.index())
+
+    @property
+    def start_time(self):
+        idx = self.index()
+        return idx[0][0] if idx else 0.0
+
+    @property
+    def duration(self):
+        idx = self.index()
+        return idx[-1][0] - idx[0][0] if idx else 0.0
+
+    def records(self, start=0.0) -> Iterator[Tuple[float, object]]:
+        """
+        Iterates over the log
+
+        :param start: seconds from the beginning of the log to start at
+        :return: iterator of (timestamp, frame)
+        """
+        offset = len(LOG_HEADER)
+        if start > 0:
+            idx = self.index()
+            i = bisect.bisect_left(idx, (self.start_time + start, -1))
+            if i >= len(idx):
+                return
+            offset = idx[i][1]
+        with open(self.path, "rb") as f:
+            for _, kind, ts, payload in self._scan(f, offset):
+                yield ts, self.decode(kind, payload)
+
+
+class TelemReplayer:
+    """
+    Feeds a recorded log into a TelemManager (or any callable taking a frame).
+
+    :param speed: 1.0 replays at the original timing, N replays N times faster, 0 replays as fast as the
+        target can process frames
+    """
+
+    def __init__(self, path, target, speed=1.0, start=0.0, loop=False):
+        self.reader = TelemLogReader(path)
+        self.speed = speed
+        self.start = start
+        self.loop = loop
+        self.frames = 0
+        self._target = target
+        self._submit: Callable = getattr(target, "submit_frame", target)
+        self._wait_idle: Callable = getattr(target, "wait_idle", None)
+        self._run = False
+        self._thread = None
+
+    def start_thread(self):
+        self._thread = threading.Thread(target=self.run, daemon=True, name="TelemReplayer")
+        self._thread.start()
+
+    def stop(self):
+        self._run = False
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def run(self):
+        self._run = True
+        logging.info(f"Replaying {self.reader.path}: {len(self.reader)} records, "
+                     f"{self.reader.duration:.1f}s, speed={self.speed or 'max'}")
+        while self._run:
+            self._replay_once()
+            if not self.loop:
+                break
+        logging.info(f"Replay finished, {self.frames} frames submitted")
+
+    def _replay_once(self):
+        t_first = None
+        t_wall = time.perf_counter()
+        for ts, frame in self.reader.records(self.start):
+            if not self._run:
+                return
+            if t_first is None:
+                t_first = ts
+
+            if self.speed > 0:
+                delay = (ts - t_first) / self.speed - (time.perf_counter() - t_wall)
+                if delay > 0:
+                    time.sleep(delay)
+            elif self._wait_idle is not None:
+                # as fast as possible, but don't let the target drop frames
+                self._wait_idle(1.0)
+
+            self._submit(frame)
+            self.frames += 1
+
+        if self.speed == 0 and self._wait_idle is not None:
+            self._wait_idle(1.0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TelemFFB telemetry log tool")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("info", help="Show a summary of a telemetry log")
+    p.add_argument("log")
+    p = sub.add_parser("dump", help="Print the frames of a telemetry log")
+    p.add_argument("log")
+    p.add_argument("--start", type=float, default=0.0, help="Seconds from the beginning of the log")
+    p.add_argument("--count", type=int, default=0, help="Number of frames to print (0 = all)")
+    args = parser.parse_args()
+
+    reader = TelemLogReader(args.log)
+    if args.cmd == "info":
+        events = 0
+        dicts = 0
+        sources = {}
+        for ts, frame in reader.records():
+            if isinstance(frame, dict):
+                dicts += 1
+                src = frame.get("src")
+            elif frame.startswith("Ev="):
+                events += 1
+                continue
+            else:
+                src = next((i[4:] for i in frame.split(";") if i.startswith("src=")), None)
+            sources[src] = sources.get(src, 0) + 1
+        print(f"{args.log}: {len(reader)} records, {reader.duration:.2f}s")
+        print(f"  events: {events}, dict frames: {dicts}, text frames: {len(reader) - events - dicts}")
+        for src, n in sources.items():
+            print(f"  src={src}: {n} frames")
+    else:
+        t0 = reader.start_time
+        for n, (ts, frame) in enumerate(reader.records(args.start)):
+            if args.count and n >= args.count:
+                break
+            print(f"{ts - t0:10.4f} {frame}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+#
+# This file is part of the TelemFFB distribution (https://github.com/walmis/TelemFFB).
+# Copyright (c) 2023 Valmantas Palikša.
+# Copyright (c) 2023 Micah Frisby
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+Telemetry value parser.
+
+Produces exactly the same results as :func:`telemffb.utils.to_number`, but is meant for the per-frame
+hot path: plain numbers are tried first, the keyword and unit suffix handling is table driven and
+memoized, and :class:`TelemValueParser` remembers per telemetry key whether values are numeric so that
+text keys skip the failing numeric attempt.
+"""
+
+from functools import lru_cache
+
+TRUE_WORDS = frozenset(["true", "yes", "on", "enable", "enabled"])
+FALSE_WORDS = frozenset(["false", "no", "off", "disable", "disabled"])
+
+# order matters, the first unit found as prefix or suffix wins (same as utils.to_number)
+UNIT_CONVERSIONS = (
+    ("%", 0.01), ("kt", 0.51444), ("kph", 1 / 3.6), ("fpm", 0.00508), ("m/s", 1),
+    ("mph", 0.44704), ("deg", 1), ("ms", 1), ("hz", 1), ("m", 1), ("ft", 0.3048),
+    ("in", 0.0254), ("m^2", 1), ("ft^2", 0.092903),
+)
+
+KIND_NUMERIC = 0
+KIND_TEXT = 1
+
+
+def _parse_number(v: str):
+    # plain numbers can never start or end with a unit or be a keyword, so this matches to_number
+    if "." in v:
+        return round(float(v), 4)
+    return int(v)
+
+
+@lru_cache(maxsize=1024)
+def _parse_text(v: str):
+    v_lower = v.lower()
+    if v_lower in TRUE_WORDS:
+        return True
+    if v_lower in FALSE_WORDS:
+        return False
+
+    orig_v = v
+    scale = 1
+    for unit, factor in UNIT_CONVERSIONS:
+        if v_lower.endswith(unit) or v_lower.startswith(unit):
+            scale = factor
+            v = v.strip(unit)
+            break
+
+    try:
+        return round(float(v) * scale, 4) if "." in v else int(v) * scale
+    except ValueError:
+        return orig_v
+
+
+def parse_value(v):
+    """
+    Drop-in replacement for utils.to_number
+
+    :param v: string value, bools and ints are returned unchanged
+    :return: bool, int, float or the original string
+    """
+    if isinstance(v, (bool, int)):
+        return v
+    try:
+        return _parse_number(v)
+    except ValueError:
+        return _parse_text(v)
+
+
+class TelemValueParser:
+    """
+    Stateful parser for telemetry frames with a per-key kind cache.
+
+    Keys that carried a plain number last time are parsed with the numeric fast path first, keys that
+    carried text (names, unit suffixed values) go straight to the memoized text parser.  The kind is
+    updated whenever a guess turns out to be wrong, so results are always identical to to_number.
+    """
+
+    def __init__(self):
+        self._kinds = {}
+
+    def reset(self):
+        self._kinds.clear()
+
+    def parse(self, key, v):
+        kind = self._kinds.get(key, KIND_NUMERIC)
+        if kind == KIND_NUMERIC:
+            try:
+                return _parse_number(v)
+            except ValueError:
+                self._kinds[key] = KIND_TEXT
+                return _parse_text(v)
+
+        result = _parse_text(v)
+        if type(result) in (int, float) and v.strip() == v and v[-1:].isdigit() and "^" not in v:
+            # a plain number again, switch back to the fast path
+            self._kinds[key] = KIND_NUMERIC
+        return result
+
+    def parse_array(self, key, values):
+        """
+        Parses the elements of a "~" separated value
+
+        :param key: telemetry key
+        :param values: list of element strings
+        :return: list of parsed values
+        """
+        if self._kinds.get(key, KIND_NUMERIC) == KIND_NUMERIC:
+            try:
+                return [round(float(x), 4) if "." in x else int(x) for x in values]
+            except ValueError:
+                self._kinds[key] = KIND_TEXT
+        return [parse_value(x) for x in values]
+
+    def parse_item(self, key, conf):
+        """
+        Parses a single ``key=conf`` telemetry item the same way TelemManager always did:
+        "~" separated values become lists.
+
+        :return: parsed value or list of values
+        """
+        if "~" in conf:
+            return self.parse_array(key, conf.split("~"))
+        return self.parse(key, conf)
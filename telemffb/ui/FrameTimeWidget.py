@@ -4,20 +4,20 @@ from PyQt5.QtGui import QPainter, QPen, QLinearGradient, QColor, QFont
 from PyQt5.QtCore import Qt, QPointF, QTimer
 import random
 
+from telemffb.RollingStats import RollingStats
+
 class FrameTimeWidget(QWidget):
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, stats : RollingStats = None):
+        """
+        :param stats: frame time statistics to display, e.g. TelemManager.frame_times.  The widget reads
+            them in place, if not given it keeps its own, filled by add_frame_time
+        """
         super().__init__(parent)
         self.max_frame_count = 100  # Maximum number of frames to display
-        self.frame_times = []  # List to store frame times (capped at max_frame_count)
-        self.max_time = 0  # Maximum frame time seen so far
+        self.frame_times = stats if stats is not None else RollingStats(1000)
 
     def add_frame_time(self, frame_time):
-        self.frame_times.append(frame_time)
-        self.max_time = max(self.max_time, frame_time)
-
-        # Keep only the most recent max_frame_count entries
-        self.frame_times = self.frame_times[-self.max_frame_count:]
-
+        self.frame_times.add(frame_time)
         self.update()  # Trigger widget repaint
 
     def paintEvent(self, event):
@@ -28,13 +28,14 @@ class FrameTimeWidget(QWidget):
         painter.fillRect(self.rect(), Qt.white)
 
         # Draw vertical lines for each frame time
-        if not self.frame_times:
+        stats = self.frame_times
+        if not len(stats):
             return  # No data to draw
         
         self.max_frame_count = int(self.width()/2.0)
+        count = min(len(stats), self.max_frame_count)
 
-        strokew = (self.width()) / (len(self.frame_times))
-        print(strokew)
+        strokew = (self.width()) / count
 
         gradient = QLinearGradient(0, 0, 0, self.height())
         gradient.setColorAt(1, Qt.green)
@@ -45,9 +46,9 @@ class FrameTimeWidget(QWidget):
         pen = QPen(gradient, strokew)
         painter.setPen(pen)
 
-        max_time = max(self.max_time, 50)
-        for i, frame_time in enumerate(self.frame_times):
-            x = (i / (len(self.frame_times))) * self.width()
+        max_time = max(stats.peak, 50)
+        for i, frame_time in enumerate(stats.values(count)):
+            x = (i / count) * self.width()
             y = self.height() - int((frame_time /(max_time)) * self.height())
 
 
@@ -60,10 +61,9 @@ class FrameTimeWidget(QWidget):
         font.setBold(1)  # Example: Arial font, size 10
         painter.setFont(font)
 
-        max_ = max(self.frame_times)
-        avg_ = sum(self.frame_times) / len(self.frame_times)
-        painter.drawText(1,10, f"max:{max_:.1f}ms")
-        painter.drawText(1,20, f"avg:{avg_:.1f}ms")
+        painter.drawText(1,10, f"max:{stats.max:.1f}ms")
+        painter.drawText(1,20, f"avg:{stats.mean:.1f}ms")
+        painter.drawText(1,30, f"p99:{stats.percentile(99):.1f}ms")
 
 
 if __name__ == '__main__':
@@ -49,7 +49,8 @@ import select
 import logging
 import sys
 
-import winreg
+if sys.platform == "win32":
+    import winreg
 import socket
 import time
 import zlib
@@ -67,7 +68,8 @@ from PyQt5.QtWidgets import QFileDialog, QMessageBox
 import stransi
 
 import telemffb.globals as G
-import telemffb.winpaths as winpaths
+if sys.platform == "win32":
+    import telemffb.winpaths as winpaths
 import telemffb.xmlutils as xmlutils
 
 def dbprint(color, msg, instance=None):
@@ -302,6 +304,8 @@ class Vector2D:
 
 
 class Vector:
+    __slots__ = ("x", "y", "z")
+
     def __init__(self, x, y=0.0, z=0.0):
         self.x : float
         self.y : float
@@ -418,6 +422,64 @@ class Vector:
         )
 
 
+
+class Rotation:
+    """
+    3x3 rotation matrix applied to plain (x, y, z) values, no Vector objects are created
+
+    set_world_to_body() fuses the heading, pitch and roll rotations (Vector.rotY, rotX and rotZ with the
+    negated angles) into a single matrix, so sin/cos are computed once per frame and rotating a vector
+    costs 9 multiplications.
+    """
+    __slots__ = ("m00", "m01", "m02", "m10", "m11", "m12", "m20", "m21", "m22")
+
+    def __init__(self):
+        self.set_identity()
+
+    def set_identity(self):
+        self.m00, self.m01, self.m02 = 1.0, 0.0, 0.0
+        self.m10, self.m11, self.m12 = 0.0, 1.0, 0.0
+        self.m20, self.m21, self.m22 = 0.0, 0.0, 1.0
+
+    def set_world_to_body(self, heading, pitch, roll):
+        """
+        Sets the rotation from the sim world frame into the aircraft body frame
+
+        :param heading: radians
+        :param pitch: radians
+        :param roll: radians
+        """
+        sh = math.sin(heading)
+        ch = math.cos(heading)
+        sp = math.sin(pitch)
+        cp = math.cos(pitch)
+        sr = math.sin(roll)
+        cr = math.cos(roll)
+        sp_sh = sp * sh
+        sp_ch = sp * ch
+        self.m00 = cr * ch + sr * sp_sh
+        self.m01 = sr * cp
+        self.m02 = sr * sp_ch - cr * sh
+        self.m10 = cr * sp_sh - sr * ch
+        self.m11 = cr * cp
+        self.m12 = sr * sh + cr * sp_ch
+        self.m20 = cp * sh
+        self.m21 = -sp
+        self.m22 = cp * ch
+
+    def apply(self, x, y, z) -> tuple:
+        """:return: the rotated vector as (x, y, z)"""
+        return (self.m00 * x + self.m01 * y + self.m02 * z,
+                self.m10 * x + self.m11 * y + self.m12 * z,
+                self.m20 * x + self.m21 * y + self.m22 * z)
+
+    def apply_inverse(self, x, y, z) -> tuple:
+        """Rotates by the transposed matrix, e.g. from the body frame back into the world frame"""
+        return (self.m00 * x + self.m10 * y + self.m20 * z,
+                self.m01 * x + self.m11 * y + self.m21 * z,
+                self.m02 * x + self.m12 * y + self.m22 * z)
+
+
 def archive_logs(directory):
     today = datetime.today().strftime('%Y%m%d')
 
@@ -643,6 +705,8 @@ class SystemSettings(QSettings):
         'startHeadlessJoystick': False,
         'startHeadlessPedals': False,
         'startHeadlessCollective': False,
+        'configPollInterval': 1000,  # ms, only used when the OS has no file change notification backend
+        'telemRefreshInterval': 50,  # ms, refresh interval of the telemetry display
         'debug': False,  # debug is False by default.  To permanently enable the debug menu, manually set debug = true (1) in registry
     }
 
@@ -1802,6 +1866,8 @@ def load_custom_userconfig(new_path=""):
     )
     # reinitialize table from new config
     G.settings_mgr.init_ui()
+    if G.telem_manager:
+        G.telem_manager.watch_config_files()
 
     logging.info(f"Custom Configuration was loaded via debug menu: {G.userconfig_path}")
     if G.master_instance and G.launched_instances:
@@ -0,0 +1,173 @@
+#
+# This file is part of the TelemFFB distribution (https://github.com/walmis/TelemFFB).
+# Copyright (c) 2023 Valmantas Palikša.
+# Copyright (c) 2023 Micah Frisby
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+
+def file_stamp(file_path) -> Optional[Tuple[int, int]]:
+    """
+    Returns a (mtime_ns, size) tuple identifying the current version of a file.
+
+    :param file_path: Path to the file.
+    :return: Stamp tuple or None if the file does not exist.
+    """
+    try:
+        st = os.stat(file_path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+class ModelPatternIndex:
+    """
+    Precompiled set of aircraft model patterns.
+
+    Each distinct ``<model>`` regex is compiled once.  Matching an aircraft name evaluates every distinct
+    pattern a single time and the resulting set of matching patterns is kept in a small LRU, so repeated
+    lookups for the same aircraft do no regex work at all.
+    """
+
+    def __init__(self, patterns: Iterable[str], lru_size=32):
+        self._compiled = []
+        for pattern in dict.fromkeys(p for p in patterns if p is not None):
+            try:
+                self._compiled.append((pattern, re.compile(pattern)))
+            except re.error as e:
+                # treat it as a literal aircraft name rather than failing the whole lookup
+                logging.warning(f"Invalid model pattern '{pattern}': {e}")
+                self._compiled.append((pattern, None))
+        self._lru_size = lru_size
+        self._lru: OrderedDict[str, FrozenSet[str]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._compiled)
+
+    def matching(self, model_name: str) -> FrozenSet[str]:
+        """
+        Returns the patterns matching model_name, using the same rule as the settings lookup:
+        ``re.match(pattern, model_name) or pattern == model_name``
+
+        :param model_name: Full aircraft name as reported by the sim
+        :return: frozenset of matching pattern strings
+        """
+        with self._lock:
+            result = self._lru.get(model_name)
+            if result is not None:
+                self._lru.move_to_end(model_name)
+                return result
+
+        result = frozenset(pattern for pattern, rx in self._compiled
+                           if pattern == model_name or (rx is not None and rx.match(model_name)))
+
+        with self._lock:
+            self._lru[model_name] = result
+            if len(self._lru) > self._lru_size:
+                self._lru.popitem(last=False)
+        return result
+
+
+class XmlIndex:
+    """
+    In-memory representation of a flat TelemFFB xml config file.
+
+    Every top level element (``<defaults>``, ``<models>``, ``<classdefaults>`` ...) is stored as a plain
+    ``{child_tag: child_text}`` dict, grouped by element tag and kept in document order.  Lookups done on
+    the index give the same results as the equivalent ``root.findall('.//tag[child="value"]')`` query
+    without walking the element tree.
+    """
+
+    def __init__(self, root=None, stamp=None):
+        self.stamp = stamp
+        self.sections: Dict[str, List[dict]] = {}
+        if root is not None:
+            for elem in root:
+                record = {}
+                for child in elem:
+                    # xpath predicates and find() both use the first matching child
+                    record.setdefault(child.tag, child.text)
+                self.sections.setdefault(elem.tag, []).append(record)
+        self._patterns = None
+
+    @property
+    def patterns(self) -> ModelPatternIndex:
+        """Pattern index over all ``<models>`` and ``<sc_overrides>`` model patterns in this file"""
+        if self._patterns is None:
+            self._patterns = ModelPatternIndex(rec.get('model') for tag in ('models', 'sc_overrides')
+                                               for rec in self.records(tag))
+        return self._patterns
+
+    def records(self, tag) -> List[dict]:
+        return self.sections.get(tag, [])
+
+    def select(self, tag, **criteria) -> List[dict]:
+        """
+        Returns all records of the given element tag whose children match all criteria.
+
+        :param tag: Element tag, e.g. 'models'
+        :param criteria: child_tag=text pairs that must all match
+        :return: list of matching records in document order
+        """
+        items = criteria.items()
+        return [rec for rec in self.sections.get(tag, []) if all(rec.get(k) == v for k, v in items)]
+
+
+class XmlIndexCache:
+    """
+    Keeps one parsed :class:`XmlIndex` per file path.  A file is re-parsed only when its
+    modification time or size changes, or when it is explicitly invalidated after a write.
+    """
+
+    def __init__(self, parser):
+        """
+        :param parser: callable taking a file path and returning an ElementTree or None on failure
+        """
+        self._parser = parser
+        self._lock = threading.Lock()
+        self._indexes: Dict[str, XmlIndex] = {}
+
+    def get(self, file_path) -> XmlIndex:
+        stamp = file_stamp(file_path)
+        with self._lock:
+            index = self._indexes.get(file_path)
+            if index is not None and stamp is not None and index.stamp == stamp:
+                return index
+
+            tree = self._parser(file_path)
+            if tree is None:
+                if index is not None:
+                    # keep serving the last good version, the file may be mid-write by another instance
+                    logging.warning(f"Unable to parse {file_path}, using previously loaded configuration")
+                    return index
+                return XmlIndex()
+
+            index = XmlIndex(tree.getroot(), stamp)
+            self._indexes[file_path] = index
+            return index
+
+    def invalidate(self, file_path=None):
+        with self._lock:
+            if file_path is None:
+                self._indexes.clear()
+            else:
+                self._indexes.pop(file_path, None)
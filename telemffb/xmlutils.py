@@ -23,7 +23,11 @@ import time
 import xml.etree.ElementTree as ET
 import os
 import re
+import threading
 import xml.dom.minidom
+from dataclasses import dataclass, field
+
+from telemffb.xmlindex import XmlIndexCache, file_stamp
 
 
 print_debugs = False
@@ -73,7 +77,165 @@ def try_parse(file_path, max_attempts=3, delay=0.1):
 
 def write_userconfig_xml(tree : ET.ElementTree):
     ET.indent(tree, " ")
-    tree.write(userconfig_path, "utf-8")
+    with config_changes.lock:
+        tree.write(userconfig_path, "utf-8")
+        invalidate_cache(userconfig_path)
+        # the recorded names and the stamp of the file containing them become visible together
+        config_changes.publish(file_stamp(userconfig_path))
+
+
+@dataclass
+class ConfigChanges:
+    """Settings written to userconfig.xml by this process since the last :func:`pop_config_changes`"""
+    names: set = field(default_factory=set)
+    sc_overrides: bool = False
+    userconfig_stamp: tuple = None
+
+    def keys_to_compare(self, params, current):
+        """
+        Returns the names of the settings in params that may differ from the current config.
+
+        Only written settings can change, plus any that became visible through a prereq.  Switching
+        the telemffb_profile changes every setting of the old and the new profile without writing
+        them, so all settings have to be compared.
+
+        :param params: freshly resolved settings
+        :param current: settings currently applied
+        :return: set of names, or None to compare all of them
+        """
+        if 'telemffb_profile' in self.names:
+            return None
+        return self.names | (params.keys() - current.keys())
+
+
+class ConfigChangeLog:
+    """
+    Collects the settings written by the xml writers (UI thread) for the telemetry thread.
+
+    Names are recorded before a write and published together with the stamp of the written file,
+    so a pop in between never sees a name without the file that contains it.
+    """
+    def __init__(self):
+        # held by write_userconfig_xml across the write and the publish
+        self.lock = threading.RLock()
+        self._pending = ConfigChanges()
+        self._published = ConfigChanges()
+        self._defaults_stamp = None
+
+    def record(self, setting_name=None, sc_override=False):
+        with self.lock:
+            if setting_name is not None:
+                self._pending.names.add(setting_name)
+            self._pending.sc_overrides |= sc_override
+
+    def publish(self, userconfig_stamp):
+        with self.lock:
+            self._published.names |= self._pending.names
+            self._published.sc_overrides |= self._pending.sc_overrides
+            self._published.userconfig_stamp = userconfig_stamp
+            self._pending = ConfigChanges()
+
+    def pop(self, userconfig_stamp, defaults_stamp):
+        """
+        :param userconfig_stamp: stamp of userconfig.xml as it is on disk now
+        :param defaults_stamp: stamp of defaults.xml as it is on disk now
+        :return: ConfigChanges or None if the files were changed by anything but :meth:`publish`
+        """
+        with self.lock:
+            changes = self._published
+            self._published = ConfigChanges()
+            defaults_unchanged = self._defaults_stamp is not None and defaults_stamp == self._defaults_stamp
+            self._defaults_stamp = defaults_stamp
+
+        if not defaults_unchanged or changes.userconfig_stamp is None \
+                or changes.userconfig_stamp != userconfig_stamp:
+            return None
+        return changes
+
+
+config_changes = ConfigChangeLog()
+
+
+def record_config_change(setting_name=None, sc_override=False):
+    """
+    Notes a setting that is about to be written.  It is added to the change-set by the next
+    :func:`write_userconfig_xml`, together with the stamp of the file that contains it.
+    """
+    config_changes.record(setting_name, sc_override)
+
+
+def pop_config_changes():
+    """
+    Returns the change-set recorded by the xml writers of this process and starts a new one.
+
+    The change-set is only trustworthy if the config files on disk are exactly what this process
+    last wrote.  If another instance (or an editor) touched userconfig.xml or defaults.xml, None is
+    returned and the caller has to assume anything may have changed.
+
+    :return: ConfigChanges or None
+    """
+    return config_changes.pop(file_stamp(userconfig_path), file_stamp(defaults_path))
+
+
+# parsed and indexed xml files, re-read only when the file on disk changes
+_xml_cache = XmlIndexCache(try_parse)
+
+# fully resolved read_single_model results, used from the UI and the telemetry thread
+_resolved_models = {}
+_resolved_models_max = 64
+_resolved_models_lock = threading.Lock()
+
+
+def load_index(file_path):
+    """
+    Returns the indexed contents of an xml config file, parsing it only if it changed since the last call.
+
+    :param file_path: Path to the XML file.
+    :return: XmlIndex
+    """
+    return _xml_cache.get(file_path)
+
+
+def model_pattern_index(file_path=None):
+    """
+    Returns the precompiled model pattern index of a config file.
+
+    :param file_path: XML file, defaults to userconfig.xml
+    :return: ModelPatternIndex
+    """
+    if file_path is None:
+        file_path = userconfig_path
+    return load_index(file_path).patterns
+
+
+def match_model_patterns(full_model_name, file_path=None):
+    """
+    Returns the set of ``<model>`` patterns in a config file that match an aircraft name.
+
+    :param full_model_name: Aircraft name as reported by the sim
+    :param file_path: XML file, defaults to userconfig.xml
+    :return: frozenset of pattern strings
+    """
+    return model_pattern_index(file_path).matching(full_model_name)
+
+
+def invalidate_cache(file_path=None):
+    """
+    Drops cached xml data so that the next read goes to disk.
+
+    :param file_path: File to invalidate, None invalidates everything.
+    """
+    _xml_cache.invalidate(file_path)
+    with _resolved_models_lock:
+        _resolved_models.clear()
+
+
+def _select_sim_device(index, tag, the_sim, the_device):
+    # equivalent of the sim/device, any/device, sim/any, any/any findall() chain
+    return index.select(tag, sim=the_sim, device=the_device) + \
+           index.select(tag, sim="any", device=the_device) + \
+           index.select(tag, sim=the_sim, device="any") + \
+           index.select(tag, sim="any", device="any")
 
 
 def update_vars(_device, _userconfig_path, _defaults_path):
@@ -85,8 +247,7 @@ def update_vars(_device, _userconfig_path, _defaults_path):
 
 def read_xml_file(the_sim, instance_device=''):
     mprint(f"read_xml_file  {the_sim}")
-    tree = try_parse(defaults_path)
-    root = tree.getroot()
+    index = load_index(defaults_path)
 
     if instance_device == '':
         the_device = device
@@ -95,44 +256,27 @@ def read_xml_file(the_sim, instance_device=''):
 
     # Collect data in a list of dictionaries
     data_list = []
-    for defaults_elem in root.findall(f'.//defaults[{the_sim}="true"][{the_device}="true"]'):
-
-        grouping = defaults_elem.find('Grouping').text
-        order = defaults_elem.find('order').text
-        name = defaults_elem.find('name').text
-        displayname = defaults_elem.find('displayname').text
-        datatype = defaults_elem.find('datatype').text
-        unit_elem = defaults_elem.find('unit')
-        unit = unit_elem.text if unit_elem is not None else ""
-        value_elem = defaults_elem.find('value')
-        value = value_elem.text if value_elem is not None else ""
+    for rec in index.select('defaults', **{the_sim: "true", the_device: "true"}):
+
+        value = rec.get('value', "")
         if value is None: value = ""
-        valid_elem = defaults_elem.find('validvalues')
-        validvalues = valid_elem.text if valid_elem is not None else ""
-        info_elem = defaults_elem.find('info')
-        info = (f"{info_elem.text}") if info_elem is not None else ""
-        prereq_elem = defaults_elem.find('prereq')
-        prereq = (f"{prereq_elem.text}") if prereq_elem is not None else ""
-        sliderfactor_elem = defaults_elem.find('sliderfactor')
-        sliderfactor = (f"{sliderfactor_elem.text}") if sliderfactor_elem is not None else "1"
-        device_elem = defaults_elem.find('any')
-        device_text = 'any' if device_elem is not None else device
+        device_text = 'any' if 'any' in rec else device
         replaced = 'Sim Default'
 
         # Store data in a dictionary
         data_dict = {
-            'grouping': grouping,
-            'order': order,
-            'name': name,
-            'displayname': displayname,
+            'grouping': rec.get('Grouping'),
+            'order': rec.get('order'),
+            'name': rec.get('name'),
+            'displayname': rec.get('displayname'),
             'value': value,
-            'unit': unit,
-            'datatype': datatype,
-            'validvalues': validvalues,
+            'unit': rec.get('unit', ""),
+            'datatype': rec.get('datatype'),
+            'validvalues': rec.get('validvalues', ""),
             'replaced': replaced,
-            'prereq': prereq,
-            'info': info,
-            'sliderfactor': sliderfactor,
+            'prereq': f"{rec['prereq']}" if 'prereq' in rec else "",
+            'info': f"{rec['info']}" if 'info' in rec else "",
+            'sliderfactor': f"{rec['sliderfactor']}" if 'sliderfactor' in rec else "1",
             'device_text': device_text
         }
 
@@ -149,56 +293,32 @@ def read_xml_file(the_sim, instance_device=''):
 
 def read_anydevice_settings(the_sim):
 
-    tree = try_parse(defaults_path)
-    root = tree.getroot()
+    index = load_index(defaults_path)
 
     # Collect data in a list of dictionaries
     data_list = []
-    for defaults_elem in root.findall(f'.//defaults[{the_sim}="true"][any="true"]'):
-
-        name_elem = defaults_elem.find('name')
-        if name_elem is not None:
-            name = name_elem.text
-            data_list.append(name)
+    for rec in index.select('defaults', **{the_sim: "true", "any": "true"}):
+        if 'name' in rec:
+            data_list.append(rec['name'])
 
     return data_list
 
 
 def read_models(the_sim, the_class=''):
     all_models = ['']
-    tree = try_parse(defaults_path)
-    root = tree.getroot()
-    if the_class == '':
-        def_models =  root.findall(f'.//models[sim="{the_sim}"][device="{device}"]') + \
-                      root.findall(f'.//models[sim="any"][device="{device}"]') + \
-                      root.findall(f'.//models[sim="{the_sim}"][device="any"]') + \
-                      root.findall(f'.//models[sim="any"][device="any"]')
-    else:
-        def_models = root.findall(f'.//models[sim="{the_sim}"][value="{the_class}"]')
-
-    for model_elem in def_models:
-        pattern = model_elem.find('model')
-        # lprint (pattern.text)
-        if pattern is not None:
-            if pattern.text not in all_models:
-                all_models.append(pattern.text)
-
     # create_empty_userxml_file() - handled by TelemFFB on startup via utils.py
-    tree = try_parse(userconfig_path)
-    root = tree.getroot()
-    if the_class == '':
-        usr_models =  root.findall(f'.//models[sim="{the_sim}"][device="{device}"]') + \
-                      root.findall(f'.//models[sim="any"][device="{device}"]') + \
-                      root.findall(f'.//models[sim="{the_sim}"][device="any"]') + \
-                      root.findall(f'.//models[sim="any"][device="any"]')
-    else:
-        usr_models = root.findall(f'.//models[sim="{the_sim}"][value="{the_class}"]')
-    for model_elem in usr_models:
-        pattern = model_elem.find('model')
-        # lprint (pattern.text)
-        if pattern is not None:
-            if pattern.text not in all_models:
-                all_models.append(pattern.text)
+    for file_path in (defaults_path, userconfig_path):
+        index = load_index(file_path)
+        if the_class == '':
+            models = _select_sim_device(index, 'models', the_sim, device)
+        else:
+            models = index.select('models', sim=the_sim, value=the_class)
+
+        for rec in models:
+            # lprint (pattern)
+            if 'model' in rec:
+                if rec['model'] not in all_models:
+                    all_models.append(rec['model'])
 
     return sorted(all_models)
 
@@ -206,8 +326,7 @@ def read_models(the_sim, the_class=''):
 def read_models_data(file_path, sim, full_model_name, alldevices=False, instance_device = ''):
     mprint(f"read_models_data  {file_path}, {sim}, {full_model_name}")
     # runs on both defaults and userconfig xml files
-    tree = try_parse(file_path)
-    root = tree.getroot()
+    index = load_index(file_path)
 
     model_data = []
     found_pattern = ''
@@ -218,109 +337,84 @@ def read_models_data(file_path, sim, full_model_name, alldevices=False, instance
         the_device = instance_device
 
     if alldevices:
-        # Iterate through models elements
-        #for model_elem in root.findall(f'.//models[sim="{self.sim}"][device="{device}"]'):
-        any_models = root.findall(f'.//models[sim="any"]')
+        any_models = index.select('models', sim="any")
 
-        all_models = root.findall(f'.//models[sim="{sim}"]') 
+        all_models = index.select('models', sim=sim)
 
     else:
         # Collect models with 'device' set to 'any' or both 'sim' and 'device' set to 'any'
-        any_models = root.findall(f'.//models[sim="{sim}"][device="any"]') + \
-                     root.findall(f'.//models[sim="any"][device="any"]')
+        any_models = index.select('models', sim=sim, device="any") + \
+                     index.select('models', sim="any", device="any")
 
         # Collect models with specific devices
-        all_models = root.findall(f'.//models[sim="{sim}"][device="{the_device}"]') + \
-                     root.findall(f'.//models[sim="any"][device="{the_device}"]')
+        all_models = index.select('models', sim=sim, device=the_device) + \
+                     index.select('models', sim="any", device=the_device)
 
-        # Create a dictionary to store models based on unique keys
+    # Create a dictionary to store models based on unique keys
     model_dict = {}
 
     # Process any_models
-    for model_elem in any_models:
-        model_key = (model_elem.find('model').text, model_elem.find('name').text)
-        model_dict[model_key] = model_elem
+    for rec in any_models:
+        model_dict[(rec['model'], rec['name'])] = rec
 
     # Process all_models, overwriting any existing models with the same key
-    for model_elem in all_models:
-        model_key = (model_elem.find('model').text, model_elem.find('name').text)
-        model_dict[model_key] = model_elem
+    for rec in all_models:
+        model_dict[(rec['model'], rec['name'])] = rec
+
+    matched_patterns = index.patterns.matching(full_model_name)
 
     # Process the models
-    for model_elem in model_dict.values():
-        # Assuming 'model' is the element containing the wildcard pattern
-
-        unit_pattern = model_elem.find('model')
-        if unit_pattern is not None:
-            pattern = unit_pattern.text
-            if pattern is not None:
-                # Check if the full_model_name matches the pattern using re.match
-                if re.match(pattern, full_model_name) or pattern == full_model_name:
-                    name = model_elem.find('name').text
-                    value = model_elem.find('value').text
-                    unit_elem = model_elem.find('unit')
-                    unit = unit_elem.text if unit_elem is not None else ""
-                    saved_device = model_elem.find('device').text
-                    model_dict = {
-                        'name': name,
-                        'value': value,
-                        'unit': unit,
-                        'device': saved_device
-                    }
-                    found_pattern = pattern
-                    model_data.append(model_dict)
-                else:
-                    lprint (f"{pattern} does not match {full_model_name}")
+    for rec in model_dict.values():
+        # 'model' holds the wildcard pattern
+        pattern = rec['model']
+        if pattern is not None:
+            if pattern in matched_patterns:
+                model_data.append({
+                    'name': rec['name'],
+                    'value': rec['value'],
+                    'unit': rec.get('unit', ""),
+                    'device': rec['device']
+                })
+                found_pattern = pattern
+            else:
+                lprint (f"{pattern} does not match {full_model_name}")
 
     return model_data, found_pattern
 
 def read_models_from_tffbprofile(the_sim, profilename, pattern):
-    all_models = ['']
     model_data = []
-    profileRootPath = os.path.join(os.environ['LOCALAPPDATA'], "VPForce-TelemFFB")
-    profile_path = os.path.join(profileRootPath, profilename + '.tffbprofile')
     try:
-        tree = try_parse(profile_path)
-        root = tree.getroot()
-
-        usr_models =  root.findall(f'.//models[sim="{the_sim}"][device="{device}"]') + \
-                      root.findall(f'.//models[sim="any"][device="{device}"]') + \
-                      root.findall(f'.//models[sim="{the_sim}"][device="any"]') + \
-                      root.findall(f'.//models[sim="any"][device="any"]')
+        index = load_index(tffbprofile_path(profilename))
 
+        usr_models = _select_sim_device(index, 'models', the_sim, device)
 
         # Create a dictionary to store models based on unique keys
         model_dict = {}
 
         # Process any_models
-        for model_elem in usr_models:
-            model_key = (model_elem.find('model').text, model_elem.find('name').text)
-            model_dict[model_key] = model_elem
+        for rec in usr_models:
+            model_dict[(rec['model'], rec['name'])] = rec
 
         # Process the models
-        for model_elem in model_dict.values():
-            # Assuming 'model' is the element containing the wildcard pattern
-
-            name = model_elem.find('name').text
-            value = model_elem.find('value').text
-            unit_elem = model_elem.find('unit')
-            unit = unit_elem.text if unit_elem is not None else ""
-            saved_device = model_elem.find('device').text
-            model_dict = {
+        for rec in model_dict.values():
+            model_data.append({
                 'model': pattern,
-                'name': name,
-                'value': value,
-                'unit': unit,
-                'device': saved_device
-            }
-            found_pattern = pattern
-            model_data.append(model_dict)
+                'name': rec['name'],
+                'value': rec['value'],
+                'unit': rec.get('unit', ""),
+                'device': rec['device']
+            })
 
     except:
         logging.warning("Couldn't load profile " + profilename)
 
     return model_data
 
+
+def tffbprofile_path(profilename):
+    profileRootPath = os.path.join(os.getenv('LOCALAPPDATA', ''), "VPForce-TelemFFB")
+    return os.path.join(profileRootPath, profilename + '.tffbprofile')
+
 def read_sc_overrides(aircraft_name):
     def_model_overrides = read_models_sc_overrides(defaults_path, aircraft_name, 'defaults')
     user_model_overrides = read_models_sc_overrides(userconfig_path, aircraft_name, 'user')
@@ -332,40 +426,26 @@ def read_models_sc_overrides(file_path, full_model_name, source):
     mprint(f"read_models_overrides  {file_path}, {full_model_name}")
     # runs on both defaults and userconfig xml files
     #pass 'all' to get all of them
-    tree = try_parse(file_path)
-    root = tree.getroot()
+    index = load_index(file_path)
 
     model_overrides = []
-
-    all_models = root.findall(f'.//sc_overrides')
+    matched_patterns = index.patterns.matching(full_model_name)
 
     # Iterate through models elements
-    for model_elem in all_models:
-        # Assuming 'model' is the element containing the wildcard pattern
-
-        unit_pattern = model_elem.find('model')
-        if unit_pattern is not None:
-            pattern = unit_pattern.text
-            if pattern is not None:
-                # Check if the full_model_name matches the pattern using re.match
-                if re.match(pattern, full_model_name) or pattern == full_model_name:
-                    name = model_elem.find('name').text
-                    var = model_elem.find('var').text
-                    sc_unit_elem = model_elem.find('sc_unit')
-                    sc_unit = sc_unit_elem.text if sc_unit_elem is not None else ""
-                    scale_elem = model_elem.find('scale')
-                    scale = float(scale_elem.text) if scale_elem is not None else None
-
-                    model_dict = {
-                        'name': name,
-                        'var': var,
-                        'sc_unit': sc_unit,
-                        'scale': scale,
-                        'source': source
-                    }
-                    model_overrides.append(model_dict)
-                else:
-                    lprint (f"{pattern} does not match {full_model_name}")
+    for rec in index.records('sc_overrides'):
+        # 'model' holds the wildcard pattern
+        pattern = rec.get('model')
+        if pattern is not None:
+            if pattern in matched_patterns:
+                model_overrides.append({
+                    'name': rec['name'],
+                    'var': rec['var'],
+                    'sc_unit': rec.get('sc_unit', ""),
+                    'scale': float(rec['scale']) if 'scale' in rec else None,
+                    'source': source
+                })
+            else:
+                lprint (f"{pattern} does not match {full_model_name}")
 
     return model_overrides
 
@@ -403,6 +483,7 @@ def update_sc_overrides_with_user(defaults_ovr, user_ovr):
 def erase_sc_override_from_xml(the_model, setting_name):
     mprint(f"erase_override_from_xml   {the_model}, {setting_name}")
     # Load the existing XML file or create a new one if it doesn't exist
+    record_config_change(sc_override=True)
     tree = try_parse(userconfig_path)
     root = tree.getroot()
 
@@ -426,6 +507,7 @@ def erase_sc_override_from_xml(the_model, setting_name):
 def write_sc_override_to_xml(the_model, the_var, setting_name, sc_unit='', scale=''):
     mprint(f"write_overrides_to_xml  {the_model}, {the_var}, {setting_name}, {scale}")
     # Load the existing XML file or create a new one if it doesn't exist
+    record_config_change(sc_override=True)
     tree = try_parse(userconfig_path)
     root = tree.getroot()
     ovr_elem = None
@@ -494,45 +576,86 @@ def write_sc_override_to_xml(the_model, the_var, setting_name, sc_unit='', scale
 
 def read_default_class_data(the_sim, the_class, instance_device=''):
     mprint(f"read_default_class_data  sim {the_sim}, class {the_class}")
-    tree = try_parse(defaults_path)
-    root = tree.getroot()
+    index = load_index(defaults_path)
 
     class_data = []
     if instance_device == '':
         the_device = device
     else:
         the_device = instance_device
-    # Iterate through models elements
-    #for model_elem in root.findall(f'.//classdefaults[sim="{the_sim}"][type="{the_class}"][device="{device}"]'):
-    #for model_elem in root.findall(f'.//classdefaults[sim="{the_sim}"][type="{the_class}"][device="{device}"]'):
-    for model_elem in root.findall(f'.//classdefaults[sim="{the_sim}"][type="{the_class}"][device="{the_device}"]') + \
-                      root.findall(f'.//classdefaults[sim="any"][type="{the_class}"][device="{the_device}"]') + \
-                      root.findall(f'.//classdefaults[sim="{the_sim}"][type="{the_class}"][device="any"]') + \
-                      root.findall(f'.//classdefaults[sim="any"][type="{the_class}"][device="any"]'):
-
-        if model_elem.find('name') is not None:
-
-            name = model_elem.find('name').text
-            value = model_elem.find('value').text
-            unit_elem = model_elem.find('unit')
-            unit = unit_elem.text if unit_elem is not None else ""
-
-            model_dict = {
-                'name': name,
-                'value': value,
-                'unit': unit,
-                'replaced': 'Class Default'
-            }
 
-            class_data.append(model_dict)
+    for rec in _select_sim_device(index, 'classdefaults', the_sim, the_device):
+        if rec.get('type') != the_class:
+            continue
+
+        if 'name' in rec:
+            class_data.append({
+                'name': rec['name'],
+                'value': rec['value'],
+                'unit': rec.get('unit', ""),
+                'replaced': 'Class Default'
+            })
 
     return class_data
 
 
 def read_single_model( the_sim, aircraft_name, input_modeltype = '', instance_device = ''):
-    logging.info (f"Reading from XML:  Sim: {the_sim}, Aircraft name: {aircraft_name}, Class: {input_modeltype}")
+    """
+    Resolves the layered settings for one aircraft.  Results are cached and reused until any of
+    the xml files that contributed to them changes on disk.
 
-    time.sleep(0.1)
+    :return: (model_class, model_pattern, sorted_data) - sorted_data is a fresh copy owned by the caller
+    """
+    key = (the_sim, aircraft_name, input_modeltype, instance_device, device, defaults_path, userconfig_path)
+    with _resolved_models_lock:
+        cached = _resolved_models.get(key)
+    if cached is not None:
+        files, stamps, model_class, model_pattern, data = cached
+        if stamps == tuple(file_stamp(f) for f in files):
+            lprint(f"read_single_model cache hit: {the_sim}, {aircraft_name}")
+            return model_class, model_pattern, [dict(item) for item in data]
+
+    files = [defaults_path, userconfig_path]
+    stamps = tuple(file_stamp(f) for f in files)
+    model_class, model_pattern, data = _resolve_single_model(the_sim, aircraft_name, input_modeltype, instance_device, files)
+    # stamps taken before resolving, so a file changing mid-read will cause a re-read next time
+    stamps += tuple(file_stamp(f) for f in files[2:])
+
+    entry = (tuple(files), stamps, model_class, model_pattern, [dict(item) for item in data])
+    with _resolved_models_lock:
+        if key not in _resolved_models and len(_resolved_models) >= _resolved_models_max:
+            _resolved_models.pop(next(iter(_resolved_models)))
+        _resolved_models[key] = entry
+
+    return model_class, model_pattern, data
+
+
+def model_settings_to_params(settings) -> dict:
+    """
+    Converts the settings list returned by read_single_model into the ``{name: value+unit}`` dict
+    that is passed (after utils.sanitize_dict) to Aircraft.apply_settings.  Blank ('-') settings are skipped.
+    """
+    params = {}
+    for setting in settings:
+        k = setting['name']
+        v = setting['value']
+        u = setting['unit']
+        if v is None:
+            v = '0'
+        if u is not None:
+            vu = v + u
+        else:
+            vu = v
+        if setting['value'] != '-':
+            params[k] = vu
+            logging.debug(f"Got from Settings Manager: {k} : {vu}")
+        else:
+            logging.debug(f"Ignoring blank setting from Settings Manager: {k} : {vu}")
+    return params
+
+
+def _resolve_single_model(the_sim, aircraft_name, input_modeltype, instance_device, files):
+    logging.info (f"Reading from XML:  Sim: {the_sim}, Aircraft name: {aircraft_name}, Class: {input_modeltype}")
 
     print_counts = False
     print_each_step = False  # for debugging
@@ -645,6 +768,7 @@ def read_single_model( the_sim, aircraft_name, input_modeltype = '', instance_de
     for item in final_result:
         if item['name'] == 'telemffb_profile':
             profilename = item['value']
+            files.append(tffbprofile_path(profilename))
             profile_list = read_models_from_tffbprofile(the_sim,profilename,model_pattern )
             final_result = update_data_with_models(final_result, profile_list, 'Model (profile)')
 
@@ -661,74 +785,47 @@ def read_single_model( the_sim, aircraft_name, input_modeltype = '', instance_de
 
 def read_user_sim_data(the_sim, instance_device=''):
     mprint(f"read_user_sim_data {the_sim}")
-    tree = try_parse(userconfig_path)
-    root = tree.getroot()
+    index = load_index(userconfig_path)
 
     sim_data = []
     if instance_device == '':
         the_device = device
     else:
         the_device = instance_device
-    # Iterate through models elements
-    # for model_elem in root.findall(f'.//simSettings[sim="{the_sim}" or sim="any"][device="{device}" or device="any"]'):
-    for model_elem in root.findall(f'.//simSettings[sim="{the_sim}"][device="{the_device}"]') + \
-                       root.findall(f'.//simSettings[sim="any"][device="{the_device}"]') + \
-                       root.findall(f'.//simSettings[sim="{the_sim}"][device="any"]')  + \
-                       root.findall(f'.//simSettings[sim="any"][device="any"]'):
-
-        if model_elem.find('name') is not None:
-
-            name = model_elem.find('name').text
-            value = model_elem.find('value').text
-            unit_elem = model_elem.find('unit')
-            unit = unit_elem.text if unit_elem is not None else ""
-            replaced = 'Sim (user)'
-            model_dict = {
-                'name': name,
-                'value': value,
-                'unit': unit,
-                'replaced': replaced
-            }
-
-            sim_data.append(model_dict)
+
+    for rec in _select_sim_device(index, 'simSettings', the_sim, the_device):
+        if 'name' in rec:
+            sim_data.append({
+                'name': rec['name'],
+                'value': rec['value'],
+                'unit': rec.get('unit', ""),
+                'replaced': 'Sim (user)'
+            })
 
     return sim_data
 
 def read_user_class_data(the_sim, crafttype, instance_device=''):
     mprint(f"read_user_class_data  {the_sim}, {crafttype}")
-    tree = try_parse(userconfig_path)
-    root = tree.getroot()
+    index = load_index(userconfig_path)
 
     model_data = []
     if instance_device == '':
         the_device = device
     else:
         the_device = instance_device
-    # Iterate through models elements
-    #for model_elem in root.findall(f'.//models[sim="{the_sim}"][device="{device}"]'):
-    for model_elem in root.findall(f'.//classSettings[sim="{the_sim}"][device="{the_device}"]'):     # + \
-                      # root.findall(f'.//classSettings[sim="any"][device="{device}"]') + \
-                      # root.findall(f'.//classSettings[sim="{the_sim}"][device="any"]') + \
-                      # root.findall(f'.//classSettings[sim="any"][device="any"]'):
-        if model_elem.find('type') is not None:
-            # Assuming 'model' is the element containing the wildcard pattern
-            pattern = model_elem.find('type').text
-
-            if pattern is not None:
-                # Check if the craft type matches the pattern using re match
-                if re.match(pattern, crafttype):
-                    name = model_elem.find('name').text
-                    value = model_elem.find('value').text
-                    unit_elem = model_elem.find('unit')
-                    unit = unit_elem.text if unit_elem is not None else ""
-                    model_dict = {
-                        'name': name,
-                        'value': value,
-                        'unit': unit,
-                        'replaced': 'Class (user)'
-                    }
-
-                    model_data.append(model_dict)
+
+    for rec in index.select('classSettings', sim=the_sim, device=the_device):
+        # 'type' holds the class pattern
+        pattern = rec.get('type')
+        if pattern is not None:
+            # Check if the craft type matches the pattern using re match
+            if re.match(pattern, crafttype):
+                model_data.append({
+                    'name': rec['name'],
+                    'value': rec['value'],
+                    'unit': rec.get('unit', ""),
+                    'replaced': 'Class (user)'
+                })
 
     return model_data
 
@@ -776,6 +873,7 @@ def update_data_with_models(defaults_data, model_data, replacetext):
 def write_models_to_xml(the_sim, the_model, the_value, setting_name, unit='', the_device=''):
     mprint(f"write_models_to_xml  {the_sim}, {the_model}, {the_value}, {setting_name}")
     # Load the existing XML file or create a new one if it doesn't exist
+    record_config_change(setting_name)
     tree = try_parse(userconfig_path)
     root = tree.getroot()
     model_elem = None
@@ -854,6 +952,7 @@ def write_models_to_xml(the_sim, the_model, the_value, setting_name, unit='', th
 def write_class_to_xml(the_sim, the_class, the_value, setting_name, unit=''):
     mprint(f"write_class_to_xml  {the_sim}, {the_class}, {the_value}{unit}, {setting_name}")
     # Load the existing XML file or create a new one if it doesn't exist
+    record_config_change(setting_name)
     tree = try_parse(userconfig_path)
     root = tree.getroot()
     the_device = device
@@ -896,6 +995,7 @@ def write_class_to_xml(the_sim, the_class, the_value, setting_name, unit=''):
 def write_sim_to_xml(the_sim, the_value, setting_name, unit=''):
     mprint(f"write_sim_to_xml {the_sim}, {the_value}, {setting_name}")
     # Load the existing XML file or create a new one if it doesn't exist
+    record_config_change(setting_name)
     tree = try_parse(userconfig_path)
     root = tree.getroot()
     the_device = device
@@ -970,6 +1070,7 @@ def write_converted_to_xml(differences):
 def erase_models_from_xml(the_sim, the_model, setting_name):
     mprint(f"erase_models_from_xml  {the_sim} {the_model}, {setting_name}")
     # Load the existing XML file or create a new one if it doesn't exist
+    record_config_change(setting_name)
     tree = try_parse(userconfig_path)
     root = tree.getroot()
     the_device = device
@@ -1014,6 +1115,7 @@ def erase_entire_model_from_xml(the_sim, the_model):
 
     # Remove the elements outside the loop
     for elem in elements_to_remove:
+        record_config_change(elem.findtext('name'))
         root.remove(elem)
         # Write the modified XML back to the file
         write_userconfig_xml(tree)
@@ -1023,6 +1125,7 @@ def erase_entire_model_from_xml(the_sim, the_model):
 def erase_class_from_xml( the_sim, the_class, the_value, setting_name):
     mprint(f"erase_class_from_xml  {the_sim} {the_class}, {the_value}, {setting_name}")
     # Load the existing XML file or create a new one if it doesn't exist
+    record_config_change(setting_name)
     tree = try_parse(userconfig_path)
     root = tree.getroot()
     the_device = device
@@ -1053,6 +1156,7 @@ def erase_class_from_xml( the_sim, the_class, the_value, setting_name):
 def erase_sim_from_xml(the_sim, the_value, setting_name):
     mprint(f"erase_sim_from_xml  {the_sim} {the_value}, {setting_name}")
     # Load the existing XML file or create a new one if it doesn't exist
+    record_config_change(setting_name)
     tree = try_parse(userconfig_path)
     root = tree.getroot()
     the_device = device
@@ -1110,17 +1214,12 @@ def sort_elements(tree):    #  unused for now.
 
 
 def read_prereqs():
-    tree = try_parse(defaults_path)
-    root = tree.getroot()
+    index = load_index(defaults_path)
 
     # Collect data in a list of dictionaries
     data_list = []
-    for defaults_elem in root.findall(f'.//defaults'):
-
-        name = defaults_elem.find('name').text
-        prereq_elem = defaults_elem.find('prereq')
-        prereq = (f"{prereq_elem.text}") if prereq_elem is not None else ""
-
+    for rec in index.records('defaults'):
+        prereq = f"{rec['prereq']}" if 'prereq' in rec else ""
 
         # Check if 'prereq' is already in the list
         found = False
@@ -1134,11 +1233,6 @@ def read_prereqs():
         if not found and prereq != '':
             data_list.append({'prereq': prereq, 'value': 'False', 'count': 1})
 
-
-        # lprint(data_list)
-
-    # lprint(sorted_data)
-    # printconfig(sim, craft, sorted_data)
     return data_list
 
 def check_prereq_value(prereq_list,datalist):
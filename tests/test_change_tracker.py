@@ -0,0 +1,91 @@
+import pytest
+
+from telemffb.sim.change_tracker import ChangeTracker
+
+
+@pytest.fixture
+def tracker():
+    tracker = ChangeTracker()
+    tracker.begin_frame(now=10.0)
+    return tracker
+
+
+def test_check_returns_the_change(tracker):
+    assert tracker.check("gear", 0.0) is False
+    tracker.begin_frame(now=10.5)
+    assert tracker.check("gear", 0.5) == (0.0, 0.5, 10.5)
+    tracker.begin_frame(now=11.0)
+    assert tracker.check("gear", 1.0) == (0.5, 1.0, 0.5)
+
+
+def test_check_hold_time(tracker):
+    tracker.check("flaps", 0.0)
+    tracker.check("flaps", 1.0)
+    tracker.begin_frame(now=10.05)
+    assert tracker.check("flaps", 1.0, delta_ms=100) is True
+    tracker.begin_frame(now=10.2)
+    assert tracker.check("flaps", 1.0, delta_ms=100) is False
+
+
+def test_check_ignores_none_until_the_first_change(tracker):
+    assert tracker.check("hook", None) is False
+    # the first real value initializes the item
+    assert tracker.check("hook", 0.5) is False
+    assert tracker.check("hook", 1.0) == (0.5, 1.0, 10.0)
+
+
+def test_check_float_epsilon(tracker):
+    tracker.check("decel", 0.1)
+    assert tracker.check("decel", 0.1004) is False
+    assert tracker.check("decel", 0.101) == (0.1, 0.101, 10.0)
+
+
+def test_check_compares_lists_and_strings(tracker):
+    tracker.check("Afterburner", [0.0, 0.0])
+    tracker.check("PayloadInfo", "AIM-9")
+    assert tracker.check("Afterburner", [0.0, 0.0]) is False
+    assert tracker.check("Afterburner", [0.0, 1.0])
+    assert tracker.check("PayloadInfo", "AIM-120")
+
+
+def has_changed_reference(changes, now, item, delta_ms, data):
+    """AircraftBase.has_changed before the ChangeTracker"""
+    prev_val, tm = changes.get(item, (None, 0))
+    new_val = data.get(item)
+    if type(new_val) == float:
+        new_val = round(new_val, 3)
+    if prev_val != new_val:
+        changes[item] = (new_val, now)
+    if prev_val != new_val and prev_val is not None and new_val is not None:
+        return (prev_val, new_val)
+    return now - tm < delta_ms / 1000.0
+
+
+def test_changed_matches_the_former_has_changed():
+    tracker = ChangeTracker()
+    changes = {}
+    frames = [{"Gear": 0.0}, {"Gear": 0.0}, {"Gear": 0.5}, {}, {"Gear": 1.0}, {"Gear": 1.0}, {"Gear": 1.0}]
+    for i, data in enumerate(frames):
+        now = 1.0 + i * 0.03
+        tracker.begin_frame(now)
+        expected = has_changed_reference(changes, now, "Gear", 50, data)
+        assert tracker.changed("Gear", data.get("Gear"), 50) == expected
+
+
+def test_changed_compares_the_given_values(tracker):
+    # every call is compared with the previous call, whatever frame the value comes from
+    tracker.changed("TAS", 100.0)
+    assert tracker.changed("TAS", 120.0) == (100.0, 120.0)
+    assert tracker.changed("TAS", 120.0) is False
+
+
+def test_changed_and_check_items_are_separate(tracker):
+    tracker.check("TAS", 100.0)
+    tracker.changed("TAS", 50.0)
+    assert tracker.check("TAS", 100.0) is False
+
+
+def test_clear(tracker):
+    tracker.check("gear", 0.0)
+    tracker.clear()
+    assert tracker.check("gear", 1.0) is False
@@ -0,0 +1,81 @@
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+import pytest
+
+import telemffb.xmlutils as xmlutils
+
+DEFAULTS = Path(__file__).resolve().parents[1] / "defaults.xml"
+
+
+@pytest.fixture
+def config_files(tmp_path):
+    userconfig = tmp_path / "userconfig.xml"
+    defaults = tmp_path / "defaults.xml"
+    userconfig.write_text("<TelemFFB></TelemFFB>")
+    defaults.write_text("<TelemFFB></TelemFFB>")
+    xmlutils.update_vars("joystick", str(userconfig), str(defaults))
+    xmlutils.pop_config_changes()   # start with a clean change-set and a known defaults stamp
+    return userconfig
+
+
+def write(name):
+    xmlutils.record_config_change(name)
+    tree = ET.ElementTree(ET.fromstring(f"<TelemFFB><models><name>{name}</name></models></TelemFFB>"))
+    xmlutils.write_userconfig_xml(tree)
+
+
+def test_written_setting_is_reported(config_files):
+    write("gforce_enabled")
+    changes = xmlutils.pop_config_changes()
+    assert changes is not None
+    assert changes.names == {"gforce_enabled"}
+
+
+def test_pop_between_record_and_write_keeps_the_name(config_files):
+    xmlutils.record_config_change("gforce_enabled")
+    assert xmlutils.pop_config_changes() is None    # nothing written yet, nothing to trust
+
+    tree = ET.ElementTree(ET.fromstring("<TelemFFB><models><name>gforce_enabled</name></models></TelemFFB>"))
+    xmlutils.write_userconfig_xml(tree)
+    changes = xmlutils.pop_config_changes()
+    assert changes is not None
+    assert changes.names == {"gforce_enabled"}
+
+
+def test_external_edit_forces_full_reload(config_files):
+    write("gforce_enabled")
+    config_files.write_text("<TelemFFB><models/></TelemFFB>  ")
+    assert xmlutils.pop_config_changes() is None
+
+
+def test_profile_switch_applies_the_profile_settings(tmp_path, monkeypatch):
+    monkeypatch.setenv("LOCALAPPDATA", str(tmp_path))
+    (tmp_path / "VPForce-TelemFFB").mkdir()
+    for profile, intensity in (("soft", "20%"), ("hard", "80%")):
+        (tmp_path / "VPForce-TelemFFB" / f"{profile}.tffbprofile").write_text(
+            f"<TelemFFB><models><name>new_gforce_effect_max_intensity</name><model>any</model>"
+            f"<value>{intensity}</value><sim>DCS</sim><device>joystick</device></models></TelemFFB>")
+    userconfig = tmp_path / "userconfig.xml"
+    userconfig.write_text("<TelemFFB></TelemFFB>")
+    xmlutils.update_vars("joystick", str(userconfig), str(DEFAULTS))
+
+    def resolve():
+        _, _, settings = xmlutils.read_single_model("DCS", "F-16C_50", "", "joystick")
+        return xmlutils.model_settings_to_params(settings)
+
+    xmlutils.write_models_to_xml("DCS", "F-16C_50", "true", "new_gforce_effect_enable")
+    xmlutils.write_models_to_xml("DCS", "F-16C_50", "soft", "telemffb_profile")
+    current = resolve()
+    assert current["new_gforce_effect_max_intensity"] == "20%"
+    xmlutils.pop_config_changes()
+    xmlutils.pop_config_changes()   # the first pop after switching to these files only records the defaults stamp
+
+    xmlutils.write_models_to_xml("DCS", "F-16C_50", "hard", "telemffb_profile")
+    changes = xmlutils.pop_config_changes()
+    assert changes is not None
+    params = resolve()
+    keys = changes.keys_to_compare(params, current)
+    changed = {k: v for k, v in params.items() if (keys is None or k in keys) and current.get(k) != v}
+    # the gain is only written to the profile file, not to userconfig.xml
+    assert changed["new_gforce_effect_max_intensity"] == "80%"
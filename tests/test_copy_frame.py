@@ -0,0 +1,110 @@
+import base64
+import gzip
+import math
+from pathlib import Path
+
+import pytest
+
+import telemffb.globals as G
+from telemffb.telem.TelemFrame import copy_frame
+from telemffb.telem.ValueParser import TelemValueParser
+
+IL2_TRACE = Path(__file__).resolve().parents[1] / "il2_test_data.gz"
+
+# SimConnectManager frame: c_double simvars, STRING128 simvars as str, SimVarArray values as lists
+MSFS_FRAME = {
+    "SimPaused": 0,
+    "N": "Cessna Skyhawk G1000 Asobo",
+    "SimconnectCategory": "Airplane",
+    "T": 1234.5678901,
+    "TAS": 51.23456789,
+    "AoA": -0.000123456,
+    "G": 1.0,
+    "EngineType": 0.0,
+    "NumEngines": 1.0,
+    "RetractableGear": [0.0],
+    "WeightOnWheels": [1.0, 0.987654321, 0.0],
+    "Flaps": [0.25, 0.25],
+    "PropRPM": [2300.123456, 0.0, 0.0, 0.0],
+    "DesignSpeed": [62.0, 24.0, 27.0],
+    "SurfaceType": "Asphalt",
+    "STOP": 1,
+    "_num_simvars": 64,
+    "msfs_vers": "11.0",
+}
+
+
+def _fmt(val):
+    if isinstance(val, list):
+        return "~".join([str(x) for x in val])
+    return val
+
+
+def text_path(data: dict) -> dict:
+    """The former in-process handoff: serialize like SimConnectSock/IL2Manager, parse like TelemManager"""
+    packet = bytes(";".join([f"{k}={_fmt(v)}" for k, v in data.items()]), "utf-8")
+    parser = TelemValueParser()
+    telem_data = {}
+    for i in packet.decode("utf-8").split(";"):
+        section, conf = i.split("=")
+        telem_data[section] = parser.parse_item(section, conf)
+    return telem_data
+
+
+def typed(frame: dict) -> dict:
+    """Makes the comparison type strict, 1 == 1.0 == True otherwise"""
+    def t(v):
+        return [t(x) for x in v] if isinstance(v, list) else (type(v).__name__, v)
+    return {k: t(v) for k, v in frame.items()}
+
+
+def il2_frames():
+    from telemffb.telem.IL2Manager import IL2Manager
+    il2 = IL2Manager()
+    with gzip.open(IL2_TRACE, "r") as f:
+        for line in f:
+            if line.startswith(b"t"):
+                frame = il2.process_packet(base64.b64decode(f.readline()))
+                if frame:
+                    # process_packet returns copy_frame(), compare against the source dict itself
+                    yield frame, dict(il2.telem_data)
+
+
+def test_msfs_frame_matches_text_path():
+    assert typed(copy_frame(MSFS_FRAME)) == typed(text_path(MSFS_FRAME))
+
+
+def test_msfs_frame_types():
+    frame = copy_frame(MSFS_FRAME)
+    assert frame["RetractableGear"] == 0
+    assert frame["msfs_vers"] == 11.0
+    assert frame["WeightOnWheels"] == [1.0, 0.9877, 0.0]
+
+
+@pytest.mark.skipif(not IL2_TRACE.exists(), reason="no IL2 trace")
+def test_il2_frames_match_text_path(monkeypatch):
+    monkeypatch.setattr(G, "system_settings", {})
+    count = 0
+    for frame, telem_data in il2_frames():
+        assert typed(frame) == typed(text_path(telem_data))
+        count += 1
+    assert count > 100
+
+
+def test_copy_is_independent_of_the_source():
+    values = [1.0, 2.0]
+    frame = copy_frame({"Gear": values})
+    values[0] = 0.0
+    assert frame["Gear"] == [1.0, 2.0]
+
+
+def test_nested_lists_and_empty_lists():
+    frame = copy_frame({"Nested": [[1, 2], [3]], "Empty": []})
+    assert typed(frame) == typed(text_path({"Nested": [[1, 2], [3]], "Empty": []}))
+
+
+def test_exponent_floats_stay_numbers():
+    # the text path returned "1e-05" as a string
+    assert text_path({"x": 1e-05})["x"] == "1e-05"
+    assert copy_frame({"x": 1e-05})["x"] == 0.0
+    assert math.isinf(copy_frame({"x": math.inf})["x"])
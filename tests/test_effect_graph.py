@@ -0,0 +1,179 @@
+from types import SimpleNamespace
+
+import pytest
+
+from telemffb.sim import aircraft_base, aircrafts_dcs, aircrafts_msfs_xp
+from telemffb.sim.effect_graph import EffectGraph, EffectNode
+from telemffb.sim.filter_bank import FilterBank
+from telemffb.sim.frame_context import Device, Sim
+
+
+class Effect:
+    effect_type = "constant"
+
+    def __init__(self):
+        self.started = True
+
+    def stop(self):
+        self.started = False
+
+
+class Effects:
+    """The parts of the effect dispenser EffectGraph uses"""
+
+    def __init__(self):
+        self.dict = {}
+        self.disposed = []
+
+    def play(self, name):
+        self.dict[name] = Effect()
+
+    def dispose(self, name):
+        self.disposed.append(name)
+        self.dict.pop(name, None)
+
+
+class Aircraft:
+    enabled = True
+    override = False
+
+    def __init__(self, device=Device.JOYSTICK, sim=Sim.DCS):
+        self.frame = SimpleNamespace(device=device, sim=sim)
+        self.calls = []
+
+    def update(self, telem_data):
+        self.calls.append(telem_data)
+
+    def update_args(self, *args):
+        self.calls.append(args)
+
+
+def run_frames(graph, aircraft, frames):
+    for telem_data in frames:
+        graph.run(aircraft, telem_data)
+
+
+def test_unchanged_reads_are_skipped():
+    graph = EffectGraph([EffectNode("n", "update", reads=("TAS",))], Effects())
+    aircraft = Aircraft()
+    run_frames(graph, aircraft, [{"TAS": 1, "T": 1}, {"TAS": 1, "T": 2}, {"TAS": 2, "T": 3}])
+    assert [d["T"] for d in aircraft.calls] == [1, 3]
+    assert (graph.calls[0], graph.skips[0]) == (2, 1)
+
+
+def test_nodes_without_reads_run_every_frame():
+    graph = EffectGraph([EffectNode("n", "update")], Effects())
+    aircraft = Aircraft()
+    run_frames(graph, aircraft, [{"TAS": 1}] * 3)
+    assert len(aircraft.calls) == 3
+
+
+def test_playing_effects_are_not_skipped():
+    effects = Effects()
+    graph = EffectGraph([EffectNode("n", "update", reads=("TAS",), effects=("buffet",))], effects)
+    aircraft = Aircraft()
+    graph.run(aircraft, {"TAS": 1})
+    effects.play("buffet")
+    graph.run(aircraft, {"TAS": 1})
+    assert len(aircraft.calls) == 2
+
+
+def test_invalidate_runs_all_nodes():
+    graph = EffectGraph([EffectNode("n", "update", reads=("TAS",))], Effects())
+    aircraft = Aircraft()
+    graph.run(aircraft, {"TAS": 1})
+    graph.invalidate()
+    graph.run(aircraft, {"TAS": 1})
+    assert len(aircraft.calls) == 2
+
+
+def test_timeout_runs_the_nodes_of_stopped_effects(monkeypatch):
+    effects = Effects()
+    monkeypatch.setattr(aircraft_base, "effects", effects)
+    graph = EffectGraph([EffectNode("n", "update", reads=("TAS",), effects=("buffet",))], effects)
+    aircraft = Aircraft()
+    aircraft.effect_graph = graph
+    aircraft.keep_forces_on_pause = False
+    graph.run(aircraft, {"TAS": 1})
+    effects.play("buffet")
+    aircraft_base.AircraftBase.on_timeout(aircraft)
+    assert not effects.dict["buffet"].started
+    # telemetry resumes with the same values, the node has to start its effect again
+    graph.run(aircraft, {"TAS": 1})
+    assert len(aircraft.calls) == 2
+
+
+def test_args():
+    graph = EffectGraph([EffectNode("n", "update_args", args=("gear_value", "TAS"))], Effects())
+    aircraft = Aircraft()
+    graph.run(aircraft, {"gear_value": 0.5, "TAS": 100})
+    assert aircraft.calls == [(0.5, 100)]
+
+
+def test_disabled_node_disposes_its_effects_once():
+    effects = Effects()
+    graph = EffectGraph([EffectNode("n", "update", enabled_by=("enabled",), effects=("a", "b"))], effects)
+    aircraft = Aircraft()
+    graph.run(aircraft, {})
+    aircraft.enabled = False
+    run_frames(graph, aircraft, [{}] * 3)
+    assert effects.disposed == ["a", "b"]
+    assert len(aircraft.calls) == 1
+
+
+def test_skip_if_does_not_dispose():
+    effects = Effects()
+    graph = EffectGraph([EffectNode("n", "update", skip_if=("override",), effects=("a",))], effects)
+    aircraft = Aircraft()
+    aircraft.override = True
+    graph.run(aircraft, {})
+    assert not aircraft.calls and not effects.disposed
+
+
+@pytest.mark.parametrize("device, sim, runs", [
+    (Device.JOYSTICK, Sim.MSFS, True),
+    (Device.PEDALS, Sim.MSFS, False),
+    (Device.JOYSTICK, Sim.XPLANE, False),
+])
+def test_device_and_sim_filter(device, sim, runs):
+    node = EffectNode("n", "update", devices=(Device.JOYSTICK,), sims=(Sim.MSFS,))
+    graph = EffectGraph([node], Effects())
+    aircraft = Aircraft(device, sim)
+    graph.run(aircraft, {})
+    assert bool(aircraft.calls) == runs
+    assert graph.inventory(aircraft)[0]["applies"] == runs
+
+
+class RumbleAircraft(Aircraft):
+    """Runs the high pass filter of _update_runway_rumble on the nose wheel"""
+    runway_rumble_enabled = True
+    cp_spr_override_active = False
+
+    def __init__(self, sim):
+        super().__init__(Device.JOYSTICK, sim)
+        self.filters = FilterBank()
+        self.rumble = []
+
+    def _update_runway_rumble(self, telem_data):
+        wow = telem_data["WeightOnWheels"]
+        self.rumble.append(self.filters.highpass("center_wheel", 3).update(wow[1]))
+
+
+@pytest.mark.parametrize("module, sim", [(aircrafts_dcs, Sim.DCS), (aircrafts_msfs_xp, Sim.MSFS)])
+def test_runway_rumble_sees_the_touchdown(module, sim):
+    node = next(n for n in module.Aircraft.effect_nodes if n.name == "runway_rumble")
+    graph = EffectGraph([node], Effects())
+    aircraft = RumbleAircraft(sim)
+    # two seconds in the air at 60 fps, then the nose wheel touches down
+    frames = [(i / 60, [0.0, 0.0, 0.0]) for i in range(120)] + [(2.0, [0.0, 0.6, 0.0])]
+    for t, wow in frames:
+        aircraft.filters.begin_frame(t)
+        graph.run(aircraft, {"WeightOnWheels": wow})
+    assert aircraft.rumble[-1] > 0.4
+
+
+@pytest.mark.parametrize("module", [aircrafts_dcs, aircrafts_msfs_xp])
+def test_stateful_nodes_run_every_frame(module):
+    nodes = {n.name: n for n in module.Aircraft.effect_nodes}
+    assert nodes["runway_rumble"].reads is None
+    assert nodes["deceleration"].reads is None
@@ -0,0 +1,71 @@
+import sys
+import threading
+import time
+
+import pytest
+
+from telemffb.hw.ffb_rhino import (EFFECT_CONSTANT, HID_REPORT_ID_BLOCK_FREE, HID_REPORT_ID_EFFECT_OPERATION,
+                                   HID_REPORT_ID_SET_CONSTANT_FORCE, FFBRhino)
+from telemffb.hw.rhino_sim import SimulatedRhinoBackend
+
+
+@pytest.fixture
+def device():
+    dev = FFBRhino(backend=SimulatedRhinoBackend(), read_thread=False, pool_prefill={})
+    yield dev
+    dev.close()
+
+
+@pytest.fixture
+def fast_switching():
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield
+    sys.setswitchinterval(interval)
+
+
+def test_pending_frees_are_sent_before_allocation():
+    device = FFBRhino(backend=SimulatedRhinoBackend(pool_size=1), read_thread=False, pool_prefill={})
+    try:
+        handle = device.allocate_block(EFFECT_CONSTANT)
+        assert device.allocate_block(EFFECT_CONSTANT) is None
+        device.begin_frame()
+        handle.destroy()
+        # the block free is still in the frame batch, it has to reach the device first
+        assert device.allocate_block(EFFECT_CONSTANT) is not None
+        device.commit_frame()
+    finally:
+        device.close()
+
+
+def test_allocation_from_another_thread_during_a_frame(device, fast_switching):
+    # the pool thread allocates blocks while the telemetry thread fills the frame batch
+    errors = []
+    stop = threading.Event()
+
+    def allocate():
+        try:
+            while not stop.is_set():
+                handle = device.allocate_block(EFFECT_CONSTANT)
+                if handle:
+                    handle.destroy()
+        except Exception as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=allocate)
+    thread.start()
+    end = time.perf_counter() + 2.0
+    frame = 0
+    try:
+        while time.perf_counter() < end and not errors:
+            device.begin_frame()
+            for block in range(1, 100):
+                device.write(bytes([HID_REPORT_ID_BLOCK_FREE, block]))
+                device.write(bytes([HID_REPORT_ID_SET_CONSTANT_FORCE, block, frame & 0xFF, 0]))
+                device.write(bytes([HID_REPORT_ID_EFFECT_OPERATION, block, 1, 0]))
+            device.commit_frame()
+            frame += 1
+    finally:
+        stop.set()
+        thread.join()
+    assert not errors
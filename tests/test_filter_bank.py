@@ -0,0 +1,187 @@
+import math
+
+import pytest
+
+import telemffb.utils as utils
+from telemffb.sim.filter_bank import RESET_AFTER, Biquad, FilterBank, HighPass, LowPass
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def bank():
+    bank = FilterBank()
+    bank.begin_frame(0.0)
+    return bank
+
+
+def run(bank, make_filter, values, rate=60.0, start=0.0):
+    out = []
+    for i, x in enumerate(values):
+        bank.begin_frame(start + i / rate)
+        out.append(make_filter().update(x))
+    return out
+
+
+def test_getters_return_the_same_filter(bank):
+    assert bank.lowpass("x", 5) is bank.lowpass("x", 5)
+    assert "x" in bank
+    assert isinstance(bank["x"], LowPass)
+
+
+def test_name_conflict(bank):
+    bank.lowpass("x", 5)
+    with pytest.raises(TypeError):
+        bank.highpass("x", 5)
+
+
+def test_cutoff_change_applies_to_the_existing_filter(bank):
+    hp = bank.highpass("wheel", 3)
+    assert bank.highpass("wheel", 6) is hp
+    assert hp.cutoff_freq_hz == 6
+    assert hp.RC == pytest.approx(1 / (2 * math.pi * 6))
+
+
+@pytest.mark.parametrize("bank_filter, utils_filter", [
+    (lambda bank: bank.lowpass("lp", 5), lambda: utils.LowPassFilter(5)),
+    (lambda bank: bank.highpass("hp", 3), lambda: utils.HighPassFilter(3)),
+])
+def test_same_output_as_the_utils_filters(monkeypatch, bank, bank_filter, utils_filter):
+    clock = Clock()
+    monkeypatch.setattr(utils.time, "perf_counter", clock)
+    reference = utils_filter()
+    reference.update(0.0)
+    bank_filter(bank).update(0.0)
+    for i in range(1, 120):
+        clock.now = i / 60
+        bank.begin_frame(clock.now)
+        x = math.sin(i / 5)
+        assert bank_filter(bank).update(x) == pytest.approx(reference.update(x))
+
+
+def test_filters_of_one_frame_share_the_step(bank):
+    a = bank.lowpass("a", 5)
+    b = bank.lowpass("b", 5)
+    a.update(0.0)
+    b.update(0.0)
+    bank.begin_frame(0.1)
+    assert a.update(1.0) == b.update(1.0)
+    # a second update within the same frame has a zero step
+    assert a.update(5.0) == pytest.approx(b.value)
+
+
+def test_reset_after_a_gap(bank):
+    lp = bank.lowpass("lp", 5)
+    hp = bank.highpass("hp", 3)
+    run(bank, lambda: lp, [0.0] * 10)
+    run(bank, lambda: hp, [0.0] * 10)
+    bank.begin_frame(10 / 60 + RESET_AFTER + 0.1)
+    # the step is discarded, the filters take the input as their new state
+    assert lp.update(1.0) == 1.0
+    assert hp.update(1.0) == 0.0
+    bank.begin_frame(10 / 60 + RESET_AFTER + 0.1 + 1 / 60)
+    assert hp.update(1.0) == 0.0
+
+
+def test_high_pass_step_response(bank):
+    out = run(bank, lambda: bank.highpass("hp", 3), [0.0] * 5 + [1.0] * 60)
+    assert out[5] > 0.7
+    assert abs(out[-1]) < 0.01
+
+
+def test_derivative(bank):
+    out = run(bank, lambda: bank.derivative("d"), [i * 0.5 for i in range(10)], rate=10.0)
+    assert out[-1] == pytest.approx(5.0)
+
+
+def test_derivative_is_zero_after_a_gap(bank):
+    d = bank.derivative("d")
+    run(bank, lambda: d, [0.0, 1.0], rate=10.0)
+    bank.begin_frame(0.1 + RESET_AFTER + 0.1)
+    assert d.update(100.0) == 0.0
+
+
+def test_dampen(bank):
+    run(bank, lambda: bank.derivative("_trim", 5), [0.0])
+    bank.begin_frame(0.1)
+    assert bank.dampen(1.0, "_trim", derivative_hz=5, derivative_k=0.1) < 1.0
+
+
+def test_update_many(bank):
+    bank.lowpass("a", 5).update(0.0)
+    bank.highpass("b", 3).update(0.0)
+    bank.begin_frame(1 / 60)
+    out = bank.update_many({"a": 1.0, "b": 1.0})
+    assert out == {"a": bank["a"].value, "b": bank["b"].value}
+    with pytest.raises(KeyError):
+        bank.update_many({"c": 1.0})
+
+
+def gain(make_filter, freq, rate=60.0, seconds=10.0):
+    bank = FilterBank()
+    f = make_filter(bank)
+    n = int(rate * seconds)
+    out = run(bank, lambda: f, [math.sin(2 * math.pi * freq * i / rate) for i in range(n)], rate)
+    return max(abs(y) for y in out[n // 2:])
+
+
+def test_biquad_low_pass():
+    lp = lambda bank: bank.biquad("lp", 5)
+    assert gain(lp, 1) == pytest.approx(1.0, abs=0.05)
+    assert gain(lp, 13) < 0.2
+
+
+def test_biquad_high_pass():
+    hp = lambda bank: bank.biquad("hp", 5, kind="highpass")
+    assert gain(hp, 1) < 0.1
+    assert gain(hp, 20) == pytest.approx(1.0, abs=0.1)
+
+
+def test_biquad_redesigns_when_the_rate_changes(bank):
+    bq = bank.biquad("lp", 5)
+    run(bank, lambda: bq, [1.0] * 10, rate=60.0)
+    assert bq.design_dt == pytest.approx(1 / 60)
+    out = run(bank, lambda: bq, [1.0] * 10, rate=120.0, start=10 / 60)
+    assert bq.design_dt == pytest.approx(1 / 120)
+    # a settled filter stays settled
+    assert out == pytest.approx([1.0] * 10)
+
+
+def test_biquad_cutoff_change_keeps_the_output(bank):
+    run(bank, lambda: bank.biquad("lp", 5), [1.0] * 10)
+    out = run(bank, lambda: bank.biquad("lp", 10), [1.0] * 10, start=10 / 60)
+    assert out == pytest.approx([1.0] * 10)
+
+
+def test_biquad_with_frame_time_jitter():
+    def jitter_gain(freq):
+        bank = FilterBank()
+        bq = bank.biquad("lp", 5)
+        t = 0.0
+        out = []
+        for i in range(1200):
+            bank.begin_frame(t)
+            out.append(bq.update(math.sin(2 * math.pi * freq * t) if freq else 1.0))
+            t += 1 / 60 if i % 2 else 1 / 48     # redesigns on every frame
+        return min(out[600:]), max(out[600:])
+    assert jitter_gain(0) == pytest.approx((1.0, 1.0))
+    assert jitter_gain(1)[1] == pytest.approx(1.0, abs=0.05)
+    assert jitter_gain(13)[1] < 0.15
+
+
+def test_biquad_kind():
+    with pytest.raises(ValueError):
+        Biquad(FilterBank().clock, 5, kind="bandpass")
+
+
+def test_clear(bank):
+    bank.highpass("hp", 3)
+    bank.clear()
+    assert "hp" not in bank
+    assert isinstance(bank.highpass("hp", 3), HighPass)
@@ -0,0 +1,76 @@
+import random
+
+import pytest
+
+from telemffb.RollingStats import LatencyHistogram, RollingStats
+
+
+def nearest_rank(values, p):
+    ordered = sorted(values)
+    rank = max(1, int(len(ordered) * p / 100.0 + 0.5))
+    return ordered[rank - 1]
+
+
+@pytest.fixture
+def samples():
+    rng = random.Random(4)
+    # frame times in ms with occasional spikes
+    return [rng.uniform(0.2, 2.0) if rng.random() > 0.02 else rng.uniform(10, 50) for _ in range(2000)]
+
+
+def test_window_statistics(samples):
+    stats = RollingStats(100, resolution=0.01)
+    for i, x in enumerate(samples):
+        stats.add(x)
+        window = samples[max(0, i - 99):i + 1]
+        assert len(stats) == len(window)
+        assert stats.max == max(window)
+        assert stats.mean == pytest.approx(sum(window) / len(window))
+    assert list(stats.values()) == samples[-100:]
+    assert list(stats.values(last=3)) == samples[-3:]
+    assert stats.peak == max(samples)
+    assert stats.last == samples[-1]
+    assert stats.count == len(samples)
+
+
+@pytest.mark.parametrize("p", [1, 50, 90, 99, 100])
+def test_percentiles(samples, p):
+    stats = RollingStats(500, resolution=0.01)
+    for x in samples:
+        stats.add(x)
+    exact = nearest_rank(samples[-500:], p)
+    # the lower bound of the bucket, ~3% relative precision
+    assert exact * 0.96 - 0.01 <= stats.percentile(p) <= exact
+
+
+def test_empty():
+    stats = RollingStats(10)
+    assert (stats.max, stats.mean, stats.percentile(50)) == (0.0, 0.0, 0.0)
+    assert list(stats.values()) == []
+
+
+def test_reset(samples):
+    stats = RollingStats(10)
+    for x in samples[:20]:
+        stats.add(x)
+    stats.reset()
+    assert len(stats) == 0 and stats.count == 0 and stats.peak == 0.0
+    assert stats.histogram.total == 0
+    stats.add(1.5)
+    assert stats.max == 1.5 and stats.mean == 1.5
+
+
+def test_histogram_buckets_are_exact_for_small_values():
+    hist = LatencyHistogram()
+    for units in range(64):
+        hist.add(units)
+    assert [hist.percentile(p) for p in (1, 50, 100)] == [0.0, 31.0, 63.0]
+
+
+def test_histogram_clamps_large_values():
+    hist = LatencyHistogram(resolution=1.0, max_value=1000.0)
+    hist.add(5000.0)
+    hist.add(-1.0)
+    assert hist.total == 2
+    assert hist.percentile(100) <= 1000.0
+    assert hist.percentile(1) == 0.0
@@ -0,0 +1,53 @@
+import math
+import random
+
+import pytest
+
+from telemffb.utils import Rotation, Vector
+
+
+def chained(vec, heading, pitch, roll):
+    """The former world to body frame rotation with Vector objects"""
+    v = Vector(*vec)
+    v = v.rotY(-heading)
+    v = v.rotX(-pitch)
+    v = v.rotZ(-roll)
+    return list(v)
+
+
+def attitudes():
+    rng = random.Random(21)
+    for _ in range(200):
+        yield (rng.uniform(-math.pi, math.pi), rng.uniform(-math.pi / 2, math.pi / 2), rng.uniform(-math.pi, math.pi),
+               (rng.uniform(-100, 100), rng.uniform(-100, 100), rng.uniform(-100, 100)))
+
+
+def test_identity():
+    assert Rotation().apply(1.0, 2.0, 3.0) == (1.0, 2.0, 3.0)
+
+
+def test_matches_the_chained_vector_rotations():
+    rot = Rotation()
+    for heading, pitch, roll, vec in attitudes():
+        rot.set_world_to_body(heading, pitch, roll)
+        assert rot.apply(*vec) == pytest.approx(chained(vec, heading, pitch, roll), abs=1e-9)
+
+
+def test_inverse():
+    rot = Rotation()
+    for heading, pitch, roll, vec in attitudes():
+        rot.set_world_to_body(heading, pitch, roll)
+        assert rot.apply_inverse(*rot.apply(*vec)) == pytest.approx(vec, abs=1e-9)
+
+
+def test_preserves_length():
+    rot = Rotation()
+    rot.set_world_to_body(0.3, -0.2, 1.1)
+    assert math.hypot(*rot.apply(3.0, 4.0, 12.0)) == pytest.approx(13.0)
+
+
+def test_level_flight_heading():
+    # flying east level, relative wind from the nose ends up on the body z axis
+    rot = Rotation()
+    rot.set_world_to_body(math.pi / 2, 0.0, 0.0)
+    assert rot.apply(50.0, 0.0, 0.0) == pytest.approx((0.0, 0.0, 50.0), abs=1e-9)
@@ -0,0 +1,87 @@
+import pytest
+
+from telemffb.telem.TelemFrame import FRAME_MAGIC, TEXT_ITEMS, FrameDecoder, FrameEncoder, is_binary_frame
+
+SAMPLE = {
+    "N": "Asobo Cessna 172",
+    "src": "MSFS",
+    "SimPaused": 0,
+    "TAS": 51.25,
+    "WeightOnWheels": [1.0, 0.5, 0.0],
+    "Gun": [510, 200],
+}
+
+SENDER = ("127.0.0.1", 50000)
+
+
+@pytest.fixture
+def encoder():
+    return FrameEncoder.from_sample(SAMPLE, schema_id=3)
+
+
+def test_round_trip(encoder):
+    decoder = FrameDecoder()
+    assert decoder.decode(encoder.schema_packet(), SENDER) is None
+    assert decoder.decode(encoder.data_packet(SAMPLE), SENDER) == SAMPLE
+
+
+def test_data_before_schema_is_dropped(encoder):
+    assert FrameDecoder().decode(encoder.data_packet(SAMPLE), SENDER) is None
+
+
+def test_schemas_are_tracked_per_sender(encoder):
+    decoder = FrameDecoder()
+    decoder.decode(encoder.schema_packet(), SENDER)
+    assert decoder.decode(encoder.data_packet(SAMPLE), ("127.0.0.1", 50001)) is None
+
+
+@pytest.mark.parametrize("packet", [
+    FRAME_MAGIC,
+    b"\xf5TF\x01",
+    b"\xf5TF\x01\x02",
+])
+def test_truncated_header(packet):
+    assert is_binary_frame(packet)
+    assert FrameDecoder().decode(packet, SENDER) is None
+
+
+def test_truncated_data(encoder):
+    decoder = FrameDecoder()
+    decoder.decode(encoder.schema_packet(), SENDER)
+    assert decoder.decode(encoder.data_packet(SAMPLE)[:-4], SENDER) is None
+
+
+def test_truncated_schema(encoder):
+    decoder = FrameDecoder()
+    assert decoder.decode(encoder.schema_packet()[:-3], SENDER) is None
+    assert decoder.decode(encoder.data_packet(SAMPLE), SENDER) is None
+
+
+def test_unsupported_version(encoder):
+    packet = bytearray(encoder.schema_packet())
+    packet[3] = 99
+    decoder = FrameDecoder()
+    assert decoder.decode(bytes(packet), SENDER) is None
+    assert decoder.decode(encoder.data_packet(SAMPLE), SENDER) is None
+
+
+def test_text_items_round_trip():
+    sample = dict(SAMPLE)
+    sample[TEXT_ITEMS] = "PayloadInfo=" + "~".join(["AIM-9-4.4.7.24*2"] * 40) + ";SimOnGround=true"
+    encoder = FrameEncoder.from_sample(sample)
+    decoder = FrameDecoder()
+    decoder.decode(encoder.schema_packet(), SENDER)
+    assert len(sample[TEXT_ITEMS]) > 255
+    assert decoder.decode(encoder.data_packet(sample), SENDER) == sample
+
+
+def test_truncated_text_items():
+    sample = {"T": 1.5, TEXT_ITEMS: "HydSys=n/a"}
+    encoder = FrameEncoder.from_sample(sample)
+    decoder = FrameDecoder()
+    decoder.decode(encoder.schema_packet(), SENDER)
+    assert decoder.decode(encoder.data_packet(sample)[:-1], SENDER) is None
+
+
+def test_text_frames_are_not_binary():
+    assert not is_binary_frame(b"N=F-16C_50;src=DCS")
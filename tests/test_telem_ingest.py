@@ -0,0 +1,80 @@
+import pytest
+
+from telemffb.telem.TelemIngest import UNKNOWN_SOURCE, TelemIngest, frame_source
+
+
+@pytest.mark.parametrize("data, source", [
+    ("T=1.0;src=DCS;N=F-16C_50", "DCS"),
+    ("T=1.0;N=F-16C_50;src=MSFS2020", "MSFS2020"),
+    ("T=1.0;N=F-16C_50", UNKNOWN_SOURCE),
+    ("src=;T=1.0", UNKNOWN_SOURCE),
+    ({"src": "IL2"}, "IL2"),
+    ({"T": 1.0}, UNKNOWN_SOURCE),
+])
+def test_frame_source(data, source):
+    assert frame_source(data) == source
+
+
+def test_latest_frame_wins():
+    ingest = TelemIngest()
+    for i in range(5):
+        ingest.put_frame(f"T={i};src=DCS", now=float(i))
+    assert ingest.pending
+    buf, frame = ingest.take_frame(now=10.0)
+    assert frame == "T=4;src=DCS"
+    assert not ingest.pending
+    assert ingest.take_frame() is None
+    assert (buf.received, buf.processed, buf.dropped, buf.burst) == (5, 1, 4, 5)
+    assert buf.age == 6.0
+
+
+def test_longest_waiting_source_first():
+    ingest = TelemIngest()
+    ingest.put_frame({"src": "XPLANE", "T": 1}, now=2.0)
+    ingest.put_frame({"src": "DCS", "T": 1}, now=1.0)
+    ingest.put_frame({"src": "DCS", "T": 2}, now=3.0)
+    buf, frame = ingest.take_frame(now=4.0)
+    assert buf.name == "DCS" and frame["T"] == 2
+    buf, frame = ingest.take_frame(now=4.0)
+    assert buf.name == "XPLANE"
+    assert ingest.take_frame() is None
+
+
+def test_ring_buffer_overrun():
+    ingest = TelemIngest(capacity=4)
+    for i in range(10):
+        ingest.put_frame({"src": "DCS", "T": i}, now=float(i))
+    buf, frame = ingest.take_frame(now=10.0)
+    assert frame["T"] == 9
+    assert buf.overruns == 6
+    assert buf.dropped == 9
+    assert ingest.dropped == 9
+
+
+def test_source_argument_overrides_src():
+    ingest = TelemIngest()
+    ingest.put_frame("T=1;src=DCS", source="replay")
+    assert list(ingest.sources) == ["replay"]
+
+
+def test_events_are_queued_in_order():
+    ingest = TelemIngest()
+    for event in ["Start", "Pause", "Stop"]:
+        ingest.put_event(event)
+    assert ingest.pending
+    assert ingest.take_frame() is None
+    assert ingest.take_events() == ["Start", "Pause", "Stop"]
+    assert not ingest.pending
+    assert ingest.events_received == 3
+    assert ingest.max_event_backlog == 3
+
+
+def test_drop_rate_window():
+    ingest = TelemIngest()
+    for i in range(4):
+        ingest.put_frame({"src": "DCS"}, now=0.5)
+    ingest.sources["DCS"]._window_start = 0.0
+    buf, _ = ingest.take_frame(now=1.0)
+    assert buf.drop_rate == 0.75
+    stats = ingest.stats()[0]
+    assert stats["source"] == "DCS" and stats["dropped"] == 3
@@ -0,0 +1,59 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+simconnect = pytest.importorskip("simconnect")
+if not hasattr(simconnect, "SimConnect"):
+    # a bare "simconnect" directory on the path shadows pysimconnect
+    pytest.skip("pysimconnect is not installed", allow_module_level=True)
+
+import telemffb.globals as G
+from telemffb.telem.TelemManager import TelemManager
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    monkeypatch.setattr(G, "system_settings", {"telemTimeout": 100})
+    monkeypatch.setattr(G, "settings_mgr", SimpleNamespace(timed_out=True))
+    tm = TelemManager()
+    tm.timeouts = 0
+    tm.frames = []
+    tm.events = []
+    monkeypatch.setattr(tm, "watch_config_files", lambda: None)
+    monkeypatch.setattr(tm, "on_timeout", lambda: setattr(tm, "timeouts", tm.timeouts + 1))
+    monkeypatch.setattr(tm, "process_data", tm.frames.append)
+    monkeypatch.setattr(tm, "process_events", tm.events.extend)
+    tm.start()
+    yield tm
+    with tm._cond:
+        tm._run = False
+        tm._cond.notify_all()
+    tm.join(1.0)
+
+
+def test_timeout_only_when_the_wait_expires(manager):
+    # wake the loop up without submitting anything, faster than the telemetry timeout
+    end = time.perf_counter() + 0.3
+    while time.perf_counter() < end:
+        with manager._cond:
+            manager._cond.notify_all()
+        time.sleep(0.01)
+    assert manager.timeouts == 0
+    time.sleep(0.3)
+    assert manager.timeouts > 0
+
+
+def test_frames_are_processed(manager):
+    manager.submit_frame(b"T=1.0;src=DCS")
+    assert manager.wait_idle(1.0)
+    assert manager.frames == ["T=1.0;src=DCS"]
+    assert manager.timeouts == 0
+
+
+def test_event_names_keep_leading_event_prefix_characters(manager):
+    # str.lstrip("Ev=") strips any leading "E", "v" or "=", not the prefix
+    manager.submit_frame("Ev=vEvent")
+    manager.submit_frame("Ev==")
+    assert manager.wait_idle(1.0)
+    assert manager.events == ["vEvent", "="]
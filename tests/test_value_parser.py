@@ -0,0 +1,60 @@
+import random
+
+import pytest
+
+from telemffb.telem.ValueParser import TelemValueParser, parse_value
+from telemffb.utils import to_number
+
+VALUES = [
+    "0", "1", "-12", "007", "0.5", "-0.25", "123.456789", "1e-05", "1.5e3", "inf", "nan", ".5", "5.",
+    "true", "False", "YES", "off", "Enabled", "disable",
+    "50%", "%50", "120kt", "30kph", "500fpm", "3m/s", "60mph", "15deg", "20ms", "40hz", "12m", "100ft",
+    "2in", "3m^2", "4ft^2", "1.5kt", "-2.25deg",
+    "F-16C_50", "Cessna Skyhawk G1000 Asobo", "MSFS", "", " ", " 1", "1 ", "n/a", "{gear: 1}", "m", "kt",
+    "AIM-9-4.4.7.24*2",
+]
+
+
+def typed(v):
+    return [typed(x) for x in v] if isinstance(v, list) else (type(v).__name__, v)
+
+
+@pytest.mark.parametrize("value", VALUES)
+def test_parse_value_matches_to_number(value):
+    assert typed(parse_value(value)) == typed(to_number(value))
+
+
+def test_bools_and_ints_pass_through():
+    assert parse_value(True) is True
+    assert parse_value(3) == 3
+
+
+def test_random_values_match_to_number():
+    rng = random.Random(7)
+    units = ["", "%", "kt", "deg", "ft", "m", "in", "hz"]
+    for _ in range(5000):
+        number = rng.choice([str(rng.randint(-1000, 1000)), f"{rng.uniform(-1000, 1000):.{rng.randint(1, 6)}f}"])
+        unit = rng.choice(units)
+        value = rng.choice([number + unit, unit + number])
+        assert typed(parse_value(value)) == typed(to_number(value)), value
+
+
+def test_key_kind_follows_the_values():
+    parser = TelemValueParser()
+    for value in ["1", "2.5", "50%", "abc", "3", "4.25", "true", "-1"]:
+        assert typed(parser.parse("x", value)) == typed(to_number(value)), value
+
+
+def test_parse_item_arrays():
+    parser = TelemValueParser()
+    assert parser.parse_item("WoW", "0.00~0.5~1") == [0.0, 0.5, 1]
+    assert typed(parser.parse_item("WoW", "1~on~20%")) == typed([1, True, 0.2])
+    assert parser.parse_item("WoW", "0.1~0.2") == [0.1, 0.2]
+    assert parser.parse_item("Name", "Asobo") == "Asobo"
+
+
+def test_reset():
+    parser = TelemValueParser()
+    parser.parse("x", "abc")
+    parser.reset()
+    assert parser.parse("x", "1.5") == 1.5
@@ -35,11 +35,13 @@
 #include <chrono>
 #include <Windows.h>
 #include <algorithm>
+#include <cmath>
 #include "XPLMProcessing.h"
 #include "XPLMDataAccess.h"
 #include "XPLMUtilities.h"
 #include "XPLMPlugin.h"
 #include "XPLMPlanes.h"
+#include "TelemFrame.h"
 
 
 
@@ -166,7 +168,9 @@ static XPLMDataRef gGearZNode = XPLMFindDataRef("sim/aircraft/parts/acf_gear_zno
 
 
 
-std::map<std::string, std::string> telemetryData;
+telemframe::TelemFrameWriter telemetryData;
+bool gBinaryFrames = true;  // false sends the "key=value;" text frames instead
+std::chrono::steady_clock::time_point gLastSchemaSent;
 std::map<std::string, float> axisDataMap = { {"jx", 0.0}, {"jy", 0.0}, {"px", 0.0}, {"cy", 0.0} };
 
 bool overrideJoystick = false;
@@ -264,10 +268,10 @@ std::string FloatToString(float value, int precision, float conversionFactor = 1
     return stream.str();
 }
 
-// Function to convert an array of floats to a formatted string with an optional conversion factor
+// Function to read an array of floats with an optional conversion factor
 // If fixed size is passed, that many elements (including trailiing zero vaues) will be returned
-// Otherwise, the size is calculated, result formatted and any trailing 0 values are trimmed from the result
-std::string FloatArrayToString(XPLMDataRef dataRef, float conversionFactor = 1.0, int fixed_size = -1, int precision = 3) {
+// Otherwise, the size is calculated and any trailing values that format as 0 with the given precision are trimmed
+std::vector<float> FloatArray(XPLMDataRef dataRef, float conversionFactor = 1.0, int fixed_size = -1, int precision = 3) {
     // Determine the size of the array
     int size = XPLMGetDatavf(dataRef, nullptr, 0, 0);
 
@@ -277,46 +281,25 @@ std::string FloatArrayToString(XPLMDataRef dataRef, float conversionFactor = 1.0
         size = fixed_size;
     }
 
-
     // Use std::vector for dynamic memory allocation
     std::vector<float> dataArray(size);
 
     // Retrieve the entire array of values
     XPLMGetDatavf(dataRef, dataArray.data(), 0, size);
 
-    std::ostringstream formattedString;
-
-    // Set precision for floating-point values
-    formattedString << std::fixed << std::setprecision(precision);
-
-    for (int i = 0; i < size; ++i) {
-        // Convert each value with specified precision before applying conversion factor
-        float value = dataArray[i] * conversionFactor;
-
-        formattedString << std::setprecision(precision) << value;
-
-        //if (dataRef == gPropRPM) {
-        //    DebugLog("PropRPM:" + formattedString.str());
-        //}
-
-        if (i < size - 1) {
-            formattedString << "~";  // Add tilde separator between values, except for the last one
-        }
-    }
-
-    if (fixed_size > 0) {
-        // if fixed size was passed, return whole formatted string, including trailing 0.000 values
-        return formattedString.str();
+    for (float& value : dataArray) {
+        value *= conversionFactor;
     }
 
-    // Trim instances of "~0" from the right side of the string
-    std::string result = formattedString.str();
-    size_t pos = result.find_last_not_of("~0.000");
-    if (pos != std::string::npos) {
-        result = result.substr(0, pos + 1);
+    if (fixed_size <= 0) {
+        // Trim trailing zero values from the right side of the array
+        float zero = 0.5f * std::pow(10.0f, -precision);
+        while (!dataArray.empty() && std::fabs(dataArray.back()) < zero) {
+            dataArray.pop_back();
+        }
     }
 
-    return result;
+    return dataArray;
 }
 
 
@@ -351,18 +334,18 @@ void GetACDetails(const std::string& aircraftName) {
     gActiveNumEngines = XPLMGetDatai(gNumEngines);
     gActiveNumGear = GetNumGear();
 
-    telemetryData["RetractableGear"] = std::to_string(XPLMGetDatai(gRetractable));
-    telemetryData["NumberEngines"] = std::to_string(gActiveNumEngines);
-    telemetryData["NumberGear"] = std::to_string(gActiveNumGear);
-    telemetryData["WarnAlpha"] = FloatToString(XPLMGetDataf(gWarnAlpha), 3);
-    telemetryData["Vne"] = FloatToString(XPLMGetDataf(gVne) * kt_2_mps, 3);
-    telemetryData["Vso"] = FloatToString(XPLMGetDataf(gVso) * kt_2_mps, 3);
-    telemetryData["Vfe"] = FloatToString(XPLMGetDataf(gVfe) * kt_2_mps, 3);
-    telemetryData["Vle"] = FloatToString(XPLMGetDataf(gVle) * kt_2_mps, 3);
+    telemetryData.SetInt("RetractableGear", XPLMGetDatai(gRetractable));
+    telemetryData.SetInt("NumberEngines", gActiveNumEngines);
+    telemetryData.SetInt("NumberGear", gActiveNumGear);
+    telemetryData.SetFloat("WarnAlpha", XPLMGetDataf(gWarnAlpha), 3);
+    telemetryData.SetFloat("Vne", XPLMGetDataf(gVne) * kt_2_mps, 3);
+    telemetryData.SetFloat("Vso", XPLMGetDataf(gVso) * kt_2_mps, 3);
+    telemetryData.SetFloat("Vfe", XPLMGetDataf(gVfe) * kt_2_mps, 3);
+    telemetryData.SetFloat("Vle", XPLMGetDataf(gVle) * kt_2_mps, 3);
 
-    telemetryData["GearXNode"] = FloatArrayToString(gGearXNode, no_convert, gActiveNumGear);
-    telemetryData["GearYNode"] = FloatArrayToString(gGearYNode, no_convert, gActiveNumGear);
-    telemetryData["GearZNode"] = FloatArrayToString(gGearZNode, no_convert, gActiveNumGear);
+    telemetryData.SetFloats("GearXNode", FloatArray(gGearXNode, no_convert, gActiveNumGear), 3);
+    telemetryData.SetFloats("GearYNode", FloatArray(gGearYNode, no_convert, gActiveNumGear), 3);
+    telemetryData.SetFloats("GearZNode", FloatArray(gGearZNode, no_convert, gActiveNumGear), 3);
 
     //InitializeAW109DataRefs();
 
@@ -389,78 +372,78 @@ void CollectTelemetryData()
     for (const auto& sub : subscribedDataRefs) {
         if (sub.type == "int") {
             int value = XPLMGetDatai(sub.dataRef);
-            telemetryData[sub.key] = std::to_string(value);  // Store in telemetryData map
+            telemetryData.SetInt(sub.key, value);  // Store in telemetryData
         }
         else if (sub.type == "float") {
             float value = XPLMGetDataf(sub.dataRef) * sub.conversionFactor;  // Apply conversion factor
-            telemetryData[sub.key] = FloatToString(value, sub.precision);    // Use custom precision
+            telemetryData.SetFloat(sub.key, value, sub.precision);    // Use custom precision
         }
         else if (sub.type == "double") {
             double value = XPLMGetDatad(sub.dataRef) * sub.conversionFactor;  // Apply conversion factor
-            telemetryData[sub.key] = FloatToString(static_cast<float>(value), sub.precision);  // Store in telemetryData map
+            telemetryData.SetFloat(sub.key, static_cast<float>(value), sub.precision);  // Store in telemetryData
         }
         else {
             DebugLog("Unsupported dataref type: " + sub.type);
         }
     }
 
-    telemetryData["src"] = "XPLANE";
-    telemetryData["N"] = gAircraftName;
-    telemetryData["STOP"] = std::to_string(XPLMGetDatai(gPaused));
+    telemetryData.SetString("src", "XPLANE");
+    telemetryData.SetString("N", gAircraftName);
+    telemetryData.SetInt("STOP", XPLMGetDatai(gPaused));
 
     simPaused = XPLMGetDatai(gPaused) == 1;
 
-    telemetryData["SimPaused"] = std::to_string(simPaused);  // Store as string for telemetry
+    telemetryData.SetInt("SimPaused", simPaused);
 
-    telemetryData["SimOnGround"] = std::to_string(XPLMGetDatai(gOnGround));
+    telemetryData.SetInt("SimOnGround", XPLMGetDatai(gOnGround));
 
-    telemetryData["T"] = FloatToString(XPLMGetElapsedTime(), 3);
-    telemetryData["G"] = FloatToString(XPLMGetDataf(gGs_nrml), 3);
-    telemetryData["Gaxil"] = FloatToString(XPLMGetDataf(gGs_axil), 3);
-    telemetryData["Gside"] = FloatToString(XPLMGetDataf(gGs_side), 3);
+    telemetryData.SetFloat("T", XPLMGetElapsedTime(), 3);
+    telemetryData.SetFloat("G", XPLMGetDataf(gGs_nrml), 3);
+    telemetryData.SetFloat("Gaxil", XPLMGetDataf(gGs_axil), 3);
+    telemetryData.SetFloat("Gside", XPLMGetDataf(gGs_side), 3);
 
-    telemetryData["TAS"] = FloatToString(XPLMGetDataf(gTAS), 3);
-    telemetryData["IAS"] = FloatToString(XPLMGetDataf(gIAS) * kt_2_mps, 3); //convert from kt t m/s to match with gTAS
-    telemetryData["AirDensity"] = FloatToString(XPLMGetDataf(gAirDensity), 3);
-    telemetryData["DynPressure"] = FloatToString(XPLMGetDataf(gDynPress), 3);
-    telemetryData["AoA"] = FloatToString(XPLMGetDataf(gAoA), 3);
+    telemetryData.SetFloat("TAS", XPLMGetDataf(gTAS), 3);
+    telemetryData.SetFloat("IAS", XPLMGetDataf(gIAS) * kt_2_mps, 3); //convert from kt t m/s to match with gTAS
+    telemetryData.SetFloat("AirDensity", XPLMGetDataf(gAirDensity), 3);
+    telemetryData.SetFloat("DynPressure", XPLMGetDataf(gDynPress), 3);
+    telemetryData.SetFloat("AoA", XPLMGetDataf(gAoA), 3);
 
-    telemetryData["SideSlip"] = FloatToString(XPLMGetDataf(gSlip), 3);
+    telemetryData.SetFloat("SideSlip", XPLMGetDataf(gSlip), 3);
 
 
-    telemetryData["WeightOnWheels"] = FloatArrayToString(gWoW, no_convert, 3);
-    telemetryData["EngRPM"] = FloatArrayToString(gEngRPM, radps_2_rpm, gActiveNumEngines, 2);
-    telemetryData["EngPCT"] = FloatArrayToString(gEngPCT, no_convert, gActiveNumEngines, 3);
-    telemetryData["PropRPM"] = FloatArrayToString(gPropRPM, radps_2_rpm, gActiveNumEngines, 2);
-    telemetryData["PropThrust"] = FloatArrayToString(gPropThrust,no_convert, gActiveNumEngines, 2);
-    telemetryData["Afterburner"] = FloatArrayToString(gAfterburner,no_convert, gActiveNumEngines, 2);
+    telemetryData.SetFloats("WeightOnWheels", FloatArray(gWoW, no_convert, 3), 3);
+    telemetryData.SetFloats("EngRPM", FloatArray(gEngRPM, radps_2_rpm, gActiveNumEngines), 2);
+    telemetryData.SetFloats("EngPCT", FloatArray(gEngPCT, no_convert, gActiveNumEngines), 3);
+    telemetryData.SetFloats("PropRPM", FloatArray(gPropRPM, radps_2_rpm, gActiveNumEngines), 2);
+    telemetryData.SetFloats("PropThrust", FloatArray(gPropThrust, no_convert, gActiveNumEngines), 2);
+    telemetryData.SetFloats("Afterburner", FloatArray(gAfterburner, no_convert, gActiveNumEngines), 2);
 
 
-    telemetryData["RudderDefl"] = FloatToString(XPLMGetDataf(gRudDefl_l), 3);
-    telemetryData["RudderDefl_l"] = FloatToString(XPLMGetDataf(gRudDefl_l), 3);
-    telemetryData["RudderDefl_r"] = FloatToString(XPLMGetDataf(gRudDefl_r), 3);
+    telemetryData.SetFloat("RudderDefl", XPLMGetDataf(gRudDefl_l), 3);
+    telemetryData.SetFloat("RudderDefl_l", XPLMGetDataf(gRudDefl_l), 3);
+    telemetryData.SetFloat("RudderDefl_r", XPLMGetDataf(gRudDefl_r), 3);
 
-    telemetryData["AccBody"] =  FloatToString(XPLMGetDataf(gAccLocal_x) * fps_2_g, 3) + "~" + FloatToString(XPLMGetDataf(gAccLocal_y) * fps_2_g, 3) + "~" + FloatToString(XPLMGetDataf(gAccLocal_z) * fps_2_g, 3);
-    telemetryData["VelAcf"] =  FloatToString(XPLMGetDataf(gVelAcf_x), 3) + "~" + FloatToString(XPLMGetDataf(gVelAcf_y), 3) + "~" + FloatToString(-XPLMGetDataf(gVelAcf_z), 3);
-    telemetryData["Flaps"] = FloatToString(XPLMGetDataf(gFlaps), 3);
-    telemetryData["Gear"] = FloatArrayToString(gGear, no_convert, 3);
+    telemetryData.SetFloats("AccBody", { XPLMGetDataf(gAccLocal_x) * fps_2_g, XPLMGetDataf(gAccLocal_y) * fps_2_g, XPLMGetDataf(gAccLocal_z) * fps_2_g }, 3);
+    telemetryData.SetFloats("VelAcf", { XPLMGetDataf(gVelAcf_x), XPLMGetDataf(gVelAcf_y), -XPLMGetDataf(gVelAcf_z) }, 3);
+    telemetryData.SetFloat("Flaps", XPLMGetDataf(gFlaps), 3);
+    telemetryData.SetFloats("Gear", FloatArray(gGear, no_convert, 3), 3);
 
-    telemetryData["APMode"] = std::to_string(XPLMGetDatai(gAPMode));
-    telemetryData["APServos"] = std::to_string(XPLMGetDatai(gAPServos));
-    telemetryData["APYawServo"] = FloatToString(XPLMGetDataf(gYawServo), 3);
-    telemetryData["APPitchServo"] = FloatToString(XPLMGetDataf(gPitchServo), 3);
-    telemetryData["APRollServo"] = FloatToString(XPLMGetDataf(gRollServo), 3);
-    telemetryData["ElevTrimPct"] = FloatToString(XPLMGetDataf(gElevTrim), 3);
-    telemetryData["AileronTrimPct"] = FloatToString(XPLMGetDataf(gAilerTrim), 3);
-    telemetryData["RudderTrimPct"] = FloatToString(XPLMGetDataf(gRudderTrim), 3);
+    telemetryData.SetInt("APMode", XPLMGetDatai(gAPMode));
+    telemetryData.SetInt("APServos", XPLMGetDatai(gAPServos));
+    telemetryData.SetFloat("APYawServo", XPLMGetDataf(gYawServo), 3);
+    telemetryData.SetFloat("APPitchServo", XPLMGetDataf(gPitchServo), 3);
+    telemetryData.SetFloat("APRollServo", XPLMGetDataf(gRollServo), 3);
+    telemetryData.SetFloat("ElevTrimPct", XPLMGetDataf(gElevTrim), 3);
+    telemetryData.SetFloat("AileronTrimPct", XPLMGetDataf(gAilerTrim), 3);
+    telemetryData.SetFloat("RudderTrimPct", XPLMGetDataf(gRudderTrim), 3);
 
-    telemetryData["CanopyPos"] = FloatToString(XPLMGetDataf(gCanopyPos), 3);
-    telemetryData["SpeedbrakePos"] = FloatToString(XPLMGetDataf(gSpeedbrakePos), 3);
+    telemetryData.SetFloat("CanopyPos", XPLMGetDataf(gCanopyPos), 3);
+    telemetryData.SetFloat("SpeedbrakePos", XPLMGetDataf(gSpeedbrakePos), 3);
 
 
-    telemetryData["cOvrd"] = std::to_string(overrideCollective);
-    telemetryData["jOvrd"] = std::to_string(overrideJoystick);
-    telemetryData["pOvrd"] = std::to_string(overridePedals);
+    telemetryData.SetInt("cOvrd", overrideCollective);
+    telemetryData.SetInt("jOvrd", overrideJoystick);
+    telemetryData.SetInt("pOvrd", overridePedals);
 
 
 
@@ -468,17 +451,26 @@ void CollectTelemetryData()
 
 
 
-void FormatAndSendTelemetryData()
+void SendPacket(const std::string& packet)
 {
-    // Create a string with the data for UDP transmission
-    std::string dataString;
+    sendto(udpSocket_tx, packet.c_str(), packet.length(), 0, (struct sockaddr*)&serverAddr_tx, sizeof(serverAddr_tx));
+}
 
-    for (const auto& entry : telemetryData) {
-        dataString += entry.first + "=" + entry.second + ";";
+void FormatAndSendTelemetryData()
+{
+    if (!gBinaryFrames) {
+        // "key=value;" text frame
+        SendPacket(telemetryData.TextPacket());
+        return;
     }
 
-    // Send the data over the UDP socket
-    sendto(udpSocket_tx, dataString.c_str(), dataString.length(), 0, (struct sockaddr*)&serverAddr_tx, sizeof(serverAddr_tx));
+    // The schema goes out when the key table changes and once per second, so that a TelemFFB started later picks it up
+    auto now = std::chrono::steady_clock::now();
+    if (telemetryData.SchemaChanged() || now - gLastSchemaSent >= std::chrono::seconds(1)) {
+        SendPacket(telemetryData.SchemaPacket());
+        gLastSchemaSent = now;
+    }
+    SendPacket(telemetryData.DataPacket());
 }
 
 void ProcessReceivedData(const std::string& dataType, const std::string& payload) {
@@ -0,0 +1,191 @@
+/*
+* This file is part of the TelemFFB distribution(https://github.com/walmis/TelemFFB).
+* Copyright(c) 2023 Valmantas Palikša.
+* Copyright(c) 2023 Micah Frisby
+
+* This program is free software : you can redistribute it and /or modify
+* it under the terms of the GNU General Public License as published by
+* the Free Software Foundation, version 3.
+
+* This program is distributed in the hope that it will be useful, but
+* WITHOUT ANY WARRANTY; without even the implied warranty of
+* MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.See the GNU
+* General Public License for more details.
+
+* You should have received a copy of the GNU General Public License
+* along with this program.If not, see < http://www.gnu.org/licenses/>.
+*/
+
+/*
+* Typed telemetry values and their encoding as text frames ("key=value~value;...") or as binary
+* frames.  The binary format is specified in telemffb/telem/TelemFrame.py: a schema packet declares
+* the key table, data packets carry the numeric values packed back to back followed by the strings.
+* All values are written little endian (x86/x64).
+*/
+
+#pragma once
+
+#include <cstdint>
+#include <cstring>
+#include <iomanip>
+#include <map>
+#include <sstream>
+#include <string>
+#include <vector>
+
+namespace telemframe {
+
+const char kMagic[3] = { '\xf5', 'T', 'F' };
+const uint8_t kVersion = 1;
+const uint8_t kMsgSchema = 1;
+const uint8_t kMsgData = 2;
+
+struct TelemValue {
+    char type = 'f';            // 'f' float32 (scalar or array), 'i' int32, 's' string
+    std::vector<float> floats;
+    int32_t integer = 0;
+    std::string text;
+    int precision = 3;          // decimals in text frames
+};
+
+class TelemFrameWriter {
+public:
+    void SetFloat(const std::string& key, float value, int precision = 3) {
+        TelemValue& v = values[key];
+        v.type = 'f';
+        v.floats.assign(1, value);
+        v.precision = precision;
+    }
+
+    // an empty array is sent as an empty value, the same as in a text frame
+    void SetFloats(const std::string& key, const std::vector<float>& data, int precision = 3) {
+        TelemValue& v = values[key];
+        v.type = 'f';
+        v.floats = data;
+        v.precision = precision;
+    }
+
+    void SetInt(const std::string& key, int32_t value) {
+        TelemValue& v = values[key];
+        v.type = 'i';
+        v.integer = value;
+    }
+
+    void SetString(const std::string& key, const std::string& value) {
+        TelemValue& v = values[key];
+        v.type = 's';
+        v.text = value;
+    }
+
+    // "key=value;" for all values, arrays "~" separated
+    std::string TextPacket() const {
+        std::ostringstream out;
+        out << std::fixed;
+        for (const auto& entry : values) {
+            const TelemValue& v = entry.second;
+            out << entry.first << "=";
+            if (v.type == 'i') {
+                out << v.integer;
+            }
+            else if (v.type == 's') {
+                out << v.text;
+            }
+            else {
+                out << std::setprecision(v.precision);
+                for (size_t i = 0; i < v.floats.size(); ++i) {
+                    if (i) out << "~";
+                    out << v.floats[i];
+                }
+            }
+            out << ";";
+        }
+        return out.str();
+    }
+
+    // Returns true when the key table differs from the one of the last schema packet
+    bool SchemaChanged() {
+        std::string signature;
+        for (const auto& entry : values) {
+            signature += entry.first;
+            signature += '\0';
+            signature += WireType(entry.second);
+            signature += static_cast<char>(WireCount(entry.second));
+        }
+        if (signature == schemaSignature) {
+            return false;
+        }
+        schemaSignature = signature;
+        schemaId = static_cast<uint8_t>(schemaId + 1);
+        return true;
+    }
+
+    std::string SchemaPacket() const {
+        std::string out = Header(kMsgSchema);
+        PutU16(out, static_cast<uint16_t>(values.size()));
+        for (const auto& entry : values) {
+            std::string name = entry.first.substr(0, 255);
+            out += WireType(entry.second);
+            out += static_cast<char>(WireCount(entry.second));
+            out += static_cast<char>(name.size());
+            out += name;
+        }
+        return out;
+    }
+
+    // Call SchemaChanged() first so that the data matches the last schema packet
+    std::string DataPacket() const {
+        std::string out = Header(kMsgData);
+        for (const auto& entry : values) {
+            const TelemValue& v = entry.second;
+            char type = WireType(v);
+            if (type == 'i') {
+                PutRaw(out, &v.integer, sizeof(v.integer));
+            }
+            else if (type == 'f') {
+                PutRaw(out, v.floats.data(), WireCount(v) * sizeof(float));
+            }
+        }
+        for (const auto& entry : values) {
+            const TelemValue& v = entry.second;
+            if (WireType(v) == 's') {
+                std::string text = v.type == 's' ? v.text.substr(0, 255) : std::string();
+                out += static_cast<char>(text.size());
+                out += text;
+            }
+        }
+        return out;
+    }
+
+private:
+    std::map<std::string, TelemValue> values;
+    std::string schemaSignature;
+    uint8_t schemaId = 0;
+
+    // empty arrays can't be declared as numeric fields, they go out as empty strings
+    static char WireType(const TelemValue& v) {
+        return (v.type == 'f' && v.floats.empty()) ? 's' : v.type;
+    }
+
+    static int WireCount(const TelemValue& v) {
+        return (v.type == 'f' && !v.floats.empty()) ? static_cast<int>(v.floats.size() > 255 ? 255 : v.floats.size()) : 1;
+    }
+
+    std::string Header(uint8_t msgType) const {
+        std::string out(kMagic, sizeof(kMagic));
+        out += static_cast<char>(kVersion);
+        out += static_cast<char>(msgType);
+        out += static_cast<char>(schemaId);
+        return out;
+    }
+
+    static void PutU16(std::string& out, uint16_t value) {
+        out += static_cast<char>(value & 0xff);
+        out += static_cast<char>(value >> 8);
+    }
+
+    static void PutRaw(std::string& out, const void* data, size_t size) {
+        out.append(static_cast<const char*>(data), size);
+    }
+};
+
+}  // namespace telemframe